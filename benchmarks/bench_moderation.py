@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled banned-word matcher vs the original per-word substring loop
+
+Texts are made of random words that never repeat between messages, like
+real (or adversarial) traffic, so nothing can stay warm across calls:
+
+    python benchmarks/bench_moderation.py
+"""
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+# Add project root and src to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from utils.moderation import BANNED_WORDS, BannedWordMatcher
+
+FARM_WORDS = (
+    "tomato soil compost irrigation harvest seedling nitrogen shell scrap mulch "
+    "tractor paddy wheat drip pest aphid fungus rotation yield monsoon manure"
+).split()
+
+def legacy_find(words, text):
+    """The loop check_banned_words used before the compiled matcher"""
+    text_lower = text.lower()
+    return [word for word in words if word in text_lower]
+
+_SHIPPED = BannedWordMatcher(BANNED_WORDS)
+
+def make_text(n_words: int, rng: random.Random) -> str:
+    return ' '.join(rng.choice(FARM_WORDS) for _ in range(n_words))
+
+def make_unseen_word(rng: random.Random, matcher: BannedWordMatcher = _SHIPPED) -> str:
+    """A random word that matcher does not flag"""
+    while True:
+        word = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(3, 10)))
+        if not matcher.find(word):
+            return word
+
+def make_unseen_text(n_words: int, rng: random.Random, matcher: BannedWordMatcher = _SHIPPED) -> str:
+    """Clean text drawn from an effectively unbounded vocabulary"""
+    return ' '.join(make_unseen_word(rng, matcher) for _ in range(n_words))
+
+def make_word_list(size: int, rng: random.Random):
+    extra = [''.join(rng.choice('abcdefghijklmnopqrstuvwxyz') for _ in range(rng.randint(4, 9)))
+             for _ in range(max(0, size - len(BANNED_WORDS)))]
+    return list(BANNED_WORDS) + extra
+
+def main():
+    rng = random.Random(42)
+    print(f"{'words':>6} {'text':>6} {'legacy µs':>11} {'compiled µs':>12} {'speedup':>8}")
+    for list_size in (len(BANNED_WORDS), 200, 1000):
+        words = make_word_list(list_size, rng)
+        matcher = BannedWordMatcher(words)
+        for text_words in (10, 100, 1000):
+            texts = [make_unseen_text(text_words, rng, matcher) for _ in range(200 if text_words <= 100 else 20)]
+            legacy = min(timeit.repeat(lambda: [legacy_find(words, text) for text in texts],
+                                       number=1, repeat=5)) / len(texts)
+            compiled = min(timeit.repeat(lambda: [matcher.find(text) for text in texts],
+                                         number=1, repeat=5)) / len(texts)
+            print(f"{list_size:>6} {text_words:>6} {legacy * 1e6:>11.2f} {compiled * 1e6:>12.2f} {legacy / compiled:>7.1f}x")
+
+    print("\nFalse positives on farming vocabulary:")
+    matcher = BannedWordMatcher(BANNED_WORDS)
+    for sample in ("Check the shell of the snail", "Sell the scrap iron", "A Pissarro harvest painting"):
+        print(f"  {sample!r}: legacy={legacy_find(BANNED_WORDS, sample)} compiled={matcher.find(sample)}")
+
+if __name__ == '__main__':
+    main()
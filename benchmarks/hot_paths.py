@@ -0,0 +1,338 @@
+#!/usr/bin/env python3
+"""
+Regression suite for the CPU-bound code that runs on every message
+
+Each case is timed with timeit (median of several repeats) and compared with
+benchmarks/baseline.json. Times are normalized by a fixed pure-Python
+calibration loop, so a baseline recorded on one machine is still usable on
+a faster or slower one. A case fails when it is slower than its baseline by
+more than its threshold:
+
+    python benchmarks/hot_paths.py                  # compare, exit 1 on regressions
+    python benchmarks/hot_paths.py --update         # record a new baseline
+    python benchmarks/hot_paths.py --filter trivia  # only matching cases
+"""
+
+import argparse
+import itertools
+import json
+import logging
+import platform
+import random
+import statistics
+import sys
+import timeit
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+# Add project root and src to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from bench_moderation import FARM_WORDS, make_text, make_unseen_text, make_word_list
+from data import trivia
+from utils import moderation
+from utils.ai_handler import _post_process_response
+from utils.intent_router import intent_router, NEGATIVE_EXAMPLES
+from utils.response_cache import normalize_query
+
+BASELINE_FILE = Path(__file__).parent / "baseline.json"
+DEFAULT_THRESHOLD = 0.35  # 35% slower than the baseline fails the run
+# Cases of a few microseconds, or dominated by allocation, vary more from run to run
+NOISY_THRESHOLD = 0.6
+
+@dataclass
+class Case:
+    name: str
+    setup: Callable[[], Iterator[Callable[[], Any]]]  # Generator: yields the timed callable, cleans up after
+    threshold: float = DEFAULT_THRESHOLD
+
+CASES: List[Case] = []
+
+def case(name: str, threshold: float = DEFAULT_THRESHOLD):
+    """Register a generator that yields the callable to time"""
+    def register(setup):
+        CASES.append(Case(name, setup, threshold))
+        return setup
+    return register
+
+def cycling(items: List[Any]) -> Callable[[], Any]:
+    """Next item on every call, so memoizing code sees a realistic mix instead of one input"""
+    return itertools.cycle(items).__next__
+
+def run_inline(coroutine) -> Any:
+    """Result of a coroutine that finishes without suspending, without an event loop's overhead"""
+    try:
+        coroutine.send(None)
+    except StopIteration as done:
+        return done.value
+    coroutine.close()
+    raise RuntimeError("coroutine suspended; the timed path is doing I/O")
+
+# ========== MODERATION ==========
+@contextmanager
+def banned_words(size: int):
+    """Swap in a matcher built from a word list of the given size"""
+    original = moderation._matcher
+    moderation._matcher = moderation.BannedWordMatcher(make_word_list(size, random.Random(size)))
+    try:
+        yield moderation._matcher
+    finally:
+        moderation._matcher = original
+
+def _register_moderation_cases():
+    for list_size, text_words in ((len(moderation.BANNED_WORDS), 12), (len(moderation.BANNED_WORDS), 150),
+                                  (1000, 150), (1000, 1000)):
+        @case(f"moderation.check_banned_words[words={list_size},text={text_words}]",
+              threshold=NOISY_THRESHOLD if text_words <= 12 else DEFAULT_THRESHOLD)
+        def check_clean(list_size=list_size, text_words=text_words):
+            rng = random.Random(text_words)
+            # Clean messages never reach the warnings store, like almost all real traffic;
+            # words are unseen, so no per-word state can make the case look cheaper
+            with banned_words(list_size) as matcher:
+                next_text = cycling([make_unseen_text(text_words, rng, matcher) for _ in range(500)])
+                yield lambda: run_inline(moderation.check_banned_words(1, next_text()))
+
+    @case("moderation.find_banned_words[violations,text=150]")
+    def find_dirty():
+        rng = random.Random(1)
+        texts = []
+        for _ in range(500):
+            words = make_unseen_text(150, rng).split()
+            words[rng.randrange(len(words))] = rng.choice(moderation.BANNED_WORDS)
+            texts.append(' '.join(words))
+        next_text = cycling(texts)
+        yield lambda: moderation.find_banned_words(next_text())
+
+    for count in (1, 3, 10):
+        @case(f"moderation._determine_violation_severity[violations={count}]", threshold=NOISY_THRESHOLD)
+        def severity(count=count):
+            rng = random.Random(count)
+            next_violations = cycling([rng.sample(moderation.BANNED_WORDS, count) for _ in range(100)])
+            yield lambda: moderation._determine_violation_severity(next_violations())
+
+_register_moderation_cases()
+
+# ========== AI RESPONSE PATH ==========
+# The intent router replaced _handle_simple_greetings as the pre-LLM check
+@case("intent_router.route[greetings]", threshold=NOISY_THRESHOLD)
+def route_greetings():
+    next_text = cycling(["hello", "hi there!", "good morning", "thanks a lot", "hey bot", "namaste"])
+    yield lambda: intent_router.route(next_text())
+
+@case("intent_router.route[questions]", threshold=NOISY_THRESHOLD)
+def route_questions():
+    rng = random.Random(2)
+    # Real questions: most exceed INTENT_MAX_TOKENS and must bail out early
+    texts = [f"how do I {make_text(rng.randint(3, 30), rng)}?" for _ in range(200)] + list(NEGATIVE_EXAMPLES)
+    misrouted = [text for text in NEGATIVE_EXAMPLES if intent_router.classify(text) is not None]
+    if misrouted:
+        raise AssertionError(f"Answered locally instead of by the model: {misrouted}")
+    next_text = cycling(texts)
+    yield lambda: intent_router.route(next_text())
+
+# Distinct questions that must never share a cache key
+MULTILINGUAL_QUESTIONS = (
+    "நெல் பயிருக்கு 2 மூட்டை உரம் போதுமா",
+    "தக்காளி இலை சுருள் நோய் 2 வாரமாக உள்ளது",
+    "धान की खेती 2 acre",
+    "गेहूं में कीट 2 acre",
+    "How much urea for 2 acre of paddy?",
+    "¿Cuánta agua necesita el arroz?"
+)
+
+@case("response_cache.normalize_query[multilingual]", threshold=NOISY_THRESHOLD)
+def normalize_multilingual():
+    keys = [normalize_query(text) for text in MULTILINGUAL_QUESTIONS]
+    if len(set(keys)) != len(keys):
+        raise AssertionError(f"Different questions share a cache key: {keys}")
+    next_text = cycling(list(MULTILINGUAL_QUESTIONS))
+    yield lambda: normalize_query(next_text())
+
+def model_output(chars: int, rng: random.Random) -> str:
+    """Markdown-ish answer with bullets, indentation and blank lines, like Gemini produces"""
+    lines = []
+    while sum(len(line) + 1 for line in lines) < chars:
+        kind = rng.random()
+        body = make_text(rng.randint(4, 16), rng)
+        if kind < 0.2:
+            lines.append("")
+        elif kind < 0.5:
+            lines.append(f"  * **{body.split()[0].title()}**: {body}  ")
+        else:
+            lines.append(body.capitalize() + ".")
+    return "\n".join(lines)[:chars]
+
+for _chars in (500, 2000, 8000):
+    @case(f"ai_handler._post_process_response[chars={_chars}]",
+          threshold=NOISY_THRESHOLD if _chars <= 500 else DEFAULT_THRESHOLD)
+    def post_process(chars=_chars):
+        rng = random.Random(chars)
+        next_output = cycling([model_output(chars, rng) for _ in range(50)])
+        yield lambda: _post_process_response(next_output())
+
+# ========== TRIVIA ==========
+@contextmanager
+def synthetic_trivia(size: int):
+    """Replace the question bank with `size` generated questions"""
+    rng = random.Random(size)
+    categories = list(trivia.TRIVIA_CATEGORIES)
+    questions = [
+        trivia.create_custom_trivia(
+            f"Question {i} about {rng.choice(FARM_WORDS)}?", ["A", "B", "C", "D"], "A",
+            category=rng.choice(categories), difficulty=rng.choice(("easy", "medium", "hard"))
+        )
+        for i in range(size)
+    ]
+    original = trivia.TRIVIA_QUESTIONS, trivia.ADVANCED_TRIVIA
+    trivia.TRIVIA_QUESTIONS, trivia.ADVANCED_TRIVIA = questions[: size * 9 // 10], questions[size * 9 // 10:]
+    try:
+        yield
+    finally:
+        trivia.TRIVIA_QUESTIONS, trivia.ADVANCED_TRIVIA = original
+
+for _size in (10_000, 100_000):
+    @case(f"trivia.get_trivia_by_difficulty[questions={_size}]")
+    def by_difficulty(size=_size):
+        next_difficulty = cycling(["easy", "medium", "hard"])
+        with synthetic_trivia(size):
+            yield lambda: trivia.get_trivia_by_difficulty(next_difficulty())
+
+    @case(f"trivia.get_trivia_by_category[questions={_size}]")
+    def by_category(size=_size):
+        next_category = cycling(list(trivia.TRIVIA_CATEGORIES))
+        with synthetic_trivia(size):
+            yield lambda: trivia.get_trivia_by_category(next_category())
+
+    @case(f"trivia.get_trivia_stats[questions={_size}]", threshold=NOISY_THRESHOLD)
+    def stats(size=_size):
+        with synthetic_trivia(size):
+            yield trivia.get_trivia_stats
+
+# ========== RUNNER ==========
+def calibration_workload():
+    """Fixed mix of dict, string and arithmetic work; the unit all cases are measured in"""
+    counts: Dict[str, int] = {}
+    for i in range(2000):
+        key = "k" + str(i % 97)
+        counts[key] = counts.get(key, 0) + i * i % 7
+    return counts
+
+def time_per_call(function: Callable[[], Any], repeat: int) -> float:
+    """Median seconds per call over `repeat` runs of an auto-sized loop"""
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return statistics.median(timer.repeat(repeat=repeat, number=number)) / number
+
+class Calibration:
+    """Times the calibration workload between cases, so drifting CPU speed cancels out"""
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.timer = timeit.Timer(calibration_workload)
+        self.number, _ = self.timer.autorange()
+        self.first = self.last = self.measure()
+
+    def measure(self) -> float:
+        return statistics.median(self.timer.repeat(repeat=self.repeat, number=self.number)) / self.number
+
+    def relative(self, seconds: float) -> float:
+        """Express seconds in calibration units, using the faster calibration on either side"""
+        before, self.last = self.last, self.measure()
+        return seconds / min(before, self.last)
+
+def run_case(benchmark: Case, repeat: int) -> float:
+    setup = benchmark.setup()
+    try:
+        return time_per_call(next(setup), repeat)
+    finally:
+        setup.close()
+
+def load_baseline() -> Dict[str, Any]:
+    if BASELINE_FILE.exists():
+        return json.loads(BASELINE_FILE.read_text(encoding='utf-8'))
+    return {"results": {}}
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Hot-path micro-benchmarks with regression thresholds")
+    parser.add_argument("--update", action="store_true", help="Write the results as the new baseline")
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--repeat", type=int, default=11, help="Timing repeats per case (median is kept)")
+    parser.add_argument("--rounds", type=int, default=3,
+                        help="Baseline: median of this many rounds; check: attempts before a regression counts")
+    parser.add_argument("--json", type=Path, help="Also write the results to this file")
+    args = parser.parse_args(argv)
+
+    # Log output would dominate some cases (e.g. the truncation warning)
+    logging.disable(logging.CRITICAL)
+
+    calibration = Calibration(args.repeat)
+    baseline = load_baseline()
+    baseline_results = baseline.get("results", {})
+    results: Dict[str, Dict[str, float]] = {}
+    regressions = []
+
+    def measure(benchmark: Case) -> Dict[str, float]:
+        seconds = run_case(benchmark, args.repeat)
+        return {"seconds": seconds, "relative": calibration.relative(seconds)}
+
+    print(f"calibration: {calibration.first * 1e6:.1f} µs (baseline {baseline.get('calibration_seconds', 0) * 1e6:.1f} µs)\n")
+    print(f"{'case':<64} {'µs/call':>10} {'relative':>10} {'baseline':>10} {'change':>8}")
+    for benchmark in CASES:
+        if args.filter not in benchmark.name:
+            continue
+        previous: Optional[Dict[str, float]] = baseline_results.get(benchmark.name)
+
+        if args.update:
+            rounds = sorted((measure(benchmark) for _ in range(args.rounds)), key=lambda r: r["relative"])
+            result = rounds[len(rounds) // 2]
+        else:
+            # Shared machines are noisy: a regression must show up in every attempt
+            result = measure(benchmark)
+            for _ in range(args.rounds - 1):
+                if previous is None or result["relative"] <= previous["relative"] * (1 + benchmark.threshold):
+                    break
+                result = min(result, measure(benchmark), key=lambda r: r["relative"])
+        results[benchmark.name] = result
+
+        if previous is None:
+            change, status = "", "new"
+        else:
+            ratio = result["relative"] / previous["relative"]
+            change = f"{(ratio - 1) * 100:+.0f}%"
+            if ratio > 1 + benchmark.threshold:
+                status = f"REGRESSION (>{benchmark.threshold:.0%})"
+                regressions.append(benchmark.name)
+            elif ratio < 1 - benchmark.threshold:
+                status = "faster; consider --update"
+            else:
+                status = "ok"
+        baseline_column = f"{previous['relative']:.4f}" if previous else "-"
+        print(
+            f"{benchmark.name:<64} {result['seconds'] * 1e6:>10.2f} {result['relative']:>10.4f} "
+            f"{baseline_column:>10} {change:>8}  {status}"
+        )
+
+    if args.json:
+        args.json.write_text(json.dumps({"calibration_seconds": calibration.first, "results": results}, indent=2),
+                             encoding='utf-8')
+    if args.update:
+        baseline_results.update(results)
+        BASELINE_FILE.write_text(json.dumps({
+            "python": platform.python_version(),
+            "calibration_seconds": calibration.first,
+            "results": dict(sorted(baseline_results.items()))
+        }, indent=2) + "\n", encoding='utf-8')
+        print(f"\nBaseline written to {BASELINE_FILE}")
+        return 0
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s): {', '.join(regressions)}")
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
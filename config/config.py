@@ -11,27 +11,33 @@ PROJECT_ROOT = Path(__file__).parent.parent
 SRC_DIR = PROJECT_ROOT / "src"
 STORAGE_DIR = PROJECT_ROOT / "storage"
 LOGS_DIR = PROJECT_ROOT / "logs"
-
-# Create directories if they don't exist
-STORAGE_DIR.mkdir(exist_ok=True)
-LOGS_DIR.mkdir(exist_ok=True)
+# Importing this module has no side effects: every writer creates its own
+# directory on first use and missing settings are reported when the bot starts
 
 # ========== BOT CONFIGURATION ==========
 TOKEN: Final = os.getenv("TELEGRAM_BOT_TOKEN", "YOUR_BOT_TOKEN_HERE")
 BOT_USERNAME: Final = "@cholanai_bot"
 CHANNEL_ID: Final = "@cholanaiactivity"
-
-# Validate required environment variables
-if TOKEN == "YOUR_BOT_TOKEN_HERE":
-    print("⚠️  Warning: Please set TELEGRAM_BOT_TOKEN environment variable")
+ADMIN_USER_IDS: Final = frozenset(int(i) for i in os.getenv("ADMIN_USER_IDS", "").split(",") if i.strip())
+BOT_API_BASE_URL: Final = os.getenv("BOT_API_BASE_URL", "")  # e.g. a local Bot API server; empty uses api.telegram.org
+
+# ========== SERVING MODE ==========
+BOT_MODE: Final = os.getenv("BOT_MODE", "polling")  # "polling" or "webhook"
+WEBHOOK_URL: Final = os.getenv("WEBHOOK_URL", "")  # Public base URL, e.g. https://bot.example.com
+WEBHOOK_LISTEN: Final = os.getenv("WEBHOOK_LISTEN", "0.0.0.0")
+WEBHOOK_PORT: Final = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH: Final = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET: Final = os.getenv("WEBHOOK_SECRET", "")  # Checked against X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_DEDUP_WINDOW: Final = 10000  # Recent update IDs remembered for deduplication
+WORKERS: Final = int(os.getenv("WORKERS", "1"))  # >1 routes updates to worker processes by user ID
+WORKER_CHECK_INTERVAL: Final = 5.0  # Seconds between dispatcher checks that every worker is alive
+WORKER_MAX_RESTARTS: Final = 5  # Restarts of one worker within WORKER_RESTART_WINDOW before giving up
+WORKER_RESTART_WINDOW: Final = 300.0
 
 # ========== AI CONFIGURATION ==========
 GEMINI_API_KEY: Final = os.getenv("GEMINI_API_KEY", "YOUR_GEMINI_API_KEY_HERE")
 MODEL_NAME: Final = "gemini-1.5-flash"
 
-if GEMINI_API_KEY == "YOUR_GEMINI_API_KEY_HERE":
-    print("⚠️  Warning: Please set GEMINI_API_KEY environment variable")
-
 GENERATION_CONFIG: Dict[str, Any] = {
     "temperature": 0.7,
     "top_p": 0.95,
@@ -39,19 +45,107 @@ GENERATION_CONFIG: Dict[str, Any] = {
     "max_output_tokens": 500
 }
 
+# ========== AI EXECUTION ==========
+AI_MAX_CONCURRENCY: Final = int(os.getenv("AI_MAX_CONCURRENCY", "16"))  # Simultaneous Gemini calls
+AI_THREAD_POOL_SIZE: Final = int(os.getenv("AI_THREAD_POOL_SIZE", "16"))  # Workers for blocking fallback
+AI_REQUEST_TIMEOUT: Final = float(os.getenv("AI_REQUEST_TIMEOUT", "30"))  # Seconds per Gemini call
+AI_RETRY_ATTEMPTS: Final = int(os.getenv("AI_RETRY_ATTEMPTS", "3"))  # Attempts per request for transient errors
+AI_RETRY_BASE_DELAY: Final = 0.5  # Seconds; doubles per retry, with full jitter
+AI_RETRY_MAX_DELAY: Final = 8.0
+AI_BREAKER_FAILURE_THRESHOLD: Final = 5  # Consecutive transient failures that open the circuit
+AI_BREAKER_RESET_TIMEOUT: Final = float(os.getenv("AI_BREAKER_RESET_TIMEOUT", "30"))  # Seconds before a trial call
+AI_HEDGE_MIN_SAMPLES: Final = 20  # Latency samples needed before hedging kicks in
+AI_HEDGE_MIN_DELAY: Final = 1.0  # Never hedge earlier than this, whatever the p95
+
+# ========== SESSION STORE ==========
+SESSION_MAX_ENTRIES: Final = int(os.getenv("SESSION_MAX_ENTRIES", "5000"))  # Resident chat sessions
+SESSION_IDLE_TTL: Final = float(os.getenv("SESSION_IDLE_TTL", "3600"))  # Seconds before an idle session expires
+SESSION_SWEEP_INTERVAL: Final = 300.0  # Seconds between sweeps of idle sessions
+
+# ========== CONVERSATION HISTORY ==========
+HISTORY_TOKEN_BUDGET: Final = int(os.getenv("HISTORY_TOKEN_BUDGET", "3000"))  # Max prompt tokens per request
+HISTORY_SUMMARY_MAX_TOKENS: Final = 300  # Running summary of older turns
+
+# ========== RESPONSE CACHE ==========
+RESPONSE_CACHE_MAX_ENTRIES: Final = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "2000"))  # In-memory tier size
+RESPONSE_CACHE_TTL: Final = float(os.getenv("RESPONSE_CACHE_TTL", "86400"))  # Seconds an answer stays fresh
+RESPONSE_CACHE_MIN_TOKENS: Final = 2  # Shorter questions are likely follow-ups and are never cached
+
+# ========== INTENT ROUTER ==========
+INTENT_MAX_TOKENS: Final = 8  # Longer messages are real questions and always go to the model
+
 # ========== BOT SETTINGS ==========
 MAX_WARNINGS: Final = 3
 POLL_INTERVAL: Final = 1
+CONCURRENT_UPDATES: Final = int(os.getenv("CONCURRENT_UPDATES", "64"))  # Updates processed in parallel
 MAX_MESSAGE_LENGTH: Final = 4000
+STREAM_EDIT_INTERVAL: Final = 1.0  # Minimum seconds between streamed placeholder edits (Telegram edit limits)
+STREAM_MIN_CHARS: Final = 20  # Do not show a partial answer shorter than this
+DEBOUNCE_WINDOW: Final = float(os.getenv("DEBOUNCE_WINDOW", "1.5"))  # Quiet seconds before a user's fragments are answered
+DEBOUNCE_MAX_DELAY: Final = 4.0  # Answer a burst at most this long after its first fragment
+
+# ========== ADMISSION CONTROL ==========
+ADMISSION_MAX_IN_FLIGHT: Final = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "32"))  # AI requests answered at once
+ADMISSION_MAX_WAITING: Final = int(os.getenv("ADMISSION_MAX_WAITING", "64"))  # Requests allowed to wait for a slot
+ADMISSION_WAIT_TIMEOUT: Final = 10.0  # Seconds a request may wait before it is shed
+ADMISSION_USER_RATE: Final = 0.2  # Messages per second a single user can sustain
+ADMISSION_USER_BURST: Final = 5.0  # Allows a question sent as a few quick fragments
+
+# ========== OUTBOUND RATE LIMITS ==========
+OUTBOUND_GLOBAL_RATE: Final = 30.0  # Bot API messages per second across all chats
+OUTBOUND_GLOBAL_BURST: Final = 30.0
+OUTBOUND_CHAT_RATE: Final = 1.0  # Messages per second to a single chat
+OUTBOUND_CHAT_BURST: Final = 3.0  # Lets placeholder + final edit go out without waiting
+OUTBOUND_MAX_RETRIES: Final = 3  # Flood-wait (429) retries before giving up
+
+# ========== METRICS ==========
+METRICS_LISTEN: Final = os.getenv("METRICS_LISTEN", "127.0.0.1")  # Keep /metrics off the public interface
+METRICS_PORT: Final = int(os.getenv("METRICS_PORT", "9108"))  # 0 disables; worker N listens on METRICS_PORT + N + 1
+
+# ========== HEALTH CHECKS ==========
+# Served next to /metrics as /healthz (liveness) and /readyz (readiness)
+HEALTH_WINDOW: Final = 300.0  # Seconds of real call outcomes a dependency's health is judged on
+HEALTH_MIN_SAMPLES: Final = 10  # Fewer outcomes than this: only consecutive failures count
+HEALTH_DEGRADED_ERROR_RATE: Final = 0.1
+HEALTH_DOWN_ERROR_RATE: Final = 0.5
+HEALTH_DOWN_AFTER_FAILURES: Final = 3  # Consecutive failures that mark a dependency down
+HEALTH_SLOW_SECONDS: Final = float(os.getenv("HEALTH_SLOW_SECONDS", "10"))  # p95 above this is degraded
+HEALTH_CHECK_INTERVAL: Final = 10.0  # Seconds between monitor ticks (storage check, probe scheduling)
+HEALTH_PROBE_IDLE_AFTER: Final = 60.0  # Probe Gemini/Telegram only after this long without real calls
+HEALTH_PROBE_MIN_INTERVAL: Final = float(os.getenv("HEALTH_PROBE_MIN_INTERVAL", "300"))  # Seconds between probes
+HEALTH_PROBE_TIMEOUT: Final = 10.0
+HEALTH_STORAGE_INTERVAL: Final = 30.0  # Seconds between storage write checks
+HEALTH_MAX_LOOP_LAG: Final = 5.0  # Seconds a monitor tick may run late before /healthz fails
 
 # ========== LOGGING CONFIGURATION ==========
 LOG_LEVEL: Final = os.getenv("LOG_LEVEL", "INFO")
-LOG_FORMAT: Final = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+LOG_FORMAT: Final = "%(asctime)s - %(name)s - %(levelname)s - [%(trace_id)s] %(message)s"
 LOG_FILE: Final = LOGS_DIR / "bot.log"
+LOG_JSON: Final = os.getenv("LOG_JSON", "false").lower() == "true"  # JSON lines in the log file instead of text
+LOG_MAX_BYTES: Final = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))  # Rotate the log file at this size
+LOG_ROTATE_DAILY: Final = os.getenv("LOG_ROTATE_DAILY", "true").lower() == "true"  # Also rotate at midnight
+LOG_BACKUP_COUNT: Final = int(os.getenv("LOG_BACKUP_COUNT", "14"))  # Gzipped rotations kept
+LOG_QUEUE_SIZE: Final = 10000  # Records waiting for the background writer before new ones are dropped
+TRACE_EXPORT_FILE: Final = LOGS_DIR / "slow_traces.jsonl"
+TRACE_SLOW_THRESHOLD: Final = float(os.getenv("TRACE_SLOW_THRESHOLD", "2.0"))  # Seconds; slower traces are exported
+TRACE_SAMPLE_RATE: Final = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # Fraction of slow traces exported
+PROFILER_INTERVAL: Final = 0.005  # Seconds between stack samples while profiling
+PROFILER_TOP_STACKS: Final = 15  # Stacks included in a profile report
+PROFILER_DEFAULT_DURATION: Final = 30.0  # Seconds profiled by /profile without an argument
+CHANNEL_LOG_QUEUE_SIZE: Final = 1000  # Pending channel log events before new ones are dropped
+CHANNEL_LOG_FLUSH_INTERVAL: Final = 5.0  # Seconds to collect events into one digest
+CHANNEL_LOG_MAX_DIGEST_CHARS: Final = 3500  # Digest size that triggers an early send
 
 # ========== STORAGE CONFIGURATION ==========
-CONVERSATIONS_FILE: Final = STORAGE_DIR / "conversations.json"
-USER_DATA_FILE: Final = STORAGE_DIR / "user_data.json"
+CONVERSATIONS_DIR: Final = STORAGE_DIR / "conversations"
+CONVERSATIONS_FILE: Final = CONVERSATIONS_DIR / "conversations.jsonl"  # Active segment of the conversation log
+CONVERSATION_SEGMENT_MAX_BYTES: Final = 16 * 1024 * 1024  # Rotate the active segment past this size
+CONVERSATION_SEGMENT_MAX_AGE: Final = 24 * 3600  # ...or after this many seconds
+CONVERSATION_QUEUE_SIZE: Final = 10000  # Pending entries before new ones are dropped
+CONVERSATION_FLUSH_INTERVAL: Final = 1.0  # Seconds the writer waits to batch entries
+USER_DATA_FILE: Final = STORAGE_DIR / "user_data.json"  # Legacy format, migrated into MODERATION_DB_FILE
+MODERATION_DB_FILE: Final = STORAGE_DIR / "moderation.db"
+RESPONSE_CACHE_DIR: Final = STORAGE_DIR / "response_cache"
 
 # ========== SYSTEM PROMPTS ==========
 SYSTEM_PROMPT: Final = """
@@ -79,6 +173,8 @@ ERROR_MESSAGES: Dict[str, str] = {
     "ai_error": "🤖 Sorry, I'm having trouble processing that right now. Please try again!",
     "banned_user": "⛔ You are banned from using this bot.",
     "processing": "🤔 Thinking...",
+    "ai_unavailable": "🌧️ My farming brain is taking a short break. Please ask again in a minute - meanwhile try /joke or /trivia!",
+    "busy": "🚦 I'm helping a lot of farmers right now. Please try again shortly!",
     "warning": "⚠️ Warning {count}/{max}: Please keep our agricultural community friendly and respectful!",
     "banned": "⛔ You have been banned for repeated inappropriate language.",
     "general_error": "❌ Sorry, I encountered an error. Please try again!"
@@ -93,5 +189,12 @@ FEATURES: Dict[str, bool] = {
     "enable_jokes": True,
     "enable_would_you_rather": True,
     "enable_emoji_reactions": True,
-    "save_conversations": True
+    "save_conversations": True,
+    "compress_conversation_segments": True,
+    "enable_intent_router": True,
+    "enable_response_cache": True,
+    "enable_request_coalescing": True,
+    "enable_hedged_requests": False,
+    "enable_response_cache_disk": False,
+    "enable_streaming_responses": True
 }
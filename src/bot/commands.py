@@ -2,6 +2,8 @@
 Bot command implementations for Cholan AI
 """
 
+import asyncio
+import math
 import random
 from telegram import Update
 from telegram.ext import ContextTypes
@@ -12,6 +14,9 @@ from data.trivia import get_random_trivia
 from data.responses import get_random_would_you_rather
 from utils.moderation import reset_user_warnings
 from utils.logger import get_logger, log_to_channel
+from utils.outbound import reply_text, reply_poll
+from utils.profiler import profiler
+from config.config import ADMIN_USER_IDS, PROFILER_DEFAULT_DURATION
 
 logger = get_logger(__name__)
 
@@ -30,9 +35,9 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Happy farming! 🚜✨"
     )
     
-    await update.message.reply_text(welcome_message, parse_mode=ParseMode.MARKDOWN)
+    await reply_text(update.message, welcome_message, parse_mode=ParseMode.MARKDOWN)
     await log_to_channel(context.application, "🚀 New user started the bot with /start command")
-    logger.info(f"Start command from @{update.message.from_user.username}")
+    logger.info("Start command from @%s", update.message.from_user.username)
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /help command"""
@@ -66,18 +71,19 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         "Ready to grow your agricultural knowledge? 🚜💚"
     )
     
-    await update.message.reply_text(help_text, parse_mode=ParseMode.MARKDOWN)
+    await reply_text(update.message, help_text, parse_mode=ParseMode.MARKDOWN)
     await log_to_channel(context.application, f"ℹ️ Help command requested by @{update.message.from_user.username}")
-    logger.info(f"Help command from @{update.message.from_user.username}")
+    logger.info("Help command from @%s", update.message.from_user.username)
 
 async def reset_warnings_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /reset command to reset user warnings"""
     user_id = update.message.from_user.id
     username = update.message.from_user.username or "Unknown"
     
-    reset_user_warnings(user_id)
+    await reset_user_warnings(user_id)
     
-    await update.message.reply_text(
+    await reply_text(
+        update.message,
         "✅ **Warnings Reset Successfully!**\n\n"
         "Your warning count has been reset to 0. "
         "Please continue to keep our agricultural community friendly and respectful! 🌾"
@@ -87,7 +93,7 @@ async def reset_warnings_command(update: Update, context: ContextTypes.DEFAULT_T
         context.application, 
         f"🔄 Warnings reset for user: @{username} (ID: {user_id})"
     )
-    logger.info(f"Warnings reset for @{username}")
+    logger.info("Warnings reset for @%s", username)
 
 async def joke_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a random agricultural joke"""
@@ -100,19 +106,20 @@ async def joke_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         f"Type /joke again for another one!"
     )
     
-    await update.message.reply_text(joke_message, parse_mode=ParseMode.MARKDOWN)
+    await reply_text(update.message, joke_message, parse_mode=ParseMode.MARKDOWN)
     await log_to_channel(
         context.application, 
         f"😂 Joke sent to @{update.message.from_user.username}"
     )
-    logger.info(f"Joke sent to @{update.message.from_user.username}")
+    logger.info("Joke sent to @%s", update.message.from_user.username)
 
 async def trivia_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a random agricultural trivia question"""
     trivia = get_random_trivia()
     
     # Send poll with trivia question
-    await update.message.reply_poll(
+    await reply_poll(
+        update.message,
         question=f"🧠 Agricultural Trivia: {trivia['question']}",
         options=trivia['options'],
         is_anonymous=False,
@@ -125,7 +132,7 @@ async def trivia_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         context.application, 
         f"🧠 Trivia question sent to @{update.message.from_user.username}: {trivia['question'][:50]}..."
     )
-    logger.info(f"Trivia sent to @{update.message.from_user.username}")
+    logger.info("Trivia sent to @%s", update.message.from_user.username)
 
 async def wouldyourather_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Send a 'Would You Rather' agricultural question"""
@@ -139,9 +146,35 @@ async def wouldyourather_command(update: Update, context: ContextTypes.DEFAULT_T
         f"Type /wouldyourather for another scenario!"
     )
     
-    await update.message.reply_text(wyr_message, parse_mode=ParseMode.MARKDOWN)
+    await reply_text(update.message, wyr_message, parse_mode=ParseMode.MARKDOWN)
     await log_to_channel(
         context.application, 
         f"🤷‍♂️ Would You Rather sent to @{update.message.from_user.username}"
     )
-    logger.info(f"Would You Rather sent to @{update.message.from_user.username}")
+    logger.info("Would You Rather sent to @%s", update.message.from_user.username)
+
+async def profile_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    """Admin only: sample the event loop for a few seconds and reply with the top stacks"""
+    if update.message.from_user.id not in ADMIN_USER_IDS:
+        return
+    
+    try:
+        duration = float(context.args[0]) if context.args else PROFILER_DEFAULT_DURATION
+    except ValueError:
+        duration = PROFILER_DEFAULT_DURATION
+    if not math.isfinite(duration):
+        await reply_text(update.message, "🔬 Duration must be a number of seconds.")
+        return
+    duration = min(max(duration, 1.0), 300.0)
+    
+    if not profiler.start(duration=duration):
+        await reply_text(update.message, "🔬 A profile is already running.")
+        return
+    
+    await reply_text(update.message, f"🔬 Profiling the event loop for {duration:.0f}s...")
+    while profiler.running:
+        await asyncio.sleep(0.5)
+    
+    report = profiler.last_report or "No samples collected."
+    await reply_text(update.message, report[:3900])
+    logger.info("Profile run by @%s", update.message.from_user.username)
@@ -0,0 +1,117 @@
+"""
+Per-user input aggregation: merges quick message fragments into one prompt
+"""
+
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Hashable, List, Optional
+
+from telegram import Message
+
+from config.config import DEBOUNCE_WINDOW, DEBOUNCE_MAX_DELAY
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class Burst:
+    """Fragments from one user that will be answered together"""
+
+    def __init__(self, key: Hashable, placeholder: "asyncio.Task[Message]"):
+        self.key = key
+        self.placeholder = placeholder  # Single "Thinking..." message for the whole burst
+        self.fragments: List[str] = []
+        self.messages: List[Message] = []
+        self.started_at = time.monotonic()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.generation: Optional[asyncio.Task] = None
+        self.closed = False
+
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.fragments)
+
+    @property
+    def last_message(self) -> Message:
+        return self.messages[-1]
+
+    def close(self):
+        """Called once the answer is final; later fragments start a new burst"""
+        self.closed = True
+
+    @property
+    def placeholder_failed(self) -> bool:
+        """The placeholder could not be sent, so this burst can never be answered in it"""
+        return self.placeholder.done() and (self.placeholder.cancelled() or self.placeholder.exception() is not None)
+
+class MessageAggregator:
+    """
+    Debounces each user's messages and cancels superseded generations
+
+    A burst is answered once the user has been quiet for quiet_window seconds
+    (or max_delay after its first fragment). A fragment arriving while the
+    burst is still generating cancels that generation and the merged prompt
+    is answered instead, editing the same placeholder.
+    """
+
+    def __init__(self, quiet_window: float = DEBOUNCE_WINDOW, max_delay: float = DEBOUNCE_MAX_DELAY):
+        self.quiet_window = quiet_window
+        self.max_delay = max_delay
+        self._bursts: Dict[Hashable, Burst] = {}
+        self.stats: Dict[str, int] = {
+            "fragments": 0,
+            "bursts": 0,
+            "merged_fragments": 0,
+            "generations_cancelled": 0
+        }
+
+    def submit(self, key: Hashable, message: Message,
+               start_placeholder: Callable[[], Awaitable[Message]],
+               on_ready: Callable[[Burst], Awaitable[None]]) -> Burst:
+        """Add a fragment; on_ready(burst) runs when the burst should be answered"""
+        self.stats["fragments"] += 1
+        burst = self._bursts.get(key)
+        if burst is None or burst.closed or burst.placeholder_failed:
+            placeholder = asyncio.get_running_loop().create_task(start_placeholder())
+            burst = self._bursts[key] = Burst(key, placeholder)
+            self.stats["bursts"] += 1
+        else:
+            self.stats["merged_fragments"] += 1
+
+        burst.fragments.append(message.text)
+        burst.messages.append(message)
+
+        if burst.generation is not None and not burst.generation.done():
+            burst.generation.cancel()
+            self.stats["generations_cancelled"] += 1
+            logger.debug("Generation superseded by new input from %s", key)
+
+        if burst.timer is not None:
+            burst.timer.cancel()
+        delay = min(self.quiet_window, max(0.0, burst.started_at + self.max_delay - time.monotonic()))
+        burst.timer = asyncio.get_running_loop().call_later(delay, self._fire, burst, on_ready)
+        return burst
+
+    def _fire(self, burst: Burst, on_ready: Callable[[Burst], Awaitable[None]]):
+        burst.timer = None
+        burst.generation = asyncio.get_running_loop().create_task(on_ready(burst))
+        burst.generation.add_done_callback(lambda task: self._finish(burst, task))
+
+    def _finish(self, burst: Burst, task: asyncio.Task):
+        if task is not burst.generation:
+            return
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error answering message burst: {task.exception()}")
+        # Superseded generations leave the burst open for the merged prompt,
+        # unless its placeholder is gone and no later fire could answer it
+        if task.cancelled() and not burst.placeholder_failed:
+            return
+        burst.close()
+        if self._bursts.get(burst.key) is burst:
+            del self._bursts[burst.key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get fragment, merge and cancellation counters"""
+        return {**self.stats, "pending_bursts": len(self._bursts)}
+
+# Global message aggregator instance
+message_aggregator = MessageAggregator()
@@ -2,6 +2,9 @@
 Message and command handlers for Cholan AI Bot
 """
 
+import asyncio
+from contextlib import contextmanager
+
 from telegram import Update
 from telegram.ext import (
     Application, CommandHandler, MessageHandler, 
@@ -9,71 +12,160 @@ from telegram.ext import (
 )
 from telegram.constants import ParseMode
 
+from bot.streaming import PlaceholderStreamer
+from bot.debounce import Burst, message_aggregator
 from bot.commands import (
     start_command, help_command, reset_warnings_command,
-    joke_command, trivia_command, wouldyourather_command
+    joke_command, trivia_command, wouldyourather_command, profile_command
 )
 from utils.ai_handler import handle_ai_response
+from utils.admission import admission
 from utils.moderation import check_banned_user, check_banned_words
-from utils.logger import get_logger, log_to_channel
+from utils.logger import get_logger, log_to_channel, BotLogger
+from utils.outbound import reply_text, edit_text
+from utils.conversation_log import conversation_log
+from utils.metrics import MESSAGE_STAGE_SECONDS, COMMANDS_TOTAL, MODERATION_EVENTS_TOTAL
 from config.config import ERROR_MESSAGES, FEATURES
 from data.responses import get_emoji_reaction
 
 logger = get_logger(__name__)
 
+@contextmanager
+def _stage(name: str):
+    """Time one handle_message stage as a trace span and a latency histogram"""
+    with BotLogger(logger, name), MESSAGE_STAGE_SECONDS.labels(name).time():
+        yield
+
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Main message handler for user messages"""
     
+    async with BotLogger(logger, "handle_message", update_id=update.update_id):
+        await _handle_message(update, context)
+
+async def _handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         user_id = update.message.from_user.id
         username = update.message.from_user.username or "Unknown"
         text = update.message.text
         
-        logger.info(f"Message from @{username}: {text[:50]}...")
-        
-        # Send processing indicator
-        processing_message = await update.message.reply_text(ERROR_MESSAGES["processing"])
+        logger.info("Message from @%s: %.50s...", username, text)
         
         # Check if user is banned
-        if FEATURES["enable_moderation"] and check_banned_user(user_id):
-            await processing_message.edit_text(ERROR_MESSAGES["banned_user"])
-            await log_to_channel(
-                context.application, 
-                f"❌ Banned user @{username} tried to send: '{text[:100]}'"
-            )
-            return
+        if FEATURES["enable_moderation"]:
+            with _stage("ban_check"):
+                banned = await check_banned_user(user_id)
+            if banned:
+                MODERATION_EVENTS_TOTAL.labels("banned_user_blocked").inc()
+                await reply_text(update.message, ERROR_MESSAGES["banned_user"])
+                await log_to_channel(
+                    context.application, 
+                    f"❌ Banned user @{username} tried to send: '{text[:100]}'"
+                )
+                return
         
-        # Check for banned words
+        # Check for banned words (every fragment is moderated on its own)
         if FEATURES["enable_moderation"]:
-            warning_result = check_banned_words(user_id, text)
+            with _stage("check_banned_words"):
+                warning_result = await check_banned_words(user_id, text)
             if warning_result:
-                await processing_message.edit_text(warning_result["message"])
+                await reply_text(update.message, warning_result["message"])
                 await log_to_channel(context.application, warning_result["log_message"])
                 return
         
-        # Generate AI response
+        # Generate AI response once the user stops typing; quick fragments share
+        # one placeholder and one model call
         if FEATURES["enable_ai_responses"]:
-            response = await handle_ai_response(text)
-            await processing_message.edit_text(response, parse_mode=ParseMode.MARKDOWN)
+            # Shed early, before any placeholder or model work exists
+            if not (admission.check_user(user_id) and admission.has_capacity()):
+                await reply_text(update.message, ERROR_MESSAGES["busy"])
+                return
             
-            # Log activity to channel
-            if FEATURES["enable_logging_to_channel"]:
-                activity_message = (
-                    f"👤 User: @{username}\n"
-                    f"💬 Message: {text[:100]}{'...' if len(text) > 100 else ''}\n"
-                    f"🤖 Response: {response[:100]}{'...' if len(response) > 100 else ''}"
+            message_aggregator.submit(
+                (update.message.chat_id, user_id), update.message,
+                start_placeholder=lambda: _send_placeholder(update.message),
+                on_ready=lambda burst: _answer_burst(burst, context, user_id, username)
+            )
+        elif FEATURES["enable_emoji_reactions"]:
+            emoji = get_emoji_reaction(text)
+            if emoji:
+                await reply_text(update.message, emoji)
+                
+    except Exception as e:
+        logger.error(f"Error handling message: {e}")
+        await log_to_channel(
+            context.application, 
+            f"⚠️ Error handling message from @{username}: {str(e)}"
+        )
+
+async def _send_placeholder(message):
+    with _stage("placeholder_send"):
+        return await reply_text(message, ERROR_MESSAGES["processing"])
+
+async def _answer_burst(burst: Burst, context: ContextTypes.DEFAULT_TYPE, user_id: int, username: str):
+    """Answer the merged fragments of one burst in its placeholder"""
+    
+    async with BotLogger(logger, "answer_burst", fragments=len(burst.fragments)):
+        await _answer_burst_traced(burst, context, user_id, username)
+
+async def _answer_burst_traced(burst: Burst, context: ContextTypes.DEFAULT_TYPE, user_id: int, username: str):
+    processing_message = None
+    try:
+        text = burst.text
+        # Shielded: superseding this generation must not cancel the shared placeholder send
+        processing_message = await asyncio.shield(burst.placeholder)
+        
+        with _stage("admission_wait"):
+            admitted = await admission.acquire()
+        if not admitted:
+            burst.close()
+            await edit_text(processing_message, ERROR_MESSAGES["busy"])
+            return
+        
+        streamer = PlaceholderStreamer(processing_message) if FEATURES["enable_streaming_responses"] else None
+        try:
+            with _stage("ai_generation"):
+                response = await handle_ai_response(
+                    text, user_id=user_id, username=username,
+                    on_partial=streamer.update if streamer else None
                 )
+        finally:
+            admission.release()
+            # No partial edit may land after the final answer or a newer burst's stream
+            if streamer is not None:
+                await streamer.close()
+        # From here on the answer stands; new fragments start a new burst
+        burst.close()
+        with _stage("edit_text"):
+            await edit_text(processing_message, response, parse_mode=ParseMode.MARKDOWN)
+        
+        # Persist the exchange (queued; written in the background)
+        if FEATURES["save_conversations"]:
+            conversation_log.record(user_id, username, text, response, chat_id=burst.last_message.chat_id)
+        
+        # Log activity to channel
+        if FEATURES["enable_logging_to_channel"]:
+            activity_message = (
+                f"👤 User: @{username}\n"
+                f"💬 Message: {text[:100]}{'...' if len(text) > 100 else ''}\n"
+                f"🤖 Response: {response[:100]}{'...' if len(response) > 100 else ''}"
+            )
+            with _stage("log_to_channel"):
                 await log_to_channel(context.application, activity_message)
         
         # Handle emoji reactions
         if FEATURES["enable_emoji_reactions"]:
             emoji = get_emoji_reaction(text)
             if emoji:
-                await update.message.reply_text(emoji)
-                
+                with _stage("emoji_reply"):
+                    await reply_text(burst.last_message, emoji)
+    
+    except asyncio.CancelledError:
+        # Superseded by newer input; the merged prompt reuses the placeholder
+        raise
     except Exception as e:
         logger.error(f"Error handling message: {e}")
-        await processing_message.edit_text(ERROR_MESSAGES["general_error"])
+        if processing_message is not None:
+            await edit_text(processing_message, ERROR_MESSAGES["general_error"])
         await log_to_channel(
             context.application, 
             f"⚠️ Error handling message from @{username}: {str(e)}"
@@ -87,23 +179,37 @@ async def handle_error(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if FEATURES["enable_logging_to_channel"]:
         await log_to_channel(context.application, error_message)
 
+def _counted(command: str, callback):
+    """Wrap a command callback so every invocation is counted and traced"""
+    counter = COMMANDS_TOTAL.labels(command)
+    
+    async def wrapper(update: Update, context: ContextTypes.DEFAULT_TYPE):
+        counter.inc()
+        async with BotLogger(logger, f"command.{command}", update_id=update.update_id):
+            return await callback(update, context)
+    
+    return wrapper
+
 def setup_handlers(application: Application):
     """Setup all bot handlers"""
     logger.info("Setting up bot handlers...")
     
     # Command handlers
-    application.add_handler(CommandHandler('start', start_command))
-    application.add_handler(CommandHandler('help', help_command))
-    application.add_handler(CommandHandler('reset', reset_warnings_command))
+    application.add_handler(CommandHandler('start', _counted('start', start_command)))
+    application.add_handler(CommandHandler('help', _counted('help', help_command)))
+    application.add_handler(CommandHandler('reset', _counted('reset', reset_warnings_command)))
     
     if FEATURES["enable_jokes"]:
-        application.add_handler(CommandHandler('joke', joke_command))
+        application.add_handler(CommandHandler('joke', _counted('joke', joke_command)))
     
     if FEATURES["enable_trivia"]:
-        application.add_handler(CommandHandler('trivia', trivia_command))
+        application.add_handler(CommandHandler('trivia', _counted('trivia', trivia_command)))
     
     if FEATURES["enable_would_you_rather"]:
-        application.add_handler(CommandHandler('wouldyourather', wouldyourather_command))
+        application.add_handler(CommandHandler('wouldyourather', _counted('wouldyourather', wouldyourather_command)))
+    
+    # Admin commands (ignored for everyone not in ADMIN_USER_IDS)
+    application.add_handler(CommandHandler('profile', _counted('profile', profile_command)))
     
     # Message handlers
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
@@ -0,0 +1,124 @@
+"""
+Progressive delivery of streamed AI text into the "Thinking..." placeholder
+"""
+
+import asyncio
+import time
+from typing import Optional
+
+from telegram import Message
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
+
+from config.config import STREAM_EDIT_INTERVAL, STREAM_MIN_CHARS, MAX_MESSAGE_LENGTH
+from utils.logger import get_logger
+from utils.outbound import edit_text
+
+logger = get_logger(__name__)
+
+STREAM_CURSOR = " ▌"
+
+def close_partial_markdown(text: str) -> str:
+    """
+    Make a partial Markdown (legacy) message safe to render
+
+    Unterminated code fences, inline code, bold and italic markers left by a
+    mid-stream cut are closed so Telegram does not reject the edit.
+    """
+    if text.count("```") % 2:
+        return text + "\n```"
+
+    # Outside of code fences only the last unpaired marker of each kind needs closing
+    closing = ""
+    if text.count("`") % 2:
+        closing += "`"
+    else:
+        if text.count("*") % 2:
+            closing += "*"
+        if text.count("_") % 2:
+            closing += "_"
+    return text + closing
+
+class PlaceholderStreamer:
+    """
+    Throttled editor that grows the placeholder message as chunks arrive
+
+    update() only records the latest text; one background task performs the
+    edits, at most once per min_interval. Edits go through the outbound
+    scheduler's per-chat limit, so reading the model stream never waits for
+    Telegram (which would count against the AI timeout and hold its slots).
+    """
+
+    def __init__(self, message: Message, min_interval: float = STREAM_EDIT_INTERVAL,
+                 min_chars: int = STREAM_MIN_CHARS):
+        self.message = message
+        self.min_interval = min_interval
+        self.min_chars = min_chars
+        self.edits = 0
+        self.first_edit_at: Optional[float] = None
+        self.closed = False
+        self._started_at = time.monotonic()
+        self._last_edit_at = 0.0
+        self._last_text = ""
+        self._pending = ""
+        self._flusher: Optional[asyncio.Task] = None
+        self._editing = False
+
+    async def update(self, text: str):
+        """Receive the accumulated text; returns immediately"""
+        if self.closed or len(text.strip()) < self.min_chars:
+            return
+        self._pending = text[:MAX_MESSAGE_LENGTH - len(STREAM_CURSOR) - 8].rstrip()
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.get_running_loop().create_task(self._flush())
+
+    async def close(self):
+        """Stop editing; an edit already sent to Telegram is waited for so it cannot land after the answer"""
+        self.closed = True
+        flusher, self._flusher = self._flusher, None
+        if flusher is None or flusher.done():
+            return
+        if not self._editing:
+            flusher.cancel()
+        try:
+            await flusher
+        except asyncio.CancelledError:
+            if not flusher.cancelled():
+                raise
+
+    async def _flush(self):
+        while not self.closed and self._pending != self._last_text:
+            wait = self._last_edit_at + self.min_interval - time.monotonic()
+            if wait > 0:
+                await asyncio.sleep(wait)
+                continue
+            partial = self._pending
+            self._last_edit_at = time.monotonic()
+            self._last_text = partial
+            self._editing = True
+            try:
+                await self._edit(partial)
+            finally:
+                self._editing = False
+
+    async def _edit(self, partial: str):
+        rendered = close_partial_markdown(partial) + STREAM_CURSOR
+        try:
+            await edit_text(self.message, rendered, parse_mode=ParseMode.MARKDOWN)
+        except BadRequest as e:
+            if "not modified" in str(e).lower():
+                return
+            # Markdown still unparseable mid-stream; show plain text instead
+            try:
+                await edit_text(self.message, partial + STREAM_CURSOR)
+            except BadRequest:
+                return
+        except Exception as e:
+            # Partial edits are best-effort; the final edit still carries the answer
+            logger.debug("Streaming edit skipped: %s", e)
+            return
+
+        self.edits += 1
+        if self.first_edit_at is None:
+            self.first_edit_at = time.monotonic()
+            logger.debug("First streamed text after %.2fs", self.first_edit_at - self._started_at)
@@ -0,0 +1,167 @@
+"""
+Webhook serving mode for Cholan AI Bot
+"""
+
+import asyncio
+import hmac
+import secrets
+import signal
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from telegram import Bot, Update
+from telegram.ext import Application
+
+from config.config import (
+    WEBHOOK_URL, WEBHOOK_LISTEN, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET,
+    WEBHOOK_DEDUP_WINDOW
+)
+from utils.health import health_monitor
+from utils.http_server import HTTPServer, HTTPRequest, HTTPResponse
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+class UpdateDeduplicator:
+    """Remembers the most recent update IDs so Telegram redeliveries are ignored"""
+
+    def __init__(self, window: int = WEBHOOK_DEDUP_WINDOW):
+        self.window = window
+        self._seen: "OrderedDict[int, None]" = OrderedDict()
+
+    def is_duplicate(self, update_id: int) -> bool:
+        """Whether update_id was already accepted"""
+        return update_id in self._seen
+
+    def remember(self, update_id: int):
+        """Record an accepted update_id"""
+        self._seen[update_id] = None
+        if len(self._seen) > self.window:
+            self._seen.popitem(last=False)
+
+class WebhookServer:
+    """Receives Telegram updates over HTTP and acknowledges them before processing"""
+
+    def __init__(self, on_update: Callable[[Dict[str, Any]], Awaitable[None]],
+                 secret_token: Optional[str] = WEBHOOK_SECRET,
+                 host: str = WEBHOOK_LISTEN, port: int = WEBHOOK_PORT, path: str = WEBHOOK_PATH):
+        self.on_update = on_update
+        self.secret_token = secret_token or None
+        self.path = path
+        self.deduplicator = UpdateDeduplicator()
+        self.http = HTTPServer(host, port, name="Webhook")
+        self.http.route("POST", path, self._handle_update)
+        self.stats: Dict[str, int] = {
+            "received": 0,
+            "accepted": 0,
+            "duplicates": 0,
+            "unauthorized": 0,
+            "invalid": 0
+        }
+
+    async def _handle_update(self, request: HTTPRequest) -> HTTPResponse:
+        self.stats["received"] += 1
+
+        if self.secret_token is not None:
+            provided = request.headers.get(SECRET_HEADER, "")
+            if not hmac.compare_digest(provided.encode(), self.secret_token.encode()):
+                self.stats["unauthorized"] += 1
+                return HTTPResponse.text("unauthorized", 401)
+
+        try:
+            data = request.json()
+            update_id = int(data["update_id"])
+        except Exception:
+            self.stats["invalid"] += 1
+            return HTTPResponse.text("invalid update", 400)
+
+        if self.deduplicator.is_duplicate(update_id):
+            self.stats["duplicates"] += 1
+            return HTTPResponse.text("duplicate")
+
+        # Handing the update off is a queue put; handlers run after the 200 is sent.
+        # Only an accepted update is remembered, so a failed hand-off can be redelivered
+        await self.on_update(data)
+        self.deduplicator.remember(update_id)
+        self.stats["accepted"] += 1
+        return HTTPResponse.text("ok")
+
+    def serve_health(self):
+        """Answer /healthz and /readyz on the webhook listener, where load balancers already reach"""
+        self.http.route("GET", "/healthz", health_monitor.handle_healthz)
+        self.http.route("GET", "/readyz", health_monitor.handle_readyz)
+
+    async def start(self):
+        await self.http.start()
+
+    async def stop(self):
+        await self.http.stop()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get webhook delivery counters"""
+        return dict(self.stats)
+
+def application_sink(application: Application) -> Callable[[Dict[str, Any]], Awaitable[None]]:
+    """Build an on_update callback that feeds the application's update queue"""
+    async def put_update(data: Dict[str, Any]):
+        await application.update_queue.put(Update.de_json(data, application.bot))
+    return put_update
+
+async def register_webhook(bot: Bot, secret_token: Optional[str]) -> Optional[str]:
+    """
+    Point Telegram at WEBHOOK_URL; skipped when no public URL is configured
+    (local testing with recorded updates)
+
+    Returns:
+        The secret token in effect
+    """
+    if not WEBHOOK_URL:
+        logger.warning("🌐 WEBHOOK_URL not set, not registering with Telegram (local mode)")
+        return secret_token
+
+    # Telegram should never reach us without a secret; generate one if none is configured
+    secret_token = secret_token or secrets.token_urlsafe(32)
+    await bot.set_webhook(
+        url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+        secret_token=secret_token,
+        allowed_updates=Update.ALL_TYPES
+    )
+    logger.info(f"🌐 Webhook registered at {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+    return secret_token
+
+async def wait_for_stop_signal():
+    """Block until SIGINT or SIGTERM"""
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            # Windows: fall back to KeyboardInterrupt
+            pass
+    await stop_event.wait()
+
+async def run_webhook(application: Application,
+                      post_shutdown: Optional[Callable[[Application], Awaitable[None]]] = None):
+    """Serve the application from the embedded webhook server until stopped"""
+    async with application:
+        secret_token = await register_webhook(application.bot, WEBHOOK_SECRET)
+        server = WebhookServer(application_sink(application), secret_token=secret_token)
+        server.serve_health()
+
+        # PTB only runs post_init from its own run_* helpers
+        if application.post_init is not None:
+            await application.post_init(application)
+        await application.start()
+        await server.start()
+        logger.info("🚜 Bot is running in webhook mode... Press Ctrl+C to stop")
+
+        try:
+            await wait_for_stop_signal()
+        finally:
+            await server.stop()
+            await application.stop()
+            if post_shutdown is not None:
+                await post_shutdown(application)
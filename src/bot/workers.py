@@ -0,0 +1,232 @@
+"""
+Multi-worker deployment: a front dispatcher routing updates to worker processes by user ID
+"""
+
+import asyncio
+import multiprocessing
+import time
+import zlib
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional
+
+from telegram import Bot, Update
+from telegram.ext import Application
+
+from config.config import (
+    TOKEN, POLL_INTERVAL, WEBHOOK_SECRET, METRICS_PORT, LOG_FILE,
+    WORKER_CHECK_INTERVAL, WORKER_MAX_RESTARTS, WORKER_RESTART_WINDOW
+)
+from bot.webhook import WebhookServer, register_webhook, wait_for_stop_signal
+from utils.conversation_log import conversation_log
+from utils.logger import setup_logger, get_logger
+from utils.metrics import metrics_endpoint
+from utils.moderation import load_user_data
+from utils.outbound import outbound
+from utils.profiler import install_profiler_signal
+
+logger = get_logger(__name__)
+
+# Update fields that carry the acting user, in the order they are checked
+_USER_FIELDS = (
+    "message", "edited_message", "callback_query", "inline_query",
+    "chosen_inline_result", "shipping_query", "pre_checkout_query",
+    "poll_answer", "my_chat_member", "chat_member", "chat_join_request"
+)
+
+def extract_user_id(data: Dict[str, Any]) -> Optional[int]:
+    """Find the user an update belongs to without building telegram objects"""
+    for field in _USER_FIELDS:
+        payload = data.get(field)
+        if payload:
+            user = payload.get("from") or payload.get("user")
+            if user and "id" in user:
+                return int(user["id"])
+            chat = payload.get("chat")
+            if chat and "id" in chat:
+                return int(chat["id"])
+    return None
+
+def route_update(data: Dict[str, Any], workers: int) -> int:
+    """Pick the worker for an update; the same user always lands on the same worker"""
+    user_id = extract_user_id(data)
+    key = user_id if user_id is not None else data.get("update_id", 0)
+    # crc32 keeps routing stable across processes and restarts
+    return zlib.crc32(str(key).encode()) % workers
+
+def _worker_main(index: int, workers: int, queue, build_application: Callable[..., Application],
+                 post_shutdown: Callable[[Application], Awaitable[None]]):
+    """Worker process entry point"""
+    # Each worker rotates its own file; processes must not rotate a shared one
+    setup_logger(LOG_FILE.with_name(f"bot-worker{index}.log"))
+    conversation_log.use_worker(index)
+    # Telegram's limits are per bot token, and every worker sends with the same one
+    outbound.split_budget(workers)
+    worker_logger = get_logger(f"worker.{index}")
+    install_profiler_signal()
+    if metrics_endpoint.port:
+        # Every worker keeps its own metrics; give each its own port
+        metrics_endpoint.port = METRICS_PORT + index + 1
+    application = build_application(webhook=True)
+    worker_logger.info(f"👷 Worker {index} started")
+    try:
+        asyncio.run(_serve_worker(application, queue, post_shutdown))
+    except KeyboardInterrupt:
+        pass
+    worker_logger.info(f"👷 Worker {index} stopped")
+
+async def _serve_worker(application: Application, queue,
+                        post_shutdown: Callable[[Application], Awaitable[None]]):
+    loop = asyncio.get_running_loop()
+    async with application:
+        if application.post_init is not None:
+            await application.post_init(application)
+        await application.start()
+        try:
+            while True:
+                data = await loop.run_in_executor(None, queue.get)
+                if data is None:
+                    break
+                await application.update_queue.put(Update.de_json(data, application.bot))
+        finally:
+            await application.stop()
+            await post_shutdown(application)
+
+class WorkerFailed(RuntimeError):
+    """A worker keeps dying; the dispatcher stops rather than lose its users' updates"""
+
+class Dispatcher:
+    """Owns the worker processes and their inbound queues, restarting workers that die"""
+
+    def __init__(self, workers: int, build_application: Callable[..., Application],
+                 post_shutdown: Callable[[Application], Awaitable[None]]):
+        self.workers = workers
+        self.build_application = build_application
+        self.post_shutdown = post_shutdown
+        # spawn: workers must open their own SQLite and HTTP connections
+        self._context = multiprocessing.get_context("spawn")
+        self._queues: List[Any] = [None] * workers
+        self._processes: List[Any] = [None] * workers
+        self._restarts: List[Deque[float]] = [deque() for _ in range(workers)]
+        self.routed: List[int] = [0] * workers
+        self.restarted = 0
+
+    def _spawn(self, index: int):
+        # A fresh queue: a worker that died mid-read may have left the old one locked
+        queue = self._context.Queue()
+        process = self._context.Process(
+            target=_worker_main,
+            args=(index, self.workers, queue, self.build_application, self.post_shutdown),
+            name=f"cholan-worker-{index}",
+            daemon=True
+        )
+        process.start()
+        self._queues[index] = queue
+        self._processes[index] = process
+
+    def start(self):
+        for index in range(self.workers):
+            self._spawn(index)
+        logger.info(f"🚦 Dispatcher started {self.workers} workers")
+
+    def ensure_alive(self, index: int):
+        """Restart worker `index` if it died; raises WorkerFailed if it keeps dying"""
+        process = self._processes[index]
+        if process.is_alive():
+            return
+
+        now = time.monotonic()
+        restarts = self._restarts[index]
+        while restarts and now - restarts[0] > WORKER_RESTART_WINDOW:
+            restarts.popleft()
+        if len(restarts) >= WORKER_MAX_RESTARTS:
+            raise WorkerFailed(
+                f"Worker {index} died {len(restarts) + 1} times within {WORKER_RESTART_WINDOW:.0f}s "
+                f"(exit code {process.exitcode})"
+            )
+        restarts.append(now)
+        self.restarted += 1
+        logger.error(f"💥 Worker {index} died (exit code {process.exitcode}); restarting it")
+        self._spawn(index)
+
+    async def watch(self, interval: float = WORKER_CHECK_INTERVAL):
+        """Check every worker periodically, so one is restarted even while its users are quiet"""
+        while True:
+            await asyncio.sleep(interval)
+            for index in range(self.workers):
+                self.ensure_alive(index)
+
+    async def dispatch(self, data: Dict[str, Any]):
+        """Hand a raw update to its worker (multiprocessing put does not block)"""
+        index = route_update(data, self.workers)
+        # Never queue for a dead worker; nobody would read it
+        self.ensure_alive(index)
+        self.routed[index] += 1
+        self._queues[index].put(data)
+
+    def stop(self, timeout: float = 10.0):
+        for queue in self._queues:
+            queue.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        logger.info(f"🚦 Dispatcher stopped (routed per worker: {self.routed}, restarts: {self.restarted})")
+
+async def _poll_front(dispatch: Callable[[Dict[str, Any]], Awaitable[None]]):
+    """Long-poll Telegram from the front process and dispatch raw updates"""
+    async with Bot(TOKEN) as bot:
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(offset=offset, timeout=30, allowed_updates=Update.ALL_TYPES)
+            except Exception as e:
+                logger.error(f"Polling failed: {e}")
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            for update in updates:
+                offset = update.update_id + 1
+                await dispatch(update.to_dict())
+
+async def _webhook_front(dispatch: Callable[[Dict[str, Any]], Awaitable[None]]):
+    """Receive updates over the webhook server in the front process"""
+    async with Bot(TOKEN) as bot:
+        secret_token = await register_webhook(bot, WEBHOOK_SECRET)
+    server = WebhookServer(dispatch, secret_token=secret_token)
+    await server.start()
+    try:
+        await wait_for_stop_signal()
+    finally:
+        await server.stop()
+
+async def _run_front(front: Callable[[Callable[[Dict[str, Any]], Awaitable[None]]], Awaitable[None]],
+                     dispatcher: Dispatcher):
+    """Serve the front until it stops, or until the watchdog finds a worker that keeps dying"""
+    serving = asyncio.ensure_future(front(dispatcher.dispatch))
+    watchdog = asyncio.ensure_future(dispatcher.watch())
+    try:
+        done, _ = await asyncio.wait({serving, watchdog}, return_when=asyncio.FIRST_COMPLETED)
+        for task in done:
+            task.result()
+    finally:
+        for task in (serving, watchdog):
+            task.cancel()
+        await asyncio.gather(serving, watchdog, return_exceptions=True)
+
+def run_dispatcher(mode: str, workers: int, build_application: Callable[..., Application],
+                   post_shutdown: Callable[[Application], Awaitable[None]]):
+    """Run the front dispatcher and its workers until interrupted"""
+    # Open the database (and import legacy JSON) once, before any worker races for it
+    load_user_data()
+    dispatcher = Dispatcher(workers, build_application, post_shutdown)
+    dispatcher.start()
+    front = _webhook_front if mode == "webhook" else _poll_front
+    logger.info(f"🚜 Bot is running with {workers} workers ({mode})... Press Ctrl+C to stop")
+    try:
+        asyncio.run(_run_front(front, dispatcher))
+    except KeyboardInterrupt:
+        pass
+    except WorkerFailed as e:
+        logger.critical(f"❌ {e}; stopping")
+        raise
+    finally:
+        dispatcher.stop()
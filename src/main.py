@@ -9,38 +9,168 @@ Version: 1.0.0
 
 import sys
 import os
+import argparse
+import asyncio
+import time
 from pathlib import Path
 
+# Cold-start clock: the imports below count towards startup time
+STARTED_AT = time.perf_counter()
+
 # Add project root to Python path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from telegram.ext import Application
-from config.config import TOKEN, POLL_INTERVAL
+from config.config import TOKEN, BOT_API_BASE_URL, POLL_INTERVAL, CONCURRENT_UPDATES, BOT_MODE, WORKERS
 from bot.handlers import setup_handlers
-from utils.logger import setup_logger, get_logger
+from bot.webhook import run_webhook
+from bot.workers import run_dispatcher
+from utils.logger import setup_logger, get_logger, get_logging_stats, channel_log
+from utils.ai_executor import ai_executor
+from utils.outbound import outbound
+from utils.conversation_log import conversation_log
+from utils.metrics import registry, metrics_endpoint
+from utils.profiler import install_profiler_signal
+from utils.ai_handler import ai_handler, get_ai_stats, get_session_stats, probe_ai
+from utils.admission import admission
+from utils.resilience import gemini_resilience
+from utils.response_cache import response_cache
+from utils.intent_router import intent_router
+from utils.moderation import load_user_data, check_storage_writable
+from utils.startup import startup, missing_settings
+from utils.health import health_monitor
+from bot.debounce import message_aggregator
+
+def register_stats_collectors():
+    """Export every component's get_stats() counters on /metrics"""
+    registry.register_stats("sessions", get_session_stats)
+    registry.register_stats("ai", get_ai_stats)
+    registry.register_stats("ai_executor", ai_executor.get_stats)
+    registry.register_stats("gemini_resilience", gemini_resilience.get_stats)
+    registry.register_stats("coalescing", ai_handler.single_flight.get_stats)
+    registry.register_stats("history", ai_handler.history_window.get_stats)
+    registry.register_stats("intent_router", intent_router.get_stats)
+    registry.register_stats("response_cache", response_cache.get_stats)
+    registry.register_stats("admission", admission.get_stats)
+    registry.register_stats("debounce", message_aggregator.get_stats)
+    registry.register_stats("outbound", outbound.get_stats)
+    registry.register_stats("channel_log", channel_log.get_stats)
+    registry.register_stats("conversation_log", conversation_log.get_stats)
+    registry.register_stats("logging", get_logging_stats)
+    registry.register_stats("startup", startup.get_stats)
+    registry.register_stats("health", health_monitor.get_stats)
+
+def register_health_checks(application: Application):
+    """Give the health monitor its idle probes and serve /healthz and /readyz next to /metrics"""
+    health_monitor.gemini.probe = probe_ai
+    health_monitor.gemini.is_tripped = gemini_resilience.breaker.is_open
+    health_monitor.telegram.probe = application.bot.get_me
+    health_monitor.storage.probe = lambda: asyncio.to_thread(check_storage_writable)
+    metrics_endpoint.route("GET", "/healthz", health_monitor.handle_healthz)
+    metrics_endpoint.route("GET", "/readyz", health_monitor.handle_readyz)
+
+async def post_init(application: Application):
+    """Warm up subsystems and start operational endpoints once Telegram is initialized"""
+    startup.lap("telegram_initialize")
+    # Moderation runs on every message, so the database must be open before
+    # serving; the Gemini model finishes in the background
+    await startup.warm_up(
+        required={"storage": load_user_data},
+        background={"ai_model": ai_handler.initialize_model}
+    )
+    with startup.phase("metrics_endpoint"):
+        await metrics_endpoint.start()
+    startup.mark_serving()
+    health_monitor.start()
+    ai_handler.chat_sessions.start()
+
+async def post_shutdown(application: Application):
+    """Release background resources once the application has stopped"""
+    startup.mark_stopping()
+    await health_monitor.stop()
+    await ai_handler.chat_sessions.stop()
+    await metrics_endpoint.stop()
+    await conversation_log.stop()
+    await channel_log.stop()
+    await outbound.stop()
+    ai_executor.shutdown()
 
-def main():
+def build_application(webhook: bool = False, base_url: str = BOT_API_BASE_URL) -> Application:
+    """Create the bot application with all handlers registered"""
+    # Updates are processed concurrently so one slow Gemini call does not
+    # hold up everyone else
+    builder = (
+        Application.builder()
+        .token(TOKEN)
+        .concurrent_updates(CONCURRENT_UPDATES)
+        .post_init(post_init)
+        .post_shutdown(post_shutdown)
+    )
+    if base_url:
+        # Self-hosted Bot API server, or the fake one used by tools/loadtest
+        builder = builder.base_url(base_url)
+    if webhook:
+        # Updates are fed in by our own HTTP server or dispatcher, not the polling updater
+        builder = builder.updater(None)
+    application = builder.build()
+    
+    # Setup all handlers
+    setup_handlers(application)
+    register_stats_collectors()
+    register_health_checks(application)
+    return application
+
+def parse_args(argv=None) -> argparse.Namespace:
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Cholan AI Agricultural Bot")
+    parser.add_argument(
+        "--mode", choices=["polling", "webhook"], default=BOT_MODE,
+        help="How to receive updates from Telegram (default: BOT_MODE, currently %(default)s)"
+    )
+    parser.add_argument(
+        "--workers", type=int, default=WORKERS,
+        help="Worker processes; >1 routes updates to workers by user ID (default: %(default)s)"
+    )
+    parser.add_argument(
+        "--profile-startup", action="store_true",
+        help="Print the time spent in each startup phase once the bot is serving"
+    )
+    return parser.parse_args(argv)
+
+def main(argv=None):
     """Main function to initialize and run the bot"""
     
+    args = parse_args(argv)
+    startup.begin(STARTED_AT)
+    startup.lap("imports")
+    startup.print_report = args.profile_startup
+    
     # Setup logging
-    setup_logger()
+    with startup.phase("logging"):
+        setup_logger()
     logger = get_logger(__name__)
+    install_profiler_signal()
     
     logger.info("🌾 Starting Cholan AI Agricultural Bot...")
+    for name in missing_settings():
+        logger.warning(f"⚠️ Please set the {name} environment variable")
     
     try:
-        # Create bot application
-        application = Application.builder().token(TOKEN).build()
-        
-        # Setup all handlers
-        setup_handlers(application)
+        if args.workers > 1:
+            # Worker processes build their own applications
+            run_dispatcher(args.mode, args.workers, build_application, post_shutdown)
+            return
         
+        with startup.phase("build_application"):
+            application = build_application(webhook=args.mode == "webhook")
         logger.info("🚜 Bot initialized successfully")
-        logger.info("🚜 Bot is running... Press Ctrl+C to stop")
         
-        # Start polling
-        application.run_polling(poll_interval=POLL_INTERVAL)
+        if args.mode == "webhook":
+            asyncio.run(run_webhook(application, post_shutdown=post_shutdown))
+        else:
+            logger.info("🚜 Bot is running... Press Ctrl+C to stop")
+            application.run_polling(poll_interval=POLL_INTERVAL)
         
     except KeyboardInterrupt:
         logger.info("🛑 Bot stopped by user")
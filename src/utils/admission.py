@@ -0,0 +1,131 @@
+"""
+Admission control and load shedding for AI work
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Hashable
+
+from config.config import (
+    ADMISSION_MAX_IN_FLIGHT, ADMISSION_MAX_WAITING, ADMISSION_WAIT_TIMEOUT,
+    ADMISSION_USER_RATE, ADMISSION_USER_BURST
+)
+from utils.logger import get_logger
+from utils.outbound import TokenBucket
+
+logger = get_logger(__name__)
+
+class AdmissionController:
+    """
+    Decides which AI requests run now, wait, or are shed
+
+    At most max_in_flight requests run at once; up to max_waiting more wait
+    in FIFO order for at most wait_timeout seconds. Each user also has a token
+    bucket so one chatty user cannot fill the queue. Moderation and commands
+    never pass through here, so they stay fast under load.
+    """
+
+    MAX_IDLE_BUCKETS = 10000
+
+    def __init__(self, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+                 max_waiting: int = ADMISSION_MAX_WAITING,
+                 wait_timeout: float = ADMISSION_WAIT_TIMEOUT,
+                 user_rate: float = ADMISSION_USER_RATE,
+                 user_burst: float = ADMISSION_USER_BURST):
+        self.max_in_flight = max_in_flight
+        self.max_waiting = max_waiting
+        self.wait_timeout = wait_timeout
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.in_flight = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._user_buckets: Dict[Hashable, TokenBucket] = {}
+        self.stats: Dict[str, Any] = {
+            "admitted": 0,
+            "queued": 0,
+            "shed_user_rate": 0,
+            "shed_queue_full": 0,
+            "shed_timeout": 0,
+            "max_wait_seconds": 0.0
+        }
+
+    def _user_bucket(self, user_id: Hashable) -> TokenBucket:
+        bucket = self._user_buckets.get(user_id)
+        if bucket is None:
+            if len(self._user_buckets) >= self.MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                self._user_buckets = {k: b for k, b in self._user_buckets.items() if not b.is_idle(now)}
+            bucket = TokenBucket(self.user_rate, self.user_burst)
+            self._user_buckets[user_id] = bucket
+        return bucket
+
+    def check_user(self, user_id: Hashable) -> bool:
+        """Take one token from the user's bucket; False means shed this message"""
+        if self._user_bucket(user_id).try_acquire() > 0:
+            self.stats["shed_user_rate"] += 1
+            return False
+        return True
+
+    def has_capacity(self) -> bool:
+        """Whether a new request could run or wait right now"""
+        if self.in_flight < self.max_in_flight or len(self._waiters) < self.max_waiting:
+            return True
+        self.stats["shed_queue_full"] += 1
+        return False
+
+    async def acquire(self) -> bool:
+        """Wait for an in-flight slot; False if the queue is full or the deadline passed"""
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self.stats["admitted"] += 1
+            return True
+
+        if len(self._waiters) >= self.max_waiting:
+            self.stats["shed_queue_full"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.stats["queued"] += 1
+        started = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.wait_timeout)
+        except asyncio.TimeoutError:
+            # release() may have handed us the slot just as the deadline hit
+            if not (waiter.done() and not waiter.cancelled()):
+                self.stats["shed_timeout"] += 1
+                return False
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        self.stats["admitted"] += 1
+        self.stats["max_wait_seconds"] = max(self.stats["max_wait_seconds"], time.monotonic() - started)
+        return True
+
+    def release(self):
+        """Give the slot to the oldest waiter, or free it"""
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes straight to the waiter; in_flight is unchanged
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get in-flight, queue and shed counters"""
+        return {
+            **self.stats,
+            "in_flight": self.in_flight,
+            "waiting": len(self._waiters),
+            "shed_total": self.stats["shed_user_rate"] + self.stats["shed_queue_full"] + self.stats["shed_timeout"]
+        }
+
+# Global admission controller instance
+admission = AdmissionController()
@@ -0,0 +1,181 @@
+"""
+Bounded async execution engine for Gemini calls
+"""
+
+import asyncio
+import functools
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from config.config import AI_MAX_CONCURRENCY, AI_THREAD_POOL_SIZE, AI_REQUEST_TIMEOUT
+from utils.logger import get_logger
+from utils.metrics import GEMINI_CALLS_TOTAL
+from utils.health import health_monitor
+from utils.resilience import is_retryable
+
+logger = get_logger(__name__)
+
+class AIExecutor:
+    """Runs model calls off the event loop with a concurrency cap and per-call timeouts"""
+
+    def __init__(self, max_concurrency: int = AI_MAX_CONCURRENCY,
+                 thread_pool_size: int = AI_THREAD_POOL_SIZE,
+                 timeout: float = AI_REQUEST_TIMEOUT):
+        self.max_concurrency = max_concurrency
+        self.thread_pool_size = thread_pool_size
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self.stats: Dict[str, int] = {
+            "calls": 0,
+            "native_async": 0,
+            "thread_fallback": 0,
+            "timeouts": 0,
+            "errors": 0,
+            "in_flight": 0
+        }
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        """Create the fallback thread pool on first use"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.thread_pool_size,
+                thread_name_prefix="gemini"
+            )
+        return self._executor
+
+    async def _acquire(self):
+        """Take one of the concurrency slots"""
+        # Created lazily so the semaphore binds to the running event loop
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        await self._semaphore.acquire()
+        self.stats["in_flight"] += 1
+
+    def _release(self):
+        self.stats["in_flight"] -= 1
+        self._semaphore.release()
+
+    def _release_when_done(self, job: Future, loop: asyncio.AbstractEventLoop):
+        """Free the slot when the pool thread really finishes, not when the caller gives up on it"""
+        def release(_):
+            try:
+                loop.call_soon_threadsafe(self._release)
+            except RuntimeError:
+                # The loop closed during shutdown; nothing is waiting for the slot
+                pass
+        job.add_done_callback(release)
+
+    async def call(self, sync_fn: Callable[..., Any], *args,
+                   async_fn: Optional[Callable[..., Awaitable[Any]]] = None,
+                   timeout: Optional[float] = None, **kwargs) -> Any:
+        """
+        Execute a model call without blocking the event loop
+
+        A thread-pool call that times out cannot be interrupted, so it keeps
+        its slot until the thread returns; at most max_concurrency calls (and
+        pool threads) are ever busy, timed out or not.
+
+        Args:
+            sync_fn: Blocking callable, run in the thread pool when no native coroutine exists
+            async_fn: Native coroutine function, preferred when provided
+            timeout: Per-call timeout in seconds (defaults to AI_REQUEST_TIMEOUT)
+
+        Returns:
+            Whatever the underlying call returns
+        """
+        await self._acquire()
+        release_on_exit = True
+        try:
+            self.stats["calls"] += 1
+
+            if async_fn is not None:
+                self.stats["native_async"] += 1
+                awaitable = async_fn(*args, **kwargs)
+            else:
+                self.stats["thread_fallback"] += 1
+                job = self._get_executor().submit(functools.partial(sync_fn, *args, **kwargs))
+                self._release_when_done(job, asyncio.get_running_loop())
+                release_on_exit = False
+                awaitable = asyncio.wrap_future(job)
+
+            started = time.monotonic()
+            try:
+                result = await asyncio.wait_for(awaitable, timeout or self.timeout)
+            except asyncio.TimeoutError as e:
+                self.stats["timeouts"] += 1
+                GEMINI_CALLS_TOTAL.labels("timeout").inc()
+                health_monitor.gemini.record(False, error=e)
+                logger.warning(f"⏱️ Gemini call timed out after {timeout or self.timeout}s")
+                raise
+            except Exception as e:
+                self.stats["errors"] += 1
+                GEMINI_CALLS_TOTAL.labels(f"error_{type(e).__name__}").inc()
+                # A rejected request still means Gemini answered; only transient errors are unhealthy
+                health_monitor.gemini.record(not is_retryable(e), time.monotonic() - started, error=e)
+                raise
+            GEMINI_CALLS_TOTAL.labels("ok").inc()
+            health_monitor.gemini.record(True, time.monotonic() - started)
+            return result
+        finally:
+            if release_on_exit:
+                self._release()
+
+    async def send_message(self, chat_session, content, **kwargs) -> Any:
+        """Send a message on a Gemini chat session"""
+        return await self.call(
+            chat_session.send_message, content,
+            async_fn=getattr(chat_session, "send_message_async", None),
+            **kwargs
+        )
+
+    async def generate_content(self, model, contents, **kwargs) -> Any:
+        """Run a one-shot generation on a Gemini model"""
+        return await self.call(
+            model.generate_content, contents,
+            async_fn=getattr(model, "generate_content_async", None),
+            **kwargs
+        )
+
+    async def stream_message(self, chat_session, content,
+                             on_chunk: Callable[[str], Awaitable[None]], **kwargs) -> Any:
+        """
+        Send a message and feed streamed text chunks to on_chunk as they arrive
+
+        Without a native async API the reply is generated in the thread pool
+        and delivered as a single chunk.
+        """
+        native = getattr(chat_session, "send_message_async", None)
+        if native is None:
+            response = await self.send_message(chat_session, content, **kwargs)
+            await on_chunk(response.text)
+            return response
+
+        async def consume():
+            response = await native(content, stream=True, **kwargs)
+            async for chunk in response:
+                try:
+                    chunk_text = chunk.text
+                except Exception:
+                    # Chunks without text parts (e.g. safety metadata) are skipped
+                    continue
+                if chunk_text:
+                    await on_chunk(chunk_text)
+            return response
+
+        return await self.call(None, async_fn=consume)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get execution statistics"""
+        return dict(self.stats)
+
+    def shutdown(self):
+        """Release the fallback thread pool"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            logger.info("🧵 AI thread pool shut down")
+
+# Global AI executor instance
+ai_executor = AIExecutor()
@@ -2,68 +2,215 @@
 AI response handler using Google Gemini
 """
 
-import google.generativeai as genai
+import asyncio
+import threading
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, Any, Awaitable, Callable, List
 
-from config.config import GEMINI_API_KEY, MODEL_NAME, GENERATION_CONFIG, SYSTEM_PROMPT, ERROR_MESSAGES
-from utils.logger import get_logger, log_ai_interaction
-from data.responses import get_time_based_greeting
+from config.config import GEMINI_API_KEY, MODEL_NAME, GENERATION_CONFIG, SYSTEM_PROMPT, ERROR_MESSAGES, FEATURES
+from utils.logger import get_logger, log_ai_interaction, BotLogger, traced
+from utils.ai_executor import ai_executor
+from utils.session_store import SessionStore
+from utils.response_cache import response_cache
+from utils.single_flight import SingleFlight, coalescing_key
+from utils.resilience import gemini_resilience, CircuitOpenError
+from utils.history import HistoryWindow
+from utils.intent_router import intent_router
+from utils.health import health_monitor, DOWN
 
 logger = get_logger(__name__)
 
-# Initialize Gemini AI
-try:
-    genai.configure(api_key=GEMINI_API_KEY)
-    logger.info("🤖 Gemini AI initialized successfully")
-except Exception as e:
-    logger.error(f"❌ Failed to initialize Gemini AI: {e}")
-
 class AIResponseHandler:
-    """Handles AI response generation with context management"""
+    """
+    Handles AI response generation with context management
+
+    The Gemini SDK is imported and the model built on first use (or by the
+    startup warm-up), so importing this module stays cheap.
+    """
     
     def __init__(self):
-        self.model = None
-        self.chat_sessions = {}  # Store chat sessions per user
-        self._initialize_model()
+        self._model = None
+        self._model_initialized = False
+        self._model_lock = threading.Lock()
+        self.chat_sessions = SessionStore()  # Bounded LRU/TTL store of chat sessions per user
+        self.history_window = HistoryWindow()  # Keeps every request under the token budget
+        self.single_flight = SingleFlight()  # Shares identical context-free calls
+        # Partial-text receivers of the callers still waiting on each shared call
+        self._stream_listeners: Dict[str, List[Callable[[str], Awaitable[None]]]] = {}
+        self.stats: Dict[str, int] = {
+            "user_messages": 0,         # Messages that reached the model
+            "generation_calls": 0,      # Gemini generation requests actually sent, retries and hedges included
+            "prompt_tokens_total": 0,   # As reported by Gemini usage metadata
+            "last_prompt_tokens": 0,
+            "last_estimated_tokens": 0  # Our estimate after windowing
+        }
+    
+    @property
+    def model(self):
+        """The Gemini model, initialized on first access; None if that failed"""
+        if not self._model_initialized:
+            self.initialize_model()
+        return self._model
+    
+    @model.setter
+    def model(self, model):
+        # The load test and resilience drill install fake models; a lazy init never replaces them
+        self._model = model
+        self._model_initialized = True
     
-    def _initialize_model(self):
+    def initialize_model(self) -> bool:
+        """Configure Gemini and build the model once; blocking, safe to call from any thread"""
+        with self._model_lock:
+            if not self._model_initialized:
+                self._model = self._create_model()
+                self._model_initialized = True
+        return self._model is not None
+    
+    def _create_model(self):
         """Initialize the Gemini model"""
         try:
-            self.model = genai.GenerativeModel(
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY)
+            # The system prompt is a model-level instruction, so it is sent
+            # with every request instead of being primed as a chat turn
+            model = genai.GenerativeModel(
                 model_name=MODEL_NAME,
-                generation_config=GENERATION_CONFIG
+                generation_config=GENERATION_CONFIG,
+                system_instruction=SYSTEM_PROMPT
             )
             logger.info(f"✅ Model {MODEL_NAME} initialized")
+            return model
         except Exception as e:
             logger.error(f"❌ Model initialization failed: {e}")
-            self.model = None
+            return None
     
     def get_chat_session(self, user_id: int):
         """Get or create chat session for user"""
-        if user_id not in self.chat_sessions:
-            if self.model:
-                self.chat_sessions[user_id] = self.model.start_chat(history=[])
-                # Send system prompt to establish context
-                try:
-                    self.chat_sessions[user_id].send_message(SYSTEM_PROMPT)
-                    logger.debug(f"Chat session created for user {user_id}")
-                except Exception as e:
-                    logger.error(f"Failed to initialize chat session: {e}")
-            else:
+        chat_session = self.chat_sessions.get(user_id)
+        if chat_session is None:
+            if not self.model:
                 return None
-        return self.chat_sessions[user_id]
+            chat_session = self.model.start_chat(history=[])
+            self.chat_sessions.put(user_id, chat_session)
+            logger.debug("Chat session created for user %s", user_id)
+        return chat_session
+
+    async def send(self, chat_session, text: str,
+                   on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """
+        Send one user message to the model (exactly one generation call)
+
+        When on_partial is given the reply is streamed and on_partial receives
+        the accumulated text after every chunk.
+        """
+        self.stats["user_messages"] += 1
+        self.stats["last_estimated_tokens"] = self.history_window.apply(chat_session, text)
+        history = list(chat_session.history)
+        
+        def attempt_session():
+            # Every attempt (retry or hedge) works on its own copy of the session
+            return self.model.start_chat(history=list(history))
+        
+        try:
+            if on_partial is None:
+                async def attempt():
+                    self.stats["generation_calls"] += 1
+                    with BotLogger(logger, "gemini.attempt"):
+                        session = attempt_session()
+                        return session, await ai_executor.send_message(session, text)
+                
+                session, response = await gemini_resilience.call(
+                    attempt, hedge=FEATURES["enable_hedged_requests"]
+                )
+                chat_session.history = session.history
+                self._record_usage(response)
+                return response.text
+            
+            chunks = []
+            
+            async def on_chunk(chunk_text: str):
+                chunks.append(chunk_text)
+                await on_partial(''.join(chunks))
+            
+            async def stream_attempt():
+                # A retried stream starts over
+                chunks.clear()
+                self.stats["generation_calls"] += 1
+                with BotLogger(logger, "gemini.attempt", streamed=True):
+                    session = attempt_session()
+                    return session, await ai_executor.stream_message(session, text, on_chunk)
+            
+            # Streams are never hedged: two attempts would interleave in one placeholder
+            session, response = await gemini_resilience.call(stream_attempt)
+            chat_session.history = session.history
+            self._record_usage(response)
+            return ''.join(chunks)
+        except asyncio.CancelledError:
+            # Superseded input must not stay in the conversation
+            chat_session.history = history
+            raise
+    
+    async def send_coalesced(self, text: str,
+                             on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
+        """
+        Send a context-free prompt, sharing the call with identical concurrent prompts
+
+        The call runs on a fresh session, so it must only be used when the
+        answer cannot depend on conversation history, and only for text that
+        has a coalescing_key. The call streams if the caller that starts it
+        streams; partial text goes to every caller still waiting, and a caller
+        that is cancelled or superseded stops receiving it.
+        """
+        key = coalescing_key(text)
+        if on_partial is not None:
+            self._stream_listeners.setdefault(key, []).append(on_partial)
+        
+        async def fan_out(partial: str):
+            # Looked up on every chunk so callers that left are skipped and late joiners included
+            for listener in list(self._stream_listeners.get(key, ())):
+                await listener(partial)
+        
+        try:
+            return await self.single_flight.do(
+                key, lambda: self.send(
+                    self.model.start_chat(history=[]), text, on_partial=fan_out if on_partial else None
+                )
+            )
+        finally:
+            if on_partial is not None:
+                listeners = self._stream_listeners[key]
+                listeners.remove(on_partial)
+                if not listeners:
+                    del self._stream_listeners[key]
+
+    def append_turn(self, chat_session, text: str, response: str):
+        """Record an exchange made outside the session in its history"""
+        chat_session.history = [
+            *chat_session.history,
+            {"role": "user", "parts": [text]},
+            {"role": "model", "parts": [response]}
+        ]
+
+    def _record_usage(self, response):
+        """Track prompt tokens reported by Gemini for the call"""
+        usage = getattr(response, "usage_metadata", None)
+        prompt_tokens = getattr(usage, "prompt_token_count", 0) or 0
+        if prompt_tokens:
+            self.stats["prompt_tokens_total"] += prompt_tokens
+            self.stats["last_prompt_tokens"] = prompt_tokens
+            logger.debug("Prompt tokens: %s (estimated %s)", prompt_tokens, self.stats['last_estimated_tokens'])
     
     def clear_chat_session(self, user_id: int):
         """Clear chat session for user (useful for context reset)"""
-        if user_id in self.chat_sessions:
-            del self.chat_sessions[user_id]
-            logger.debug(f"Chat session cleared for user {user_id}")
+        if self.chat_sessions.pop(user_id) is not None:
+            logger.debug("Chat session cleared for user %s", user_id)
 
 # Global AI handler instance
 ai_handler = AIResponseHandler()
 
-async def handle_ai_response(text: str, user_id: Optional[int] = None, username: str = "Unknown") -> str:
+@traced("ai.handle_ai_response")
+async def handle_ai_response(text: str, user_id: Optional[int] = None, username: str = "Unknown",
+                             on_partial: Optional[Callable[[str], Awaitable[None]]] = None) -> str:
     """
     Generate AI response for user input
     
@@ -71,63 +218,81 @@ async def handle_ai_response(text: str, user_id: Optional[int] = None, username:
         text: User's message text
         user_id: Telegram user ID (for session management)
         username: Username for logging
+        on_partial: Optional coroutine receiving partial text while the model streams
     
     Returns:
         AI-generated response string
     """
     
-    processed_text = text.lower().strip()
-    
-    # Handle simple greetings first
-    greeting_response = _handle_simple_greetings(processed_text)
-    if greeting_response:
-        log_ai_interaction(logger, username, text, len(greeting_response))
-        return greeting_response
+    # Answer greetings, thanks, help, jokes and trivia locally
+    if FEATURES["enable_intent_router"]:
+        local_response = intent_router.route(text)
+        if local_response:
+            log_ai_interaction(logger, username, text, len(local_response))
+            return local_response
     
     # Generate AI response
+    context_free = False
     try:
         if not ai_handler.model:
             logger.error("AI model not available")
             return ERROR_MESSAGES["ai_error"]
         
         # Get user's chat session if user_id provided
-        if user_id:
-            chat_session = ai_handler.get_chat_session(user_id)
-        else:
-            # Create temporary session
-            chat_session = ai_handler.model.start_chat(history=[])
-            chat_session.send_message(SYSTEM_PROMPT)
-        
-        if not chat_session:
+        chat_session = ai_handler.get_chat_session(user_id) if user_id else None
+        if user_id and not chat_session:
             return ERROR_MESSAGES["ai_error"]
         
-        # Generate response
-        response = chat_session.send_message(text)
-        ai_response = response.text.strip()
+        # Only answers that do not depend on conversation history may be shared
+        # through the cache; "how do I fix it?" means something different per user
+        context_free = chat_session is None or not chat_session.history
+        
+        # Serve repeated questions from the cache
+        if context_free and FEATURES["enable_response_cache"]:
+            cached_response = await response_cache.get(text)
+            if cached_response:
+                if chat_session is not None:
+                    ai_handler.append_turn(chat_session, text, cached_response)
+                log_ai_interaction(logger, username, text, len(cached_response))
+                return cached_response
+        
+        # Generate response off the event loop; without prior context the answer
+        # depends only on the prompt, so identical concurrent prompts share a call
+        if not context_free:
+            response_text = await ai_handler.send(chat_session, text, on_partial=on_partial)
+        elif FEATURES["enable_request_coalescing"] and coalescing_key(text):
+            response_text = await ai_handler.send_coalesced(text, on_partial=on_partial)
+            if chat_session is not None:
+                ai_handler.append_turn(chat_session, text, response_text)
+        else:
+            response_text = await ai_handler.send(
+                chat_session or ai_handler.model.start_chat(history=[]), text, on_partial=on_partial
+            )
+        ai_response = response_text.strip()
         
         # Post-process response
         ai_response = _post_process_response(ai_response)
         
+        if context_free and FEATURES["enable_response_cache"]:
+            await response_cache.put(text, ai_response)
+        
         # Log the interaction
         log_ai_interaction(logger, username, text, len(ai_response))
         
         return ai_response
         
+    except CircuitOpenError:
+        # Gemini is failing; answer from the cache if a duplicate filled it meanwhile
+        logger.debug("AI unavailable (circuit open), fallback answer for @%s", username)
+        cached_response = await response_cache.get(text) if context_free and FEATURES["enable_response_cache"] else None
+        return cached_response or ERROR_MESSAGES["ai_unavailable"]
+    except asyncio.TimeoutError:
+        logger.error(f"AI response timed out for @{username}")
+        return ERROR_MESSAGES["ai_error"]
     except Exception as e:
         logger.error(f"AI response generation failed: {e}")
         return ERROR_MESSAGES["ai_error"]
 
-def _handle_simple_greetings(text: str) -> Optional[str]:
-    """Handle simple greetings without AI"""
-    
-    greeting_keywords = ['hello', 'hi', 'hey', 'hlo', 'greetings', 'good morning', 'good afternoon', 'good evening']
-    
-    if any(keyword in text for keyword in greeting_keywords):
-        greeting = get_time_based_greeting()
-        return f"{greeting}! 🌾 Welcome to Cholan AI! How can I help you with your agricultural needs today?"
-    
-    return None
-
 def _post_process_response(response: str) -> str:
     """Post-process AI response for better formatting"""
     
@@ -146,21 +311,40 @@ def _post_process_response(response: str) -> str:
     
     return response
 
+def get_session_stats() -> Dict[str, Any]:
+    """Get chat session store gauges (resident sessions, evictions, memory)"""
+    return ai_handler.chat_sessions.get_stats()
+
+def get_ai_stats() -> Dict[str, int]:
+    """
+    Get AI call counters
+
+    generation_calls counts every request sent to Gemini, so it exceeds
+    user_messages by the retries and hedges the resilience layer made.
+    """
+    return {
+        **ai_handler.stats,
+        "llm_calls_avoided": intent_router.stats["llm_calls_avoided"],
+        "coalesced_calls": ai_handler.single_flight.stats["coalesced"]
+    }
+
 def reset_user_context(user_id: int):
     """Reset user's chat context (useful for fresh start)"""
     ai_handler.clear_chat_session(user_id)
     logger.info(f"AI context reset for user {user_id}")
 
-# Health check function
+# Health check functions
 def check_ai_health() -> bool:
-    """Check if AI service is healthy"""
-    try:
-        if ai_handler.model:
-            # Try a simple test
-            test_chat = ai_handler.model.start_chat(history=[])
-            test_response = test_chat.send_message("Test")
-            return bool(test_response.text)
-        return False
-    except Exception as e:
-        logger.error(f"AI health check failed: {e}")
-        return False
+    """Whether Gemini looks usable, judged from recent real calls; sends nothing"""
+    return health_monitor.gemini.state() != DOWN
+
+async def probe_ai():
+    """
+    Idle-time health probe: a token count round trip, so no generation quota is spent
+
+    Raises if the model is unavailable or Gemini cannot be reached.
+    """
+    model = await asyncio.to_thread(lambda: ai_handler.model)
+    if model is None:
+        raise RuntimeError("AI model not available")
+    await asyncio.to_thread(model.count_tokens, "ping")
@@ -0,0 +1,196 @@
+"""
+Durable conversation log: append-only JSON lines with segment rotation
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import shutil
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from config.config import (
+    CONVERSATIONS_FILE, CONVERSATION_SEGMENT_MAX_BYTES, CONVERSATION_SEGMENT_MAX_AGE,
+    CONVERSATION_QUEUE_SIZE, CONVERSATION_FLUSH_INTERVAL, FEATURES
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class ConversationLog:
+    """
+    Append-only conversation log written by a background task
+
+    The active segment is CONVERSATIONS_FILE (conversations-worker{N}.jsonl
+    in worker N, so no process rotates a file another one has open); when it
+    grows past the size limit or gets too old it is renamed with a timestamp
+    and, optionally, gzip-compressed. Callers only ever enqueue. Readers see
+    the segments of every worker.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, path: Path = CONVERSATIONS_FILE,
+                 max_bytes: int = CONVERSATION_SEGMENT_MAX_BYTES,
+                 max_age: float = CONVERSATION_SEGMENT_MAX_AGE,
+                 max_queue: int = CONVERSATION_QUEUE_SIZE,
+                 flush_interval: float = CONVERSATION_FLUSH_INTERVAL,
+                 compress: bool = FEATURES["compress_conversation_segments"]):
+        self.base_path = path
+        self.path = path
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.compress = compress
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        # Only touched from the writer thread
+        self._file: Optional[TextIO] = None
+        self._segment_started = 0.0
+        self.stats: Dict[str, int] = {
+            "recorded": 0,
+            "dropped": 0,
+            "written": 0,
+            "write_errors": 0,
+            "segments_rotated": 0
+        }
+
+    def record(self, user_id: int, username: str, message: str, response: str, **extra: Any) -> bool:
+        """Queue one exchange for writing; never blocks, returns False if dropped"""
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+        entry = {
+            "ts": datetime.now().isoformat(),
+            "user_id": user_id,
+            "username": username,
+            "message": message,
+            "response": response,
+            **extra
+        }
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+
+        self.stats["recorded"] += 1
+        return True
+
+    async def _run(self):
+        """Drain the queue in batches and hand each batch to a writer thread"""
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            entry = await self._queue.get()
+            if entry is None:
+                break
+
+            batch = [entry]
+            await asyncio.sleep(self.flush_interval)
+            while not self._queue.empty() and len(batch) < self.BATCH_SIZE:
+                entry = self._queue.get_nowait()
+                if entry is None:
+                    # Stop marker from stop(): write what we have, then exit
+                    stopping = True
+                    break
+                batch.append(entry)
+            await loop.run_in_executor(None, self._write_batch, batch)
+
+    def use_worker(self, index: int):
+        """Write to this worker's own segments; call before the first record"""
+        base = self.base_path
+        self.path = base.with_name(f"{base.stem}-worker{index}{base.suffix}")
+
+    def _open_segment(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._segment_started = time.time()
+
+    def _write_batch(self, batch: List[Dict[str, Any]]):
+        try:
+            if self._file is None:
+                self._open_segment()
+            self._file.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in batch))
+            self._file.flush()
+            self.stats["written"] += len(batch)
+
+            if (self._file.tell() >= self.max_bytes
+                    or time.time() - self._segment_started >= self.max_age):
+                self._rotate()
+        except Exception as e:
+            self.stats["write_errors"] += 1
+            logger.error(f"❌ Failed to write conversation log: {e}")
+
+    def _rotate(self):
+        """Close the active segment, rename it with a timestamp and compress it"""
+        self._file.close()
+        self._file = None
+
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+        closed = self.path.with_name(f"{self.path.stem}-{stamp}{self.path.suffix}")
+        os.replace(self.path, closed)
+        self.stats["segments_rotated"] += 1
+
+        if self.compress:
+            with open(closed, 'rb') as source, gzip.open(f"{closed}.gz", 'wb') as target:
+                shutil.copyfileobj(source, target)
+            closed.unlink()
+
+        logger.info(f"🗂️ Conversation segment rotated: {closed.name}{'.gz' if self.compress else ''}")
+
+    def segments(self) -> List[Path]:
+        """Every worker's segments (closed and active), oldest first by last write"""
+        base = self.base_path
+        found = list(base.parent.glob(f"{base.stem}-*{base.suffix}*"))
+        if base.exists():
+            found.append(base)
+
+        def last_write(segment: Path) -> float:
+            try:
+                return segment.stat().st_mtime
+            except FileNotFoundError:
+                return float("inf")
+        return sorted(found, key=last_write)
+
+    def iter_conversations(self) -> Iterator[Dict[str, Any]]:
+        """Stream every logged exchange, oldest first, without loading whole segments"""
+        for segment in self.segments():
+            opener = gzip.open if segment.suffix == '.gz' else open
+            try:
+                with opener(segment, 'rt', encoding='utf-8') as file:
+                    for line in file:
+                        try:
+                            yield json.loads(line)
+                        except json.JSONDecodeError:
+                            # Torn final line from a crash mid-write
+                            continue
+            except FileNotFoundError:
+                # Rotated away while we were reading
+                continue
+
+    async def stop(self):
+        """Flush queued entries and close the active segment"""
+        if self._task is not None and not self._task.done():
+            # The writer drains everything queued ahead of the stop marker
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+
+        loop = asyncio.get_running_loop()
+        if self._file is not None:
+            await loop.run_in_executor(None, self._file.close)
+            self._file = None
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get queue depth and write counters"""
+        return {**self.stats, "queue_depth": self._queue.qsize() if self._queue else 0}
+
+# Global conversation log instance
+conversation_log = ConversationLog()
@@ -0,0 +1,235 @@
+"""
+Passive health monitoring of external dependencies with /healthz and /readyz
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+from config.config import (
+    HEALTH_WINDOW, HEALTH_MIN_SAMPLES, HEALTH_DEGRADED_ERROR_RATE, HEALTH_DOWN_ERROR_RATE,
+    HEALTH_DOWN_AFTER_FAILURES, HEALTH_SLOW_SECONDS, HEALTH_CHECK_INTERVAL,
+    HEALTH_PROBE_IDLE_AFTER, HEALTH_PROBE_MIN_INTERVAL, HEALTH_PROBE_TIMEOUT,
+    HEALTH_STORAGE_INTERVAL, HEALTH_MAX_LOOP_LAG
+)
+from utils.http_server import HTTPRequest, HTTPResponse
+from utils.logger import get_logger
+from utils.startup import startup
+
+logger = get_logger(__name__)
+
+UNKNOWN = "unknown"
+OK = "ok"
+DEGRADED = "degraded"
+DOWN = "down"
+
+# Numeric form for the metrics exporter
+STATE_CODES = {UNKNOWN: -1, OK: 0, DEGRADED: 1, DOWN: 2}
+
+class DependencyHealth:
+    """
+    Health of one dependency, judged from the outcomes of real calls
+
+    Callers record every call they make anyway, so healthy traffic costs
+    nothing extra. The probe (a coroutine function that raises on failure)
+    only runs once the dependency has been idle for idle_after seconds, and
+    at most every probe_interval seconds, so it never competes with real
+    traffic or spends quota on a busy instance.
+    """
+
+    def __init__(self, name: str, probe: Optional[Callable[[], Awaitable[Any]]] = None,
+                 idle_after: float = HEALTH_PROBE_IDLE_AFTER,
+                 probe_interval: float = HEALTH_PROBE_MIN_INTERVAL,
+                 down_after_failures: int = HEALTH_DOWN_AFTER_FAILURES,
+                 window: float = HEALTH_WINDOW, max_samples: int = 2000):
+        self.name = name
+        self.probe = probe
+        # Optional override, e.g. an open circuit breaker means down regardless of the window
+        self.is_tripped: Optional[Callable[[], bool]] = None
+        self.idle_after = idle_after
+        self.probe_interval = probe_interval
+        self.down_after_failures = down_after_failures
+        self.window = window
+        self._outcomes: Deque[Tuple[float, bool, float]] = deque(maxlen=max_samples)
+        self.consecutive_failures = 0
+        self.last_activity: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self._last_probe = float("-inf")
+        self._probing = False
+        self.stats: Dict[str, int] = {"successes": 0, "failures": 0, "probes": 0, "probe_failures": 0}
+
+    def record(self, ok: bool, latency: float = 0.0, error: Optional[BaseException] = None):
+        """Record the outcome of one call (O(1); safe on the hot path)"""
+        now = time.monotonic()
+        self._outcomes.append((now, ok, latency))
+        self.last_activity = now
+        if ok:
+            self.stats["successes"] += 1
+            self.consecutive_failures = 0
+        else:
+            self.stats["failures"] += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}" if error is not None else "failed"
+
+    def _recent(self, now: float):
+        horizon = now - self.window
+        while self._outcomes and self._outcomes[0][0] < horizon:
+            self._outcomes.popleft()
+        return self._outcomes
+
+    def summary(self) -> Dict[str, Any]:
+        """Error rate and latency over the window"""
+        recent = self._recent(time.monotonic())
+        latencies = sorted(latency for _, ok, latency in recent if ok)
+        failures = sum(1 for _, ok, _ in recent if not ok)
+        return {
+            "samples": len(recent),
+            "error_rate": round(failures / len(recent), 3) if recent else 0.0,
+            "p95_seconds": round(latencies[min(len(latencies) - 1, int(0.95 * len(latencies)))], 3)
+            if latencies else None
+        }
+
+    def state(self) -> str:
+        if self.is_tripped is not None and self.is_tripped():
+            return DOWN
+        if self.consecutive_failures >= self.down_after_failures:
+            return DOWN
+        if self.last_activity is None:
+            return UNKNOWN
+
+        summary = self.summary()
+        if summary["samples"] < HEALTH_MIN_SAMPLES:
+            # Too little traffic for rates; go by the latest outcomes
+            return DEGRADED if self.consecutive_failures else OK
+        if summary["error_rate"] >= HEALTH_DOWN_ERROR_RATE:
+            return DOWN
+        if summary["error_rate"] >= HEALTH_DEGRADED_ERROR_RATE:
+            return DEGRADED
+        if (summary["p95_seconds"] or 0) > HEALTH_SLOW_SECONDS:
+            return DEGRADED
+        return OK
+
+    def probe_due(self, now: float) -> bool:
+        if self.probe is None or self._probing or now - self._last_probe < self.probe_interval:
+            return False
+        return self.last_activity is None or now - self.last_activity >= self.idle_after
+
+    async def run_probe(self):
+        """Run the synthetic probe once and record its outcome like a real call"""
+        self._probing = True
+        self._last_probe = started = time.monotonic()
+        self.stats["probes"] += 1
+        try:
+            await asyncio.wait_for(self.probe(), HEALTH_PROBE_TIMEOUT)
+        except Exception as e:
+            self.stats["probe_failures"] += 1
+            self.record(False, error=e)
+            logger.warning(f"🩺 {self.name} probe failed: {type(e).__name__}: {e}")
+        else:
+            self.record(True, time.monotonic() - started)
+        finally:
+            self._probing = False
+
+    def snapshot(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "state": self.state(),
+            **self.summary(),
+            "consecutive_failures": self.consecutive_failures,
+            "idle_seconds": round(now - self.last_activity, 1) if self.last_activity is not None else None,
+            "last_error": self.last_error
+        }
+
+class HealthMonitor:
+    """
+    Health of Gemini, Telegram and storage, served as /healthz and /readyz
+
+    /healthz (liveness) only fails when the event loop is stuck or the bot is
+    shutting down, so an orchestrator restarts the process only when that
+    helps. /readyz (readiness) fails while starting up or when Telegram or
+    storage is down. Gemini is shared by every instance, so its state is
+    reported but never takes an instance out of rotation. Both answer from
+    state kept by the monitor and never call a dependency themselves.
+    """
+
+    def __init__(self, interval: float = HEALTH_CHECK_INTERVAL):
+        self.interval = interval
+        self.gemini = DependencyHealth("gemini")
+        self.telegram = DependencyHealth("telegram")
+        # A local write is cheap, so storage is checked on a schedule rather than when idle
+        self.storage = DependencyHealth(
+            "storage", idle_after=0, probe_interval=HEALTH_STORAGE_INTERVAL, down_after_failures=1
+        )
+        self.dependencies = (self.gemini, self.telegram, self.storage)
+        # Instance-local failures; another instance would not fare better against a Gemini outage
+        self.required = (self.telegram, self.storage)
+        self._task: Optional[asyncio.Task] = None
+        self._probes: Set[asyncio.Task] = set()
+        self._last_tick: Optional[float] = None
+        self.loop_lag = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        for probe in list(self._probes):
+            probe.cancel()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        expected = time.monotonic()
+        while True:
+            now = time.monotonic()
+            # How late this tick is: the event loop was busy for that long
+            self.loop_lag = max(0.0, now - expected)
+            self._last_tick = now
+            for dependency in self.dependencies:
+                if dependency.probe_due(now):
+                    # Probes run beside the loop so a slow dependency never delays the others
+                    probe = asyncio.get_running_loop().create_task(dependency.run_probe())
+                    self._probes.add(probe)
+                    probe.add_done_callback(self._probes.discard)
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+
+    def liveness(self) -> Tuple[bool, Dict[str, Any]]:
+        # A monitor that stopped ticking means the loop (or the monitor) is stuck
+        stalled = (self._last_tick is not None
+                   and time.monotonic() - self._last_tick > self.interval + HEALTH_MAX_LOOP_LAG)
+        alive = startup.state != "stopping" and not stalled and self.loop_lag <= HEALTH_MAX_LOOP_LAG
+        return alive, {
+            "status": OK if alive else DOWN,
+            "state": startup.state,
+            "loop_lag_seconds": round(self.loop_lag, 3)
+        }
+
+    def readiness(self) -> Tuple[bool, Dict[str, Any]]:
+        checks = {dependency.name: dependency.snapshot() for dependency in self.dependencies}
+        ready = startup.ready and all(dependency.state() != DOWN for dependency in self.required)
+        return ready, {"status": "ready" if ready else "not_ready", "state": startup.state, "checks": checks}
+
+    async def handle_healthz(self, request: HTTPRequest) -> HTTPResponse:
+        alive, body = self.liveness()
+        return HTTPResponse.json(body, status=200 if alive else 503)
+
+    async def handle_readyz(self, request: HTTPRequest) -> HTTPResponse:
+        ready, body = self.readiness()
+        return HTTPResponse.json(body, status=200 if ready else 503)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {"ready": int(self.readiness()[0]), "loop_lag_seconds": self.loop_lag}
+        for dependency in self.dependencies:
+            stats[f"{dependency.name}_state"] = STATE_CODES[dependency.state()]
+            stats.update({f"{dependency.name}_{key}": value for key, value in dependency.stats.items()})
+        return stats
+
+# Global health monitor instance
+health_monitor = HealthMonitor()
@@ -0,0 +1,129 @@
+"""
+Token-budgeted conversation history windowing for Gemini chat sessions
+"""
+
+import re
+from typing import Any, Dict, List, Tuple
+
+from config.config import SYSTEM_PROMPT, HISTORY_TOKEN_BUDGET, HISTORY_SUMMARY_MAX_TOKENS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+SUMMARY_PREFIX = "[Summary of our earlier conversation]"
+SUMMARY_ACK = "Noted, I'll keep that context in mind."
+
+_SENTENCE_END = re.compile(r'(?<=[.!?])\s')
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English text)"""
+    return max(1, len(text) // 4)
+
+def content_text(content: Any) -> str:
+    """Text of a history entry (protos.Content or the equivalent dict)"""
+    parts = content.get("parts", []) if isinstance(content, dict) else getattr(content, "parts", [])
+    texts = []
+    for part in parts:
+        if isinstance(part, str):
+            texts.append(part)
+        elif isinstance(part, dict):
+            texts.append(part.get("text", ""))
+        else:
+            texts.append(getattr(part, "text", "") or "")
+    return ''.join(texts)
+
+def content_role(content: Any) -> str:
+    return content.get("role", "") if isinstance(content, dict) else getattr(content, "role", "")
+
+def _first_sentence(text: str, limit: int) -> str:
+    sentence = _SENTENCE_END.split(text.strip().replace('\n', ' '), 1)[0]
+    return sentence if len(sentence) <= limit else sentence[:limit - 3] + "..."
+
+class HistoryWindow:
+    """
+    Keeps each request under a token budget
+
+    The system prompt (a model-level instruction) is always counted. Recent
+    turns are kept newest-first while they fit; older turns are folded into a
+    compact running summary pinned at the start of the history.
+    """
+
+    def __init__(self, token_budget: int = HISTORY_TOKEN_BUDGET,
+                 summary_max_tokens: int = HISTORY_SUMMARY_MAX_TOKENS):
+        self.token_budget = token_budget
+        self.summary_max_tokens = summary_max_tokens
+        self.system_tokens = estimate_tokens(SYSTEM_PROMPT)
+        self.stats: Dict[str, int] = {
+            "windows_applied": 0,
+            "turns_summarized": 0
+        }
+
+    def _split(self, history: List[Any]) -> Tuple[List[str], List[Tuple[Any, Any]]]:
+        """Separate the pinned summary lines from (user, model) turn pairs"""
+        summary_lines: List[str] = []
+        turns: List[Tuple[Any, Any]] = []
+        entries = list(history)
+        if entries and content_text(entries[0]).startswith(SUMMARY_PREFIX):
+            summary_lines = content_text(entries[0])[len(SUMMARY_PREFIX):].strip().splitlines()
+            entries = entries[2:]
+        for i in range(0, len(entries) - 1, 2):
+            turns.append((entries[i], entries[i + 1]))
+        return summary_lines, turns
+
+    def _summarize_turn(self, user_content: Any, model_content: Any) -> str:
+        question = _first_sentence(content_text(user_content), 80)
+        answer = _first_sentence(content_text(model_content), 120)
+        return f"- Q: {question} A: {answer}"
+
+    def _trim_summary(self, lines: List[str]) -> List[str]:
+        """Drop the oldest summary lines beyond the summary budget"""
+        while lines and estimate_tokens('\n'.join(lines)) > self.summary_max_tokens:
+            lines = lines[1:]
+        return lines
+
+    def apply(self, chat_session: Any, incoming_text: str) -> int:
+        """
+        Fit the session history to the budget before sending incoming_text
+
+        Returns:
+            Estimated prompt tokens for the request
+        """
+        history = list(getattr(chat_session, "history", None) or [])
+        summary_lines, turns = self._split(history)
+
+        fixed = self.system_tokens + estimate_tokens(incoming_text)
+        summary_tokens = estimate_tokens('\n'.join(summary_lines)) if summary_lines else 0
+        turn_tokens = [estimate_tokens(content_text(u) + content_text(m)) for u, m in turns]
+
+        if fixed + summary_tokens + sum(turn_tokens) <= self.token_budget:
+            return fixed + summary_tokens + sum(turn_tokens)
+
+        # Keep the newest turns that fit alongside a full-size summary
+        available = self.token_budget - fixed - self.summary_max_tokens
+        kept, used = 0, 0
+        for tokens in reversed(turn_tokens):
+            if used + tokens > available:
+                break
+            used += tokens
+            kept += 1
+
+        dropped = turns[:len(turns) - kept]
+        summary_lines = self._trim_summary(summary_lines + [self._summarize_turn(u, m) for u, m in dropped])
+
+        new_history: List[Any] = []
+        if summary_lines:
+            new_history.append({"role": "user", "parts": [SUMMARY_PREFIX + "\n" + '\n'.join(summary_lines)]})
+            new_history.append({"role": "model", "parts": [SUMMARY_ACK]})
+        for user_content, model_content in turns[len(turns) - kept:]:
+            new_history.extend([user_content, model_content])
+
+        chat_session.history = new_history
+        self.stats["windows_applied"] += 1
+        self.stats["turns_summarized"] += len(dropped)
+        logger.debug("History windowed: kept %d turns, summarized %d", kept, len(dropped))
+
+        summary_tokens = estimate_tokens('\n'.join(summary_lines)) if summary_lines else 0
+        return fixed + summary_tokens + used
+
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
@@ -0,0 +1,200 @@
+"""
+Minimal embedded asyncio HTTP/1.1 server for webhooks and operational endpoints
+"""
+
+import asyncio
+import json
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+from urllib.parse import urlsplit, parse_qs
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+STATUS_TEXT = {
+    200: "OK",
+    204: "No Content",
+    400: "Bad Request",
+    401: "Unauthorized",
+    403: "Forbidden",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    408: "Request Timeout",
+    413: "Payload Too Large",
+    414: "URI Too Long",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+    503: "Service Unavailable"
+}
+
+class HTTPError(Exception):
+    """Raised while reading a request that cannot be served"""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+@dataclass
+class HTTPRequest:
+    method: str
+    path: str
+    query: Dict[str, list]
+    headers: Dict[str, str]
+    body: bytes
+
+    def json(self):
+        """Decode the body as JSON"""
+        return json.loads(self.body.decode('utf-8'))
+
+@dataclass
+class HTTPResponse:
+    status: int = 200
+    body: bytes = b""
+    content_type: str = "text/plain; charset=utf-8"
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def text(cls, text: str, status: int = 200, content_type: str = "text/plain; charset=utf-8") -> "HTTPResponse":
+        return cls(status=status, body=text.encode('utf-8'), content_type=content_type)
+
+    @classmethod
+    def json(cls, data, status: int = 200) -> "HTTPResponse":
+        return cls(status=status, body=json.dumps(data).encode('utf-8'), content_type="application/json")
+
+Handler = Callable[[HTTPRequest], Awaitable[HTTPResponse]]
+
+class HTTPServer:
+    """
+    Tiny routing HTTP server built on asyncio streams (keep-alive, Content-Length bodies)
+
+    A request's headers and body must arrive within `read_timeout` and stay
+    under the header limits, so slow or oversized clients cannot hold
+    connections open; idle keep-alive connections close after `idle_timeout`.
+    """
+
+    def __init__(self, host: str, port: int, max_body: int = 1024 * 1024, name: str = "http",
+                 max_headers: int = 100, max_header_bytes: int = 16 * 1024,
+                 read_timeout: float = 10.0, idle_timeout: float = 60.0):
+        self.host = host
+        self.port = port
+        self.max_body = max_body
+        self.name = name
+        self.max_headers = max_headers
+        self.max_header_bytes = max_header_bytes
+        self.read_timeout = read_timeout
+        self.idle_timeout = idle_timeout
+        self._routes: Dict[Tuple[str, str], Handler] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    def route(self, method: str, path: str, handler: Handler):
+        """Register a handler for an exact method and path"""
+        self._routes[(method.upper(), path)] = handler
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            # Reflect the real port when started on port 0
+            self.port = sockets[0].getsockname()[1]
+        logger.info(f"🌐 {self.name} server listening on {self.host}:{self.port}")
+
+    async def stop(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[HTTPRequest]:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            # Idle keep-alive connection (or a request line trickling in): just close it
+            return None
+        except ValueError:
+            raise HTTPError(414, "request line too long")
+        if not request_line:
+            return None
+
+        try:
+            method, target, _ = request_line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "malformed request line")
+        try:
+            headers, body = await asyncio.wait_for(self._read_headers_and_body(reader), self.read_timeout)
+        except asyncio.TimeoutError:
+            raise HTTPError(408, "request timeout")
+
+        url = urlsplit(target)
+        return HTTPRequest(method.upper(), url.path, parse_qs(url.query), headers, body)
+
+    async def _read_headers_and_body(self, reader: asyncio.StreamReader) -> Tuple[Dict[str, str], bytes]:
+        headers = {}
+        header_bytes = 0
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise HTTPError(431, "header line too long")
+            if line in (b'\r\n', b'\n', b''):
+                break
+            header_bytes += len(line)
+            if len(headers) >= self.max_headers or header_bytes > self.max_header_bytes:
+                raise HTTPError(431, "request headers too large")
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length', '0') or 0)
+        except ValueError:
+            raise HTTPError(400, "invalid content-length")
+        if length < 0:
+            raise HTTPError(400, "invalid content-length")
+        if length > self.max_body:
+            raise HTTPError(413, "payload too large")
+        body = await reader.readexactly(length) if length else b""
+        return headers, body
+
+    async def _dispatch(self, request: HTTPRequest) -> HTTPResponse:
+        handler = self._routes.get((request.method, request.path))
+        if handler is None:
+            if any(path == request.path for _, path in self._routes):
+                return HTTPResponse.text("method not allowed", 405)
+            return HTTPResponse.text("not found", 404)
+        try:
+            return await handler(request)
+        except Exception as e:
+            logger.error(f"Unhandled error serving {request.method} {request.path}: {e}")
+            return HTTPResponse.text("internal error", 500)
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except HTTPError as e:
+                    await self._write(writer, HTTPResponse.text(str(e), e.status), keep_alive=False)
+                    break
+                if request is None:
+                    break
+
+                response = await self._dispatch(request)
+                keep_alive = request.headers.get('connection', '').lower() != 'close'
+                await self._write(writer, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _write(self, writer: asyncio.StreamWriter, response: HTTPResponse, keep_alive: bool):
+        head = [
+            f"HTTP/1.1 {response.status} {STATUS_TEXT.get(response.status, '')}",
+            f"Content-Type: {response.content_type}",
+            f"Content-Length: {len(response.body)}",
+            f"Connection: {'keep-alive' if keep_alive else 'close'}"
+        ]
+        head.extend(f"{name}: {value}" for name, value in response.headers.items())
+        writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + response.body)
+        await writer.drain()
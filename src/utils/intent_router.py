@@ -0,0 +1,197 @@
+"""
+Local intent router: answers cheap queries without calling the LLM
+"""
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from config.config import INTENT_MAX_TOKENS
+from data.jokes import get_random_joke
+from data.trivia import get_random_trivia
+from data.responses import get_time_based_greeting
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"[a-z0-9']+")
+
+# Words that carry no intent of their own ("please tell me a joke")
+FILLER_WORDS = frozenset({
+    'a', 'an', 'the', 'me', 'us', 'please', 'pls', 'plz', 'tell', 'give', 'some',
+    'one', 'another', 'again', 'so', 'very', 'much', 'you', 'to', 'there', 'bot',
+    'cholan', 'ai', 'all', 'everyone', 'friend', 'sir', 'madam', 'dear', 'and', 'oh',
+    'ok', 'okay'
+})
+
+# A negated message means the opposite of its keywords ("not funny", "no jokes")
+NEGATION_WORDS = frozenset({
+    'not', 'no', 'never', 'nothing', 'dont', "don't", 'isnt', "isn't", 'wasnt', "wasn't", 'stop'
+})
+
+@dataclass
+class Intent:
+    name: str
+    handler: Callable[[], str]
+    keywords: Iterable[str] = ()
+    phrases: Iterable[str] = ()
+    min_confidence: float = 0.6
+
+@dataclass
+class _CompiledIntent:
+    intent: Intent
+    keywords: frozenset
+    phrases: List[Tuple[str, ...]] = field(default_factory=list)
+
+def tokenize(text: str) -> List[str]:
+    return _TOKEN_PATTERN.findall(text.lower())
+
+class IntentRouter:
+    """
+    Routes short messages to local handlers using word-level matching
+
+    Confidence is the share of the message's tokens explained by an intent's
+    keywords, phrases and filler words, so "hi" is a greeting but
+    "hi, how do I grow tomatoes?" goes to the model.
+    """
+
+    def __init__(self, intents: Iterable[Intent], max_tokens: int = INTENT_MAX_TOKENS):
+        self.max_tokens = max_tokens
+        self._intents: List[_CompiledIntent] = []
+        # token -> intents it can signal, so only candidate intents are scored
+        self._index: Dict[str, List[int]] = {}
+        for position, intent in enumerate(intents):
+            compiled = _CompiledIntent(
+                intent,
+                frozenset(intent.keywords),
+                [tuple(tokenize(p)) for p in intent.phrases]
+            )
+            self._intents.append(compiled)
+            signal_tokens = set(compiled.keywords) | {p[0] for p in compiled.phrases if p}
+            for token in signal_tokens:
+                self._index.setdefault(token, []).append(position)
+
+        self.stats: Dict[str, int] = {"routed": 0, "llm_calls_avoided": 0}
+
+    def _coverage(self, compiled: _CompiledIntent, tokens: List[str]) -> int:
+        covered = [token in compiled.keywords or token in FILLER_WORDS for token in tokens]
+        for phrase in compiled.phrases:
+            size = len(phrase)
+            for start in range(len(tokens) - size + 1):
+                if tuple(tokens[start:start + size]) == phrase:
+                    covered[start:start + size] = [True] * size
+        return sum(covered)
+
+    def classify(self, text: str) -> Optional[Tuple[str, float]]:
+        """Return (intent name, confidence) for the best local intent, or None"""
+        tokens = tokenize(text)
+        if not tokens or len(tokens) > self.max_tokens:
+            return None
+        if any(token in NEGATION_WORDS for token in tokens):
+            return None
+
+        candidates = {position for token in tokens for position in self._index.get(token, ())}
+        best: Optional[Tuple[str, float]] = None
+        for position in sorted(candidates):
+            compiled = self._intents[position]
+            confidence = self._coverage(compiled, tokens) / len(tokens)
+            if confidence >= compiled.intent.min_confidence and (best is None or confidence > best[1]):
+                best = (compiled.intent.name, confidence)
+        return best
+
+    def route(self, text: str) -> Optional[str]:
+        """Answer locally if a confident intent matches; None means ask the model"""
+        match = self.classify(text)
+        if match is None:
+            return None
+
+        name, confidence = match
+        handler = next(c.intent.handler for c in self._intents if c.intent.name == name)
+        self.stats["routed"] += 1
+        self.stats["llm_calls_avoided"] += 1
+        self.stats[f"intent_{name}"] = self.stats.get(f"intent_{name}", 0) + 1
+        logger.debug("Intent '%s' answered locally (confidence %.2f)", name, confidence)
+        return handler()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get routing counters, including LLM calls avoided"""
+        return dict(self.stats)
+
+# ========== LOCAL HANDLERS ==========
+def _greeting_reply() -> str:
+    greeting = get_time_based_greeting()
+    return f"{greeting}! 🌾 Welcome to Cholan AI! How can I help you with your agricultural needs today?"
+
+def _thanks_reply() -> str:
+    return "You're welcome! 🌱 Happy farming, and ask me anytime you need help with your crops."
+
+def _help_reply() -> str:
+    return (
+        "🌱 Just ask me any farming question, for example \"How do I improve my soil quality?\"\n"
+        "Type /help to see all commands, /joke for a laugh or /trivia for a quiz! 🚜"
+    )
+
+def _joke_reply() -> str:
+    return f"😂 {get_random_joke()}\n\nType /joke for another one! 🌾"
+
+def _trivia_reply() -> str:
+    trivia = get_random_trivia()
+    options = '\n'.join(f"{letter}) {option}" for letter, option in zip("ABCD", trivia['options']))
+    return f"🧠 {trivia['question']}\n\n{options}\n\nType /trivia to answer it as a quiz poll!"
+
+DEFAULT_INTENTS = [
+    Intent(
+        "greeting", _greeting_reply,
+        keywords=('hello', 'hi', 'hey', 'hlo', 'hii', 'hai', 'greetings', 'namaste', 'vanakkam', 'yo'),
+        phrases=('good morning', 'good afternoon', 'good evening', 'good day', 'how are you')
+    ),
+    Intent(
+        "thanks", _thanks_reply,
+        # Bare acknowledgements ("ok", "cool", "nice") are often replies to the
+        # model's question, so they are not thanks on their own
+        keywords=('thanks', 'thank', 'thx', 'ty', 'thankyou'),
+        phrases=('thank you', 'thanks a lot', 'much appreciated')
+    ),
+    Intent(
+        "help", _help_reply,
+        keywords=('help', 'commands', 'menu', 'start', 'usage'),
+        phrases=('what can you do', 'how do i use this', 'how to use', 'who are you')
+    ),
+    Intent(
+        "joke", _joke_reply,
+        keywords=('joke', 'jokes', 'funny', 'laugh'),
+        phrases=('make me laugh',),
+        min_confidence=0.5
+    ),
+    Intent(
+        "trivia", _trivia_reply,
+        # Only "trivia" or "quiz" signal this intent; a bare "question" is how
+        # real farming questions start ("I have a question")
+        keywords=('trivia', 'quiz'),
+        phrases=('trivia question', 'quiz question'),
+        min_confidence=0.5
+    )
+]
+
+# Messages that mention an intent's words but must still reach the model
+NEGATIVE_EXAMPLES = (
+    "hi, how do I grow tomatoes?",
+    "thanks, but why are my leaves yellow?",
+    "help my cows are sick",
+    "I have a question",
+    "one question about my paddy",
+    "a question",
+    "is this joke true about fertilizer prices",
+    "not funny",
+    "that's not funny",
+    "no jokes please",
+    "don't tell me a joke",
+    "ok",
+    "okay",
+    "cool",
+    "nice",
+    "great"
+)
+
+# Global intent router instance
+intent_router = IntentRouter(DEFAULT_INTENTS)
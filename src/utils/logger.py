@@ -2,33 +2,152 @@
 Logging utilities for Cholan AI Bot
 """
 
+import asyncio
+import atexit
+import functools
+import gzip
+import json
 import logging
+import logging.handlers
+import os
+import queue
+import random
+import shutil
 import sys
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Optional
+from typing import Any, Callable, Dict, List, Optional
+from telegram.constants import ParseMode
+from telegram.error import BadRequest
 from telegram.ext import Application
+from telegram.helpers import escape_markdown
 
-from config.config import LOG_LEVEL, LOG_FORMAT, LOG_FILE, CHANNEL_ID, FEATURES
+from config.config import (
+    LOG_LEVEL, LOG_FORMAT, LOG_FILE, LOG_JSON, LOG_MAX_BYTES, LOG_ROTATE_DAILY, LOG_BACKUP_COUNT,
+    LOG_QUEUE_SIZE, CHANNEL_ID, FEATURES,
+    CHANNEL_LOG_QUEUE_SIZE, CHANNEL_LOG_FLUSH_INTERVAL, CHANNEL_LOG_MAX_DIGEST_CHARS,
+    TRACE_EXPORT_FILE, TRACE_SLOW_THRESHOLD, TRACE_SAMPLE_RATE
+)
 
 # Global logger dictionary to avoid duplicate loggers
 _loggers = {}
 
-def setup_logger():
-    """Setup logging configuration for the entire application"""
+# Background writer started by setup_logger
+_queue_handler: Optional["DroppingQueueHandler"] = None
+_listener: Optional[logging.handlers.QueueListener] = None
+
+class CompressingRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotates by size and at midnight, gzipping rotated files (bot.log.1.gz, ...)
     
-    # Create logs directory if it doesn't exist
-    LOG_FILE.parent.mkdir(exist_ok=True)
+    Only ever used behind the QueueListener, so rotation and compression run
+    on the writer thread and never block the event loop.
+    """
     
-    # Configure root logger
-    logging.basicConfig(
-        level=getattr(logging, LOG_LEVEL.upper()),
-        format=LOG_FORMAT,
-        handlers=[
-            logging.FileHandler(LOG_FILE, encoding='utf-8'),
-            logging.StreamHandler(sys.stdout)
-        ]
+    def __init__(self, filename: Path, max_bytes: int = LOG_MAX_BYTES,
+                 backup_count: int = LOG_BACKUP_COUNT, rotate_daily: bool = LOG_ROTATE_DAILY):
+        Path(filename).parent.mkdir(parents=True, exist_ok=True)
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.rotate_daily = rotate_daily
+        self.namer = lambda name: name + ".gz"
+        self.rotator = self._compress
+        # A file left over from an earlier day is rotated on the first record
+        started = os.path.getmtime(filename) if os.path.exists(filename) else time.time()
+        self.rollover_at = self._next_midnight(started)
+    
+    @staticmethod
+    def _next_midnight(timestamp: float) -> float:
+        day = datetime.fromtimestamp(timestamp).date() + timedelta(days=1)
+        return datetime.combine(day, datetime.min.time()).timestamp()
+    
+    @staticmethod
+    def _compress(source: str, dest: str):
+        if not os.path.exists(source):
+            return
+        with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.remove(source)
+    
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self.rotate_daily and time.time() >= self.rollover_at:
+            return True
+        return bool(super().shouldRollover(record))
+    
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_midnight(time.time())
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Hands records to the writer thread; drops them rather than block when it falls behind"""
+    
+    def __init__(self, record_queue: queue.Queue):
+        super().__init__(record_queue)
+        self.dropped = 0
+    
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line; structured helpers add their fields through extra={"event": {...}}"""
+    
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "trace_id": getattr(record, "trace_id", "-"),
+            "message": record.getMessage()
+        }
+        event = getattr(record, "event", None)
+        if event:
+            entry.update(event)
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+def setup_logger(log_file: Path = LOG_FILE):
+    """
+    Setup logging configuration for the entire application
+    
+    Loggers only put records on a bounded queue; a QueueListener thread
+    formats them and writes the rotating log file and the console.
+    """
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+    
+    file_handler = CompressingRotatingFileHandler(log_file)
+    file_handler.setFormatter(JsonLinesFormatter() if LOG_JSON else logging.Formatter(LOG_FORMAT))
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    
+    # Slow traces share the queue but go to their own file only
+    for handler in (file_handler, console_handler):
+        handler.addFilter(lambda record: not getattr(record, "slow_trace", False))
+    
+    _queue_handler = DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    # The trace id lives in a context variable, so it is read before the record leaves the loop thread
+    _queue_handler.addFilter(TraceIdFilter())
+    _listener = logging.handlers.QueueListener(
+        _queue_handler.queue, file_handler, console_handler, SlowTraceFileHandler(trace_exporter)
     )
     
+    # Configure root logger
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(getattr(logging, LOG_LEVEL.upper()))
+    _listener.start()
+    atexit.register(stop_logging)
+    
     # Set specific logger levels
     logging.getLogger("telegram").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
@@ -36,7 +155,20 @@ def setup_logger():
     
     root_logger = logging.getLogger("cholan_ai")
     root_logger.info("📝 Logging system initialized")
-    root_logger.info(f"📁 Log file: {LOG_FILE}")
+    root_logger.info(f"📁 Log file: {log_file}{' (JSON lines)' if LOG_JSON else ''}")
+
+def stop_logging():
+    """Flush queued records and stop the writer thread (also runs at exit)"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def get_logging_stats() -> Dict[str, int]:
+    """Get the writer queue depth and dropped record count"""
+    if _queue_handler is None:
+        return {"queue_depth": 0, "dropped": 0}
+    return {"queue_depth": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
 
 def get_logger(name: str) -> logging.Logger:
     """Get or create a logger with the specified name"""
@@ -47,54 +179,387 @@ def get_logger(name: str) -> logging.Logger:
     
     return _loggers[name]
 
+class ChannelLogPipeline:
+    """Background queue that coalesces channel log events into digest messages"""
+    
+    def __init__(self, max_queue: int = CHANNEL_LOG_QUEUE_SIZE,
+                 flush_interval: float = CHANNEL_LOG_FLUSH_INTERVAL,
+                 max_digest_chars: int = CHANNEL_LOG_MAX_DIGEST_CHARS):
+        self.max_queue = max_queue
+        self.flush_interval = flush_interval
+        self.max_digest_chars = max_digest_chars
+        self._application: Optional[Application] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.stats: Dict[str, int] = {
+            "enqueued": 0,
+            "dropped": 0,
+            "digests_sent": 0,
+            "events_sent": 0,
+            "send_failures": 0
+        }
+    
+    def submit(self, application: Application, message: str) -> bool:
+        """Queue an event without waiting; returns False if it was dropped"""
+        self._application = application
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+        
+        try:
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.stats["dropped"] += 1
+            return False
+        
+        self.stats["enqueued"] += 1
+        return True
+    
+    async def _run(self):
+        """Collect events until the window closes or the digest is full, then send"""
+        loop = asyncio.get_running_loop()
+        while True:
+            first = await self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            size = len(first)
+            deadline = loop.time() + self.flush_interval
+            stopping = False
+            
+            while size < self.max_digest_chars:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    message = await asyncio.wait_for(self._queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+                if message is None:
+                    stopping = True
+                    break
+                batch.append(message)
+                size += len(message) + 2
+            
+            await self._send_digests(batch)
+            if stopping:
+                return
+    
+    def _build_digests(self, batch: List[str]) -> List[List[str]]:
+        """Pack events into as few messages as fit under the size limit (measured escaped)"""
+        digests, current, size = [], [], 0
+        for message in batch:
+            # Escaping at most doubles an event, so it still fits a digest
+            message = message[:self.max_digest_chars // 2]
+            length = len(escape_markdown(message)) + 2
+            if current and size + length > self.max_digest_chars:
+                digests.append(current)
+                current, size = [], 0
+            current.append(message)
+            size += length
+        if current:
+            digests.append(current)
+        return digests
+    
+    async def _send_digests(self, batch: List[str]):
+        # Imported here because the outbound scheduler itself logs through this module
+        from utils.outbound import send_message, PRIORITY_LOG
+        
+        title = "🤖 Cholan AI Log" if len(batch) == 1 else f"🤖 Cholan AI Log ({len(batch)} events)"
+        for events in self._build_digests(batch):
+            # Usernames and message text are user input: escaped, one stray "_" or "*"
+            # cannot make Telegram reject the whole digest
+            markdown = f"*{title}*\n" + "\n\n".join(escape_markdown(event) for event in events)
+            try:
+                try:
+                    await send_message(
+                        self._application.bot, CHANNEL_ID, markdown,
+                        priority=PRIORITY_LOG, parse_mode=ParseMode.MARKDOWN
+                    )
+                except BadRequest:
+                    # Still unparseable: send the same events without formatting
+                    await send_message(
+                        self._application.bot, CHANNEL_ID, f"{title}\n" + "\n\n".join(events),
+                        priority=PRIORITY_LOG
+                    )
+                self.stats["digests_sent"] += 1
+            except Exception as e:
+                self.stats["send_failures"] += 1
+                get_logger(__name__).error(f"Failed to send log to channel: {e}")
+        self.stats["events_sent"] += len(batch)
+    
+    async def stop(self):
+        """Flush queued events (including a batch being collected) and stop the background task"""
+        if self._task is not None and not self._task.done():
+            # The sender finishes its current batch and everything queued ahead of the stop marker
+            await self._queue.put(None)
+            await self._task
+        self._task = None
+        
+        # Anything left behind by a sender that died
+        if self._queue is not None and not self._queue.empty():
+            pending = []
+            while not self._queue.empty():
+                message = self._queue.get_nowait()
+                if message is not None:
+                    pending.append(message)
+            if pending:
+                await self._send_digests(pending)
+    
+    def get_stats(self) -> Dict[str, int]:
+        """Get queue depth and drop/send counters"""
+        return {**self.stats, "queue_depth": self._queue.qsize() if self._queue else 0}
+
+# Global channel log pipeline instance
+channel_log = ChannelLogPipeline()
+
 async def log_to_channel(application: Application, message: str):
-    """Send log message to the configured Telegram channel"""
+    """Queue a log message for the configured Telegram channel (returns immediately)"""
     
     if not FEATURES["enable_logging_to_channel"]:
         return
     
-    try:
-        await application.bot.send_message(
-            chat_id=CHANNEL_ID, 
-            text=f"🤖 **Cholan AI Log**\n{message}",
-            parse_mode="Markdown"
-        )
-    except Exception as e:
-        logger = get_logger(__name__)
-        logger.error(f"Failed to send log to channel: {e}")
+    channel_log.submit(application, message)
+
+class Trace:
+    """Spans recorded for one update, identified by a short trace id"""
+    
+    MAX_SPANS = 256
+    
+    def __init__(self, name: str, parent_trace_id: Optional[str] = None, **attrs: Any):
+        self.trace_id = uuid.uuid4().hex[:16]
+        self.name = name
+        self.attrs = attrs
+        if parent_trace_id:
+            self.attrs["parent_trace_id"] = parent_trace_id
+        self.started_at = time.time()
+        self.started = time.perf_counter()
+        self.duration = 0.0
+        self.ended = False
+        self.spans: List[Dict[str, Any]] = []
+        self.dropped_spans = 0
+    
+    def add_span(self, span: Dict[str, Any]):
+        if len(self.spans) < self.MAX_SPANS:
+            self.spans.append(span)
+        else:
+            self.dropped_spans += 1
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "start": datetime.fromtimestamp(self.started_at).isoformat(),
+            "duration_ms": round(self.duration * 1000, 3),
+            "attrs": self.attrs,
+            "spans": self.spans,
+            "dropped_spans": self.dropped_spans
+        }
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("cholan_trace", default=None)
+_current_span: ContextVar[Optional[str]] = ContextVar("cholan_span", default=None)
+
+def current_trace_id() -> str:
+    """Trace id of the update being processed, or "-" outside of any trace"""
+    trace = _current_trace.get()
+    return trace.trace_id if trace is not None else "-"
+
+class TraceIdFilter(logging.Filter):
+    """Adds %(trace_id)s to every log record"""
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = current_trace_id()
+        return True
+
+class SlowTraceExporter:
+    """
+    Appends sampled slow traces to a JSON lines file
+    
+    Once setup_logger has run, traces are queued for the background log
+    writer like any other record, so the event loop never touches the file.
+    """
+    
+    def __init__(self, path: Path = TRACE_EXPORT_FILE, threshold: float = TRACE_SLOW_THRESHOLD,
+                 sample_rate: float = TRACE_SAMPLE_RATE):
+        self.path = path
+        self.threshold = threshold
+        self.sample_rate = sample_rate
+        self._lock = threading.Lock()
+        self.stats: Dict[str, int] = {"traces": 0, "slow": 0, "exported": 0, "export_errors": 0}
+    
+    def finish(self, trace: Trace):
+        self.stats["traces"] += 1
+        if trace.duration < self.threshold:
+            return
+        self.stats["slow"] += 1
+        if random.random() >= self.sample_rate:
+            return
+        
+        line = json.dumps(trace.to_dict(), ensure_ascii=False, default=str) + "\n"
+        if _queue_handler is not None:
+            # Written by SlowTraceFileHandler on the writer thread; dropped (and counted) if it falls behind
+            _queue_handler.handle(logging.makeLogRecord({
+                "name": "cholan_ai.traces", "levelno": logging.INFO, "levelname": "INFO",
+                "msg": line, "slow_trace": True
+            }))
+        else:
+            # Scripts that never set up logging
+            self.write(line)
+    
+    def write(self, line: str):
+        try:
+            with self._lock:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as file:
+                    file.write(line)
+            self.stats["exported"] += 1
+        except Exception as e:
+            self.stats["export_errors"] += 1
+            # Not logged: on the writer thread a log record would queue behind this one
+            print(f"Failed to export slow trace: {e}", file=sys.stderr)
+    
+    def get_stats(self) -> Dict[str, int]:
+        return dict(self.stats)
+
+class SlowTraceFileHandler(logging.Handler):
+    """Writes the slow traces SlowTraceExporter queued; runs on the log writer thread"""
+    
+    def __init__(self, exporter: SlowTraceExporter):
+        super().__init__()
+        self.exporter = exporter
+        self.addFilter(lambda record: getattr(record, "slow_trace", False))
+    
+    def emit(self, record: logging.LogRecord):
+        self.exporter.write(record.getMessage())
+
+# Global slow trace exporter instance
+trace_exporter = SlowTraceExporter()
 
 class BotLogger:
-    """Context manager for bot operation logging"""
+    """
+    Context manager for bot operation logging and tracing
+    
+    Each block is a span timed with perf_counter. The outermost block of an
+    update starts a trace whose id is carried by a context variable through
+    handlers, moderation and the AI handler (including tasks they create)
+    and added to every log line. Slow traces are exported by trace_exporter.
+    Works with both `with` and `async with`.
+    """
     
-    def __init__(self, logger: logging.Logger, operation: str):
+    def __init__(self, logger: logging.Logger, operation: str, **attrs: Any):
         self.logger = logger
         self.operation = operation
+        self.attrs = attrs
+        self.trace: Optional[Trace] = None
+        self._owns_trace = False
+        self._trace_token = None
+        self._span_token = None
+        self._parent: Optional[str] = None
+        self._started = 0.0
     
     def __enter__(self):
-        self.logger.info(f"🔄 Starting: {self.operation}")
+        trace = _current_trace.get()
+        if trace is None or trace.ended:
+            # Work scheduled by a finished update (e.g. a debounced answer) gets its own trace
+            parent_id = trace.trace_id if trace is not None else None
+            trace = Trace(self.operation, parent_trace_id=parent_id, **self.attrs)
+            self._trace_token = _current_trace.set(trace)
+            self._owns_trace = True
+        self.trace = trace
+        self._parent = None if self._owns_trace else _current_span.get()
+        self._span_token = _current_span.set(self.operation)
+        self.logger.debug("🔄 Starting: %s", self.operation)
+        self._started = time.perf_counter()
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
+        finished = time.perf_counter()
+        duration_ms = (finished - self._started) * 1000
+        span = {
+            "name": self.operation,
+            "parent": self._parent,
+            "offset_ms": round((self._started - self.trace.started) * 1000, 3),
+            "duration_ms": round(duration_ms, 3)
+        }
+        if self.attrs and not self._owns_trace:
+            span["attrs"] = self.attrs
+        if exc_type is not None:
+            span["error"] = f"{exc_type.__name__}: {exc_val}"
+        self.trace.add_span(span)
+        
         if exc_type is None:
-            self.logger.info(f"✅ Completed: {self.operation}")
-        else:
-            self.logger.error(f"❌ Failed: {self.operation} - {exc_val}")
+            self.logger.debug("✅ Completed: %s (%.1f ms)", self.operation, duration_ms)
+        elif exc_type is not asyncio.CancelledError:
+            self.logger.error("❌ Failed: %s - %s (%.1f ms)", self.operation, exc_val, duration_ms)
+        
+        _current_span.reset(self._span_token)
+        if self._owns_trace:
+            self.trace.duration = finished - self.trace.started
+            self.trace.ended = True
+            _current_trace.reset(self._trace_token)
+            trace_exporter.finish(self.trace)
+        return False
+    
+    async def __aenter__(self):
+        return self.__enter__()
+    
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return self.__exit__(exc_type, exc_val, exc_tb)
+
+def traced(operation: Optional[str] = None):
+    """Decorator that runs a function (sync or async) inside a BotLogger span"""
+    
+    def decorator(func: Callable):
+        name = operation or func.__qualname__
+        span_logger = get_logger(func.__module__)
+        
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with BotLogger(span_logger, name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with BotLogger(span_logger, name):
+                return func(*args, **kwargs)
+        return wrapper
+    
+    return decorator
 
-# Convenience function for structured logging
+# Convenience functions for structured logging; with LOG_JSON the fields
+# become JSON keys. Nothing is built when the level is disabled.
 def log_user_action(logger: logging.Logger, username: str, action: str, details: str = ""):
     """Log user actions in a structured format"""
-    log_message = f"👤 User @{username} - {action}"
-    if details:
-        log_message += f" | {details}"
-    logger.info(log_message)
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(
+        "👤 User @%s - %s%s", username, action, f" | {details}" if details else "",
+        extra={"event": {"event": "user_action", "username": username, "action": action, "details": details}}
+    )
 
 def log_ai_interaction(logger: logging.Logger, username: str, query: str, response_length: int):
     """Log AI interactions"""
-    logger.info(f"🤖 AI Response for @{username} - Query: {query[:50]}... Response: {response_length} chars")
+    if not logger.isEnabledFor(logging.INFO):
+        return
+    logger.info(
+        "🤖 AI Response for @%s - Query: %.50s... Response: %d chars", username, query, response_length,
+        extra={"event": {
+            "event": "ai_interaction", "username": username,
+            "query": query[:200], "response_length": response_length
+        }}
+    )
 
 def log_moderation_action(logger: logging.Logger, username: str, action: str, reason: str):
     """Log moderation actions"""
-    logger.warning(f"⚠️ Moderation - @{username} - {action} - Reason: {reason}")
+    if not logger.isEnabledFor(logging.WARNING):
+        return
+    logger.warning(
+        "⚠️ Moderation - @%s - %s - Reason: %s", username, action, reason,
+        extra={"event": {"event": "moderation", "username": username, "action": action, "reason": reason}}
+    )
 
 # Export commonly used logger instances
 main_logger = get_logger("main")
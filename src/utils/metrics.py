@@ -0,0 +1,267 @@
+"""
+In-process metrics (counters, gauges, histograms) with a Prometheus text endpoint
+"""
+
+import time
+from bisect import bisect_left
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from config.config import METRICS_LISTEN, METRICS_PORT
+from utils.logger import get_logger
+from utils.http_server import HTTPServer, HTTPResponse
+
+logger = get_logger(__name__)
+
+# Seconds; covers a sub-millisecond moderation check up to a slow Gemini call
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+class _Timer:
+    """Context manager that observes elapsed perf_counter seconds into a histogram child"""
+
+    __slots__ = ("_child", "_started")
+
+    def __init__(self, child: "_HistogramChild"):
+        self._child = child
+
+    def __enter__(self):
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._child.observe(time.perf_counter() - self._started)
+        return False
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+class _GaugeChild(_CounterChild):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+    def dec(self, amount: float = 1.0):
+        self.value -= amount
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        # One slot per bucket plus +Inf; cumulated only when rendered
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        return _Timer(self)
+
+class _Metric:
+    """Shared label handling; children are cached so the hot path is a dict lookup"""
+
+    type_name = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._default = self._children[()] = self._new_child()
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name} expects labels {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}"]
+        for values, child in self._children.items():
+            lines.extend(self._render_child(values, child))
+        return lines
+
+    def _render_child(self, values: Tuple[str, ...], child) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"]
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0):
+        self._default.value += amount
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._function: Optional[Callable[[], float]] = None
+
+    def _new_child(self):
+        return _GaugeChild()
+
+    def set(self, value: float):
+        self._default.value = value
+
+    def set_function(self, function: Callable[[], float]):
+        """Read the value from function at scrape time instead of tracking it"""
+        self._function = function
+
+    def render(self) -> List[str]:
+        if self._function is not None:
+            try:
+                self._default.value = self._function()
+            except Exception as e:
+                logger.debug("Gauge %s callback failed: %s", self.name, e)
+        return super().render()
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames)
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float):
+        self._default.observe(value)
+
+    def time(self) -> _Timer:
+        return _Timer(self._default)
+
+    def _render_child(self, values: Tuple[str, ...], child: _HistogramChild) -> List[str]:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, values, f'le="{_format_value(bound)}"')
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, values)
+        lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+        lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+class MetricsRegistry:
+    """Holds every metric plus stats collectors and renders the text exposition format"""
+
+    def __init__(self, namespace: str = "cholan"):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(f"{self.namespace}_{name}", documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._register(Histogram(f"{self.namespace}_{name}", documentation, labelnames, buckets))
+
+    def register_stats(self, subsystem: str, get_stats: Callable[[], Dict[str, Any]]):
+        """Export the numeric values of a component's get_stats() dict as gauges at scrape time"""
+        self._collectors[subsystem] = get_stats
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+
+        for subsystem, get_stats in self._collectors.items():
+            try:
+                stats = get_stats()
+            except Exception as e:
+                logger.debug("Stats collector %s failed: %s", subsystem, e)
+                continue
+            for key, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                name = f"{self.namespace}_{subsystem}_{key}"
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+# Global metrics registry
+registry = MetricsRegistry()
+
+# ========== HOT-PATH METRICS ==========
+MESSAGE_STAGE_SECONDS = registry.histogram(
+    "message_stage_seconds", "Time spent in each handle_message stage", ("stage",)
+)
+COMMANDS_TOTAL = registry.counter("commands_total", "Bot commands handled", ("command",))
+GEMINI_CALLS_TOTAL = registry.counter("gemini_calls_total", "Gemini calls by outcome", ("outcome",))
+MODERATION_EVENTS_TOTAL = registry.counter("moderation_events_total", "Moderation events", ("event",))
+
+class MetricsEndpoint:
+    """Serves GET /metrics (and other operational routes) from the embedded HTTP server on a local port"""
+
+    def __init__(self, host: str = METRICS_LISTEN, port: int = METRICS_PORT):
+        self.host = host
+        self.port = port
+        self.server = None
+        self._routes: Dict[Tuple[str, str], Callable] = {}
+
+    def route(self, method: str, path: str, handler: Callable):
+        """Serve another endpoint next to /metrics (registered before start())"""
+        self._routes[(method, path)] = handler
+
+    async def start(self):
+        """Start serving (a port of 0 disables the endpoint)"""
+        if not self.port or self.server is not None:
+            return
+        async def handle_metrics(request):
+            return HTTPResponse.text(registry.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+        self.server = HTTPServer(self.host, self.port, name="metrics")
+        self.server.route("GET", "/metrics", handle_metrics)
+        for (method, path), handler in self._routes.items():
+            self.server.route(method, path, handler)
+        await self.server.start()
+
+    async def stop(self):
+        if self.server is not None:
+            await self.server.stop()
+            self.server = None
+
+# Global metrics endpoint instance
+metrics_endpoint = MetricsEndpoint()
@@ -2,18 +2,23 @@
 Content moderation and user management utilities
 """
 
-import json
-from typing import Dict, Optional, Any
+import asyncio
+import re
+from typing import Dict, List, Optional, Any, Iterable
 from datetime import datetime, timedelta
 
-from config.config import MAX_WARNINGS, USER_DATA_FILE, ERROR_MESSAGES
-from utils.logger import get_logger, log_moderation_action
+from config.config import MAX_WARNINGS, ERROR_MESSAGES
+from utils.logger import get_logger, log_moderation_action, traced
+from utils.moderation_store import SQLiteModerationStore
+from utils.metrics import MODERATION_EVENTS_TOTAL
 
 logger = get_logger(__name__)
 
-# In-memory storage for warnings (will be persisted to file)
-user_warnings: Dict[int, int] = {}
-banned_users: Dict[int, datetime] = {}
+# Warnings and bans live in SQLite, shared by every worker process. The
+# database is opened by the startup warm-up (or on first use), not on import.
+# Store calls block on disk and the store lock, so the async API below runs
+# them in a thread and never on the event loop
+_store = SQLiteModerationStore()
 
 # Banned words list
 BANNED_WORDS = [
@@ -29,61 +34,142 @@ VIOLATION_SEVERITY = {
     'severe': 3     # Hate speech, extreme language
 }
 
+# Character substitutions commonly used to slip past the filter ("sh1t", "@ss")
+LEETSPEAK_MAP = str.maketrans({
+    '0': 'o', '1': 'i', '!': 'i', '3': 'e', '4': 'a', '@': 'a',
+    '5': 's', '$': 's', '7': 't', '+': 't', '8': 'b'
+})
+
+# Inflections that still count as the banned word ("crappy", "idiots", "damned")
+BANNED_WORD_SUFFIXES = ('ing', 'ers', 'es', 'ed', 'er', 'in', 's', 'y')
+
+_REPEATED_CHARS = re.compile(r'(.)\1+')
+# Word-like tokens, including the symbols leetspeak uses in place of letters
+_TOKEN_PATTERN = re.compile(r'[\w@$!+]+')
+# A match must not start or end inside a word ("hell" in "shell")
+_NOT_WORD = r'[^\w@$]'
+_WORD_END = r'(?![\w@$])'
+
+# Letter -> the letter and the symbols that stand in for it
+_LETTER_VARIANTS: Dict[str, str] = {}
+for _symbol, _letter in LEETSPEAK_MAP.items():
+    _LETTER_VARIANTS[_letter] = _LETTER_VARIANTS.get(_letter, _letter) + chr(_symbol)
+
+def normalize_for_moderation(text: str) -> str:
+    """Lowercase, undo leetspeak and collapse repeated letters ("fuuuck" -> "fuck")"""
+    # "!" and "+" only stand in for letters inside a word; elsewhere they are punctuation
+    words = (token.strip('!+') for token in _TOKEN_PATTERN.findall(text.lower()))
+    return ' '.join(_REPEATED_CHARS.sub(r'\1', word.translate(LEETSPEAK_MAP)) for word in words if word)
+
+def _char_pattern(char: str) -> str:
+    """One normalized character: any of its leetspeak forms, repeated ("fuuu", "sh1t")"""
+    if char == ' ':
+        # Words of a multi-word entry may be separated by any punctuation
+        return r'[^\w@$]+'
+    variants = _LETTER_VARIANTS.get(char, char)
+    if len(variants) == 1:
+        return re.escape(char) + '+'
+    return '[' + ''.join(re.escape(variant) for variant in variants) + ']+'
+
+def _alternation(words: Iterable[str]) -> str:
+    """Regex matching any of the normalized words, prefix-factored so shared prefixes are tried once"""
+    trie: Dict[str, Any] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, Any]) -> str:
+        branches = [_char_pattern(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+    return build(trie)
+
+class BannedWordMatcher:
+    """
+    One precompiled regex for the whole banned words list
+
+    Every entry is compiled into a single prefix-factored alternation that
+    accepts leetspeak, repeated letters and the usual inflections, anchored at
+    word boundaries. Scanning runs in the regex engine with no per-token
+    state, so unseen or attacker-chosen words cost the same as common ones;
+    only matches are mapped back to the entry in Python.
+    """
+
+    def __init__(self, words: Iterable[str]):
+        self.words = tuple(words)
+        # Normalized form -> word as listed, so violations report the original entry
+        self._canonical: Dict[str, str] = {}
+        for word in self.words:
+            normalized = normalize_for_moderation(word)
+            if normalized:
+                self._canonical.setdefault(normalized, word)
+
+        self._pattern = None
+        if self._canonical:
+            first_chars = {variant for word in self._canonical for variant in _LETTER_VARIANTS.get(word[0], word[0])}
+            # Starting on the separator before a word (rather than a lookbehind) lets the
+            # engine skip ahead to separators; the lookahead rejects most words on one char
+            self._pattern = re.compile(
+                _NOT_WORD + '(?=[' + ''.join(re.escape(char) for char in sorted(first_chars)) + '])'
+                + '(' + _alternation(self._canonical)
+                + '(?:' + _alternation(BANNED_WORD_SUFFIXES) + ')?)' + _WORD_END
+            )
+
+    def _resolve(self, matched: str) -> Optional[str]:
+        """Map matched text ("Sh1ttt", "idiots") to the banned word it spells"""
+        normalized = normalize_for_moderation(matched)
+        word = self._canonical.get(normalized)
+        if word is None:
+            for suffix in BANNED_WORD_SUFFIXES:
+                if normalized.endswith(suffix):
+                    word = self._canonical.get(normalized[:-len(suffix)])
+                    if word is not None:
+                        break
+        return word
+
+    def find(self, text: str) -> List[str]:
+        """Return the banned words present in text, in order of first appearance"""
+        violations = []
+        if self._pattern is None:
+            return violations
+        # The leading space gives a word at the very start its separator
+        for match in self._pattern.finditer(' ' + text.lower()):
+            word = self._resolve(match.group(1))
+            if word is not None and word not in violations:
+                violations.append(word)
+        return violations
+
+_matcher = BannedWordMatcher(BANNED_WORDS)
+
+def _rebuild_matcher():
+    """Recompile the matcher after the banned words list changes"""
+    global _matcher
+    _matcher = BannedWordMatcher(BANNED_WORDS)
+
+def find_banned_words(text: str) -> List[str]:
+    """Find banned words in text (word boundaries, leetspeak and repeated letters handled)"""
+    return _matcher.find(text)
+
 def load_user_data():
-    """Load user data from persistent storage"""
-    global user_warnings, banned_users
-    
-    try:
-        if USER_DATA_FILE.exists():
-            with open(USER_DATA_FILE, 'r', encoding='utf-8') as file:
-                data = json.load(file)
-                
-                user_warnings = {int(k): v for k, v in data.get('warnings', {}).items()}
-                
-                # Convert banned users timestamps back to datetime
-                banned_data = data.get('banned', {})
-                banned_users = {}
-                for user_id, timestamp in banned_data.items():
-                    banned_users[int(user_id)] = datetime.fromisoformat(timestamp)
-                
-                logger.info(f"📚 Loaded user data: {len(user_warnings)} warnings, {len(banned_users)} banned users")
-        else:
-            logger.info("📚 No existing user data file found, starting fresh")
-            
-    except Exception as e:
-        logger.error(f"❌ Failed to load user data: {e}")
-
-def save_user_data():
-    """Save user data to persistent storage"""
-    try:
-        # Convert banned users timestamps to strings for JSON serialization
-        banned_data = {str(k): v.isoformat() for k, v in banned_users.items()}
-        
-        data = {
-            'warnings': {str(k): v for k, v in user_warnings.items()},
-            'banned': banned_data,
-            'last_updated': datetime.now().isoformat()
-        }
-        
-        USER_DATA_FILE.parent.mkdir(exist_ok=True)
-        with open(USER_DATA_FILE, 'w', encoding='utf-8') as file:
-            json.dump(data, file, indent=2, ensure_ascii=False)
-            
-        logger.debug("💾 User data saved successfully")
-        
-    except Exception as e:
-        logger.error(f"❌ Failed to save user data: {e}")
+    """Open the moderation database (blocking; startup runs it off the event loop)"""
+    _store.load()
+
+def check_storage_writable():
+    """Raise if warnings and bans cannot be saved right now (blocking; used by the health monitor)"""
+    _store.check_writable()
 
-def check_banned_user(user_id: int) -> bool:
+@traced("moderation.check_banned_user")
+async def check_banned_user(user_id: int) -> bool:
     """Check if user is currently banned"""
-    if user_id in banned_users:
-        ban_time = banned_users[user_id]
-        # Check if ban has expired (optional: implement temporary bans)
-        # For now, bans are permanent until manually removed
-        return True
-    return False
+    # Bans are permanent until manually removed
+    return await asyncio.to_thread(_store.is_banned, user_id)
 
-def check_banned_words(user_id: int, text: str) -> Optional[Dict[str, Any]]:
+@traced("moderation.check_banned_words")
+async def check_banned_words(user_id: int, text: str) -> Optional[Dict[str, Any]]:
     """
     Check message for banned words and handle warnings
     
@@ -91,14 +177,10 @@ def check_banned_words(user_id: int, text: str) -> Optional[Dict[str, Any]]:
         Dict with message and log_message if violation found, None otherwise
     """
     
-    text_lower = text.lower()
     username = f"user_{user_id}"  # Fallback if username not available
     
-    # Check for banned words
-    violations = []
-    for word in BANNED_WORDS:
-        if word in text_lower:
-            violations.append(word)
+    # Check for banned words; clean text returns without touching the store
+    violations = find_banned_words(text)
     
     if not violations:
         return None
@@ -107,13 +189,10 @@ def check_banned_words(user_id: int, text: str) -> Optional[Dict[str, Any]]:
     severity = _determine_violation_severity(violations)
     warning_increment = VIOLATION_SEVERITY.get(severity, 1)
     
-    # Update warnings
-    current_warnings = user_warnings.get(user_id, 0)
-    new_warnings = current_warnings + warning_increment
-    user_warnings[user_id] = new_warnings
-    
-    # Save data
-    save_user_data()
+    # Update warnings (and ban at the threshold) in a single transaction
+    new_warnings, banned = await asyncio.to_thread(
+        _store.record_violation, user_id, warning_increment, MAX_WARNINGS
+    )
     
     # Log the violation
     violation_text = ', '.join(violations)
@@ -124,11 +203,11 @@ def check_banned_words(user_id: int, text: str) -> Optional[Dict[str, Any]]:
         f"Banned words: {violation_text}"
     )
     
+    MODERATION_EVENTS_TOTAL.labels(f"violation_{severity}").inc()
+    
     # Check if user should be banned
-    if new_warnings >= MAX_WARNINGS:
-        banned_users[user_id] = datetime.now()
-        save_user_data()
-        
+    if banned:
+        MODERATION_EVENTS_TOTAL.labels("ban").inc()
         log_moderation_action(
             logger, 
             username, 
@@ -160,10 +239,10 @@ def _determine_violation_severity(violations: list) -> str:
     else:
         return 'mild'
 
-def reset_user_warnings(user_id: int):
+async def reset_user_warnings(user_id: int):
     """Reset warnings for a specific user"""
-    user_warnings[user_id] = 0
-    save_user_data()
+    await asyncio.to_thread(_store.set_warnings, user_id, 0)
+    MODERATION_EVENTS_TOTAL.labels("warnings_reset").inc()
     
     log_moderation_action(
         logger, 
@@ -172,12 +251,10 @@ def reset_user_warnings(user_id: int):
         "Manual reset requested"
     )
 
-def unban_user(user_id: int) -> bool:
+async def unban_user(user_id: int) -> bool:
     """Unban a user (admin function)"""
-    if user_id in banned_users:
-        del banned_users[user_id]
-        save_user_data()
-        
+    if await asyncio.to_thread(_store.unban, user_id):
+        MODERATION_EVENTS_TOTAL.labels("unban").inc()
         log_moderation_action(
             logger, 
             f"user_{user_id}", 
@@ -187,32 +264,32 @@ def unban_user(user_id: int) -> bool:
         return True
     return False
 
-def get_user_warnings(user_id: int) -> int:
+async def get_user_warnings(user_id: int) -> int:
     """Get current warning count for user"""
-    return user_warnings.get(user_id, 0)
+    return await asyncio.to_thread(_store.get_warnings, user_id)
 
-def get_moderation_stats() -> Dict[str, Any]:
+async def get_moderation_stats() -> Dict[str, Any]:
     """Get moderation statistics"""
+    warnings = await asyncio.to_thread(_store.all_warnings)
     return {
-        'total_users_with_warnings': len([w for w in user_warnings.values() if w > 0]),
-        'total_banned_users': len(banned_users),
-        'average_warnings': sum(user_warnings.values()) / len(user_warnings) if user_warnings else 0,
-        'users_near_ban': len([w for w in user_warnings.values() if w >= MAX_WARNINGS - 1])
+        'total_users_with_warnings': len([w for w in warnings if w > 0]),
+        'total_banned_users': await asyncio.to_thread(_store.banned_count),
+        'average_warnings': sum(warnings) / len(warnings) if warnings else 0,
+        'users_near_ban': len([w for w in warnings if w >= MAX_WARNINGS - 1])
     }
 
 def add_banned_word(word: str):
     """Add a word to the banned words list"""
     if word.lower() not in BANNED_WORDS:
         BANNED_WORDS.append(word.lower())
+        _rebuild_matcher()
         logger.info(f"🚫 Added banned word: {word}")
 
 def remove_banned_word(word: str) -> bool:
     """Remove a word from the banned words list"""
     if word.lower() in BANNED_WORDS:
         BANNED_WORDS.remove(word.lower())
+        _rebuild_matcher()
         logger.info(f"✅ Removed banned word: {word}")
         return True
     return False
-
-# Initialize user data on module import
-load_user_data()
@@ -0,0 +1,198 @@
+"""
+SQLite storage for moderation state (warnings and bans)
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from config.config import USER_DATA_FILE, MODERATION_DB_FILE
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class SQLiteModerationStore:
+    """
+    Transactional SQLite (WAL mode) store for warnings and bans
+
+    Every event is a single-row upsert committed on its own, so a write costs
+    O(1) regardless of how many users exist and a crash can never leave a
+    half-written file. The database is shared by every worker process on the host.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS warnings (
+            user_id INTEGER PRIMARY KEY,
+            count INTEGER NOT NULL DEFAULT 0,
+            updated_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS bans (
+            user_id INTEGER PRIMARY KEY,
+            banned_at TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS health_checks (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            checked_at TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path: Path = MODERATION_DB_FILE, legacy_json: Path = USER_DATA_FILE):
+        self.path = path
+        self.legacy_json = legacy_json
+        self._conn: sqlite3.Connection = None
+        self._lock = threading.Lock()
+        self._open_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._conn is not None
+
+    def load(self):
+        """Open the database, make sure the schema exists and import legacy JSON data"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode; multi-statement updates use explicit transactions
+        conn = sqlite3.connect(str(self.path), timeout=5.0, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        # WAL + NORMAL: commits survive process crashes without an fsync per event
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(self.SCHEMA)
+        self._conn = conn
+
+        if self.legacy_json.exists():
+            self.migrate_from_json(self.legacy_json)
+
+        logger.info(f"📚 Moderation database ready: {self.path.name} ({self.banned_count()} banned users)")
+
+    @contextmanager
+    def _connection(self):
+        """The connection under the lock; the database is opened on first use if startup has not"""
+        if self._conn is None:
+            with self._open_lock:
+                if self._conn is None:
+                    self.load()
+        with self._lock:
+            yield self._conn
+
+    @contextmanager
+    def _transaction(self):
+        """Run statements in one IMMEDIATE transaction (serialized across processes)"""
+        with self._connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    def migrate_from_json(self, path: Path) -> bool:
+        """
+        Import warnings and bans from the old user_data.json file
+
+        The import and the rename to *.migrated happen inside one IMMEDIATE
+        transaction, so when several processes start at once exactly one imports
+        the file and the others find it already gone.
+        """
+        with self._transaction() as conn:
+            try:
+                with open(path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except FileNotFoundError:
+                # Another process migrated it while we waited for the transaction
+                return False
+            except Exception as e:
+                logger.error(f"❌ Failed to read legacy user data for migration: {e}")
+                return False
+
+            now = datetime.now().isoformat()
+            warnings = [(int(k), int(v), now) for k, v in data.get('warnings', {}).items()]
+            bans = [(int(k), v) for k, v in data.get('banned', {}).items()]
+
+            # Existing rows win: the database is newer than any leftover JSON
+            conn.executemany(
+                "INSERT OR IGNORE INTO warnings (user_id, count, updated_at) VALUES (?, ?, ?)", warnings
+            )
+            conn.executemany("INSERT OR IGNORE INTO bans (user_id, banned_at) VALUES (?, ?)", bans)
+            os.replace(path, path.with_name(path.name + '.migrated'))
+
+        logger.info(f"📦 Migrated {len(warnings)} warnings and {len(bans)} bans from {path.name}")
+        return True
+
+    def check_writable(self):
+        """Commit a one-row write; raises when the database cannot be written (read-only, disk full, locked)"""
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO health_checks (id, checked_at) VALUES (1, ?)", (datetime.now().isoformat(),)
+            )
+
+    def _query_one(self, sql: str, params: tuple = ()):
+        with self._connection() as conn:
+            return conn.execute(sql, params).fetchone()
+
+    def get_warnings(self, user_id: int) -> int:
+        row = self._query_one("SELECT count FROM warnings WHERE user_id = ?", (user_id,))
+        return row[0] if row else 0
+
+    def add_warnings(self, user_id: int, amount: int) -> int:
+        """Atomically increment a user's warnings; safe across processes"""
+        count, _ = self.record_violation(user_id, amount, ban_threshold=None)
+        return count
+
+    def record_violation(self, user_id: int, amount: int,
+                         ban_threshold: Optional[int]) -> Tuple[int, bool]:
+        """
+        Add warnings and, if the threshold is reached, ban, in one transaction
+
+        Returns:
+            (new warning count, whether the user is now banned)
+        """
+        now = datetime.now()
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO warnings (user_id, count, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET count = count + excluded.count, updated_at = excluded.updated_at",
+                (user_id, amount, now.isoformat())
+            )
+            count = conn.execute("SELECT count FROM warnings WHERE user_id = ?", (user_id,)).fetchone()[0]
+            banned = ban_threshold is not None and count >= ban_threshold
+            if banned:
+                conn.execute(
+                    "INSERT OR REPLACE INTO bans (user_id, banned_at) VALUES (?, ?)",
+                    (user_id, now.isoformat())
+                )
+        return count, banned
+
+    def set_warnings(self, user_id: int, count: int):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO warnings (user_id, count, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET count = excluded.count, updated_at = excluded.updated_at",
+                (user_id, count, datetime.now().isoformat())
+            )
+
+    def is_banned(self, user_id: int) -> bool:
+        return self._query_one("SELECT 1 FROM bans WHERE user_id = ?", (user_id,)) is not None
+
+    def ban(self, user_id: int, when: datetime):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO bans (user_id, banned_at) VALUES (?, ?)",
+                (user_id, when.isoformat())
+            )
+
+    def unban(self, user_id: int) -> bool:
+        with self._connection() as conn:
+            cursor = conn.execute("DELETE FROM bans WHERE user_id = ?", (user_id,))
+        return cursor.rowcount > 0
+
+    def all_warnings(self) -> List[int]:
+        with self._connection() as conn:
+            return [row[0] for row in conn.execute("SELECT count FROM warnings")]
+
+    def banned_count(self) -> int:
+        return self._query_one("SELECT COUNT(*) FROM bans")[0]
@@ -0,0 +1,284 @@
+"""
+Outbound Telegram send scheduler with global and per-chat rate limiting
+"""
+
+import asyncio
+import bisect
+import itertools
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+from telegram.error import BadRequest, NetworkError, RetryAfter, TelegramError
+
+from config.config import (
+    OUTBOUND_GLOBAL_RATE, OUTBOUND_GLOBAL_BURST,
+    OUTBOUND_CHAT_RATE, OUTBOUND_CHAT_BURST, OUTBOUND_MAX_RETRIES
+)
+from utils.health import health_monitor
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Lower value is sent first
+PRIORITY_USER = 0
+PRIORITY_LOG = 10
+
+class TokenBucket:
+    """Classic token bucket; refills continuously at `rate` tokens per second"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def try_acquire(self, now: Optional[float] = None) -> float:
+        """Take a token; returns 0 on success, otherwise seconds until one is available"""
+        now = time.monotonic() if now is None else now
+        self._refill(now)
+        if now < self.updated:
+            # Still inside a penalty window
+            return self.updated - now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def penalize(self, seconds: float):
+        """Empty the bucket and block it for `seconds` (used for Telegram retry_after)"""
+        self.tokens = 0
+        self.updated = max(self.updated, time.monotonic() + seconds)
+
+    def is_idle(self, now: float) -> bool:
+        """True when the bucket would be full, i.e. it carries no state worth keeping"""
+        self._refill(now)
+        return now >= self.updated and self.tokens >= self.capacity
+
+@dataclass
+class _Job:
+    send: Callable[[], Awaitable[Any]]
+    chat_id: Optional[Hashable]
+    priority: int
+    future: asyncio.Future
+    sequence: int = 0
+    attempts: int = 0
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+class OutboundScheduler:
+    """Priority queue of outgoing Bot API calls, drained under token-bucket limits"""
+
+    MAX_IDLE_BUCKETS = 10000
+
+    def __init__(self, global_rate: float = OUTBOUND_GLOBAL_RATE, global_burst: float = OUTBOUND_GLOBAL_BURST,
+                 chat_rate: float = OUTBOUND_CHAT_RATE, chat_burst: float = OUTBOUND_CHAT_BURST,
+                 max_retries: int = OUTBOUND_MAX_RETRIES):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self._global_bucket = TokenBucket(global_rate, global_burst)
+        self._chat_buckets: Dict[Hashable, TokenBucket] = {}
+        self._queue: Optional[asyncio.PriorityQueue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._sequence = itertools.count()
+        # Per chat, jobs waiting (in sequence order) behind one that was deferred
+        self._parked: Dict[Hashable, List[Tuple[int, _Job]]] = {}
+        self._pending_by_priority: Dict[int, int] = {}
+        self.stats: Dict[str, int] = {
+            "submitted": 0,
+            "sent": 0,
+            "failed": 0,
+            "retries": 0,
+            "deferred": 0,
+            "in_flight": 0,
+            "deferred_now": 0
+        }
+
+    def split_budget(self, shares: int):
+        """
+        Keep 1/shares of the Telegram limits, for one of several processes sending with the same token
+
+        Call before anything is sent. Bursts never drop below one message,
+        so every process can still send.
+        """
+        global_bucket = self._global_bucket
+        self._global_bucket = TokenBucket(global_bucket.rate / shares, max(1.0, global_bucket.capacity / shares))
+        self.chat_rate /= shares
+        self.chat_burst = max(1.0, self.chat_burst / shares)
+        self._chat_buckets.clear()
+
+    def _ensure_started(self):
+        if self._dispatcher is None or self._dispatcher.done():
+            self._queue = self._queue or asyncio.PriorityQueue()
+            self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+
+    def enqueue(self, send: Callable[[], Awaitable[Any]], chat_id: Optional[Hashable] = None,
+                priority: int = PRIORITY_USER) -> asyncio.Future:
+        """Queue a Bot API call and return a future for its result"""
+        self._ensure_started()
+        job = _Job(send, chat_id, priority, asyncio.get_running_loop().create_future(), next(self._sequence))
+        self.stats["submitted"] += 1
+        self._pending_by_priority[priority] = self._pending_by_priority.get(priority, 0) + 1
+        self._put(job)
+        return job.future
+
+    async def submit(self, send: Callable[[], Awaitable[Any]], chat_id: Optional[Hashable] = None,
+                     priority: int = PRIORITY_USER) -> Any:
+        """Queue a Bot API call and wait for its result"""
+        return await self.enqueue(send, chat_id, priority)
+
+    def _put(self, job: _Job):
+        # A job keeps its sequence when requeued, so it stays ahead of later ones
+        self._queue.put_nowait((job.priority, job.sequence, job))
+
+    def _park(self, job: _Job) -> bool:
+        """Hold the job behind its chat's deferred jobs; True if the chat had none yet"""
+        parked = self._parked.setdefault(job.chat_id, [])
+        bisect.insort(parked, (job.sequence, job))
+        self.stats["deferred_now"] += 1
+        return len(parked) == 1
+
+    def _defer(self, job: _Job, delay: float):
+        self.stats["deferred"] += 1
+        if job.chat_id is None:
+            self.stats["deferred_now"] += 1
+
+            def requeue():
+                self.stats["deferred_now"] -= 1
+                self._put(job)
+
+            asyncio.get_running_loop().call_later(delay, requeue)
+            return
+
+        if self._park(job):
+            asyncio.get_running_loop().call_later(delay, self._release, job.chat_id)
+
+    def _release(self, chat_id: Hashable):
+        """Requeue a chat's parked jobs together; they leave the queue in their original order"""
+        for _, job in self._parked.pop(chat_id, ()):
+            self.stats["deferred_now"] -= 1
+            self._put(job)
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_IDLE_BUCKETS:
+                now = time.monotonic()
+                self._chat_buckets = {k: b for k, b in self._chat_buckets.items() if not b.is_idle(now)}
+            bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _dispatch(self):
+        """Pop jobs in priority order and launch them when both buckets allow"""
+        while True:
+            _, _, job = await self._queue.get()
+            if job.future.done():
+                self._finish(job)
+                continue
+
+            if job.chat_id is not None:
+                if job.chat_id in self._parked:
+                    # An earlier message to this chat is waiting; never overtake it
+                    self._park(job)
+                    continue
+                wait = self._chat_bucket(job.chat_id).try_acquire()
+                if wait > 0:
+                    # Park this chat's job without blocking other chats
+                    self._defer(job, wait)
+                    continue
+
+            wait = self._global_bucket.try_acquire()
+            while wait > 0:
+                await asyncio.sleep(wait)
+                wait = self._global_bucket.try_acquire()
+
+            asyncio.get_running_loop().create_task(self._send(job))
+
+    async def _send(self, job: _Job):
+        job.attempts += 1
+        self.stats["in_flight"] += 1
+        started = time.monotonic()
+        try:
+            result = await job.send()
+        except RetryAfter as e:
+            # Flood control is still an answer from Telegram
+            health_monitor.telegram.record(True, time.monotonic() - started)
+            retry_after = e.retry_after
+            if hasattr(retry_after, "total_seconds"):
+                retry_after = retry_after.total_seconds()
+            if job.attempts <= self.max_retries:
+                self.stats["retries"] += 1
+                logger.warning(f"⏳ Flood wait {retry_after}s for chat {job.chat_id}, retrying")
+                if job.chat_id is not None:
+                    self._chat_bucket(job.chat_id).penalize(retry_after)
+                self._defer(job, retry_after)
+                return
+            self._fail(job, e)
+        except Exception as e:
+            if isinstance(e, TelegramError):
+                # Only timeouts and connection errors say Telegram is unreachable;
+                # BadRequest (a NetworkError subclass) and Forbidden are answers
+                reachable = not isinstance(e, NetworkError) or isinstance(e, BadRequest)
+                health_monitor.telegram.record(reachable, time.monotonic() - started, error=e)
+            self._fail(job, e)
+        else:
+            health_monitor.telegram.record(True, time.monotonic() - started)
+            self.stats["sent"] += 1
+            if not job.future.done():
+                job.future.set_result(result)
+            self._finish(job)
+        finally:
+            self.stats["in_flight"] -= 1
+
+    def _fail(self, job: _Job, error: Exception):
+        self.stats["failed"] += 1
+        if not job.future.done():
+            job.future.set_exception(error)
+        self._finish(job)
+
+    def _finish(self, job: _Job):
+        self._pending_by_priority[job.priority] -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get queue depth and delivery counters"""
+        return {
+            **self.stats,
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "pending_by_priority": dict(self._pending_by_priority),
+            "tracked_chats": len(self._chat_buckets)
+        }
+
+    async def stop(self):
+        """Stop the dispatcher task"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            try:
+                await self._dispatcher
+            except asyncio.CancelledError:
+                pass
+            self._dispatcher = None
+
+# Global outbound scheduler instance
+outbound = OutboundScheduler()
+
+async def reply_text(message, text: str, priority: int = PRIORITY_USER, **kwargs):
+    """Scheduled Message.reply_text"""
+    return await outbound.submit(lambda: message.reply_text(text, **kwargs), message.chat_id, priority)
+
+async def edit_text(message, text: str, priority: int = PRIORITY_USER, **kwargs):
+    """Scheduled Message.edit_text"""
+    return await outbound.submit(lambda: message.edit_text(text, **kwargs), message.chat_id, priority)
+
+async def reply_poll(message, priority: int = PRIORITY_USER, **kwargs):
+    """Scheduled Message.reply_poll"""
+    return await outbound.submit(lambda: message.reply_poll(**kwargs), message.chat_id, priority)
+
+async def send_message(bot, chat_id, text: str, priority: int = PRIORITY_USER, **kwargs):
+    """Scheduled Bot.send_message"""
+    return await outbound.submit(lambda: bot.send_message(chat_id=chat_id, text=text, **kwargs), chat_id, priority)
@@ -0,0 +1,136 @@
+"""
+On-demand sampling profiler for the event loop thread
+"""
+
+import signal
+import sys
+import threading
+import time
+import traceback
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config.config import LOGS_DIR, PROFILER_INTERVAL, PROFILER_TOP_STACKS
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+class SamplingProfiler:
+    """
+    Samples the stack of one thread from a background thread
+
+    Sampling only reads sys._current_frames(), so the profiled thread (the
+    event loop) pays nothing beyond the GIL hand-offs. Reports list the most
+    frequent stacks and are written to the logs directory.
+    """
+
+    def __init__(self, interval: float = PROFILER_INTERVAL, top: int = PROFILER_TOP_STACKS,
+                 output_dir: Path = LOGS_DIR):
+        self.interval = interval
+        self.top = top
+        self.output_dir = output_dir
+        self._target_thread: Optional[int] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started = 0.0
+        self.last_report: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, duration: Optional[float] = None, thread_id: Optional[int] = None) -> bool:
+        """Start sampling (the calling thread by default); False if already running"""
+        if self.running:
+            return False
+        self._target_thread = thread_id or threading.get_ident()
+        self._stacks = Counter()
+        self._samples = 0
+        self._started = time.monotonic()
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._sample_loop, args=(duration,), name="cholan-profiler", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"🔬 Sampling profiler started{f' for {duration:.0f}s' if duration else ''}")
+        return True
+
+    def stop(self):
+        """Stop sampling; the report is written by the sampler thread"""
+        self._stop.set()
+
+    def _sample_loop(self, duration: Optional[float]):
+        deadline = self._started + duration if duration else None
+        while not self._stop.wait(self.interval):
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+            frame = sys._current_frames().get(self._target_thread)
+            if frame is None:
+                break
+            stack = tuple(
+                f"{Path(entry.filename).name}:{entry.name}:{entry.lineno}"
+                for entry in traceback.extract_stack(frame, limit=25)
+            )
+            self._stacks[stack] += 1
+            self._samples += 1
+        self._write_report()
+
+    def top_stacks(self) -> List[Tuple[Tuple[str, ...], int]]:
+        return self._stacks.most_common(self.top)
+
+    def format_report(self) -> str:
+        elapsed = time.monotonic() - self._started
+        lines = [f"Sampling profile: {self._samples} samples over {elapsed:.1f}s (every {self.interval * 1000:.0f} ms)"]
+        for rank, (stack, count) in enumerate(self.top_stacks(), 1):
+            share = count / self._samples * 100 if self._samples else 0
+            lines.append(f"\n#{rank} {share:.1f}% ({count} samples)")
+            lines.extend(f"    {entry}" for entry in stack[-12:])
+        return "\n".join(lines)
+
+    def _write_report(self):
+        self.last_report = self.format_report()
+        path = self.output_dir / f"profile-{datetime.now().strftime('%Y%m%d-%H%M%S')}.txt"
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(self.last_report, encoding='utf-8')
+            logger.info(f"🔬 Profile written to {path} ({self._samples} samples)")
+        except Exception as e:
+            logger.error(f"❌ Failed to write profile: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {"running": int(self.running), "samples": self._samples}
+
+# Global profiler instance
+profiler = SamplingProfiler()
+
+def _toggle_on_request(requested: threading.Event, main_thread: int):
+    """Start or stop the profiler each time the signal handler sets `requested`"""
+    while True:
+        requested.wait()
+        requested.clear()
+        if profiler.running:
+            profiler.stop()
+        else:
+            profiler.start(thread_id=main_thread)
+
+def install_profiler_signal(signum: int = getattr(signal, "SIGUSR2", 0)) -> bool:
+    """Toggle the profiler on the main thread with `kill -USR2 <pid>` (POSIX only)"""
+    if not signum:
+        return False
+    main_thread = threading.main_thread().ident
+    requested = threading.Event()
+
+    # The handler interrupts the main thread anywhere, possibly inside the
+    # logging lock, so it only sets a flag; a helper thread does the work
+    def handle_signal(received, frame):
+        requested.set()
+
+    threading.Thread(
+        target=_toggle_on_request, args=(requested, main_thread), name="cholan-profiler-signal", daemon=True
+    ).start()
+    signal.signal(signum, handle_signal)
+    return True
@@ -0,0 +1,261 @@
+"""
+Resilience layer for model calls: classified retries, circuit breaker and hedging
+"""
+
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+from config.config import (
+    AI_RETRY_ATTEMPTS, AI_RETRY_BASE_DELAY, AI_RETRY_MAX_DELAY,
+    AI_BREAKER_FAILURE_THRESHOLD, AI_BREAKER_RESET_TIMEOUT,
+    AI_HEDGE_MIN_SAMPLES, AI_HEDGE_MIN_DELAY
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+try:
+    from google.api_core import exceptions as google_exceptions
+    _RETRYABLE_GOOGLE_ERRORS = (
+        google_exceptions.TooManyRequests,
+        google_exceptions.InternalServerError,
+        google_exceptions.BadGateway,
+        google_exceptions.ServiceUnavailable,
+        google_exceptions.GatewayTimeout,
+        google_exceptions.DeadlineExceeded
+    )
+except ImportError:
+    _RETRYABLE_GOOGLE_ERRORS = ()
+
+_RETRYABLE_STATUS_CODES = {408, 429, 500, 502, 503, 504}
+
+class CircuitOpenError(Exception):
+    """Raised without calling the model while the circuit breaker is open"""
+
+def is_retryable(error: BaseException) -> bool:
+    """
+    Classify an error from a model call
+
+    Timeouts, connection problems, rate limits and 5xx responses are transient
+    and worth retrying. Everything else (bad request, permission denied,
+    blocked prompt) would fail the same way again.
+    """
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError) + _RETRYABLE_GOOGLE_ERRORS):
+        return True
+    code = getattr(error, "code", None)
+    return isinstance(code, int) and code in _RETRYABLE_STATUS_CODES
+
+def backoff_delay(attempt: int, base: float = AI_RETRY_BASE_DELAY, cap: float = AI_RETRY_MAX_DELAY) -> float:
+    """Exponential backoff with full jitter for the given retry number (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+class CircuitBreaker:
+    """
+    Closed -> open after consecutive transient failures -> half-open after a cool-down
+
+    While open every call fails fast. In half-open state a single trial call
+    is let through; its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = AI_BREAKER_FAILURE_THRESHOLD,
+                 reset_timeout: float = AI_BREAKER_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self.stats: Dict[str, int] = {"opened": 0, "rejected": 0}
+
+    def allow(self) -> bool:
+        """Whether a call may go to the model now"""
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                self.stats["rejected"] += 1
+                return False
+            self.state = self.HALF_OPEN
+            self._trial_in_flight = False
+
+        if self.state == self.HALF_OPEN:
+            if self._trial_in_flight:
+                self.stats["rejected"] += 1
+                return False
+            self._trial_in_flight = True
+        return True
+
+    def is_open(self) -> bool:
+        """Open and still cooling down, so calls fail fast right now"""
+        return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def cancel_trial(self):
+        """Forget a trial call whose outcome says nothing about the model's health"""
+        self._trial_in_flight = False
+
+    def record_success(self):
+        if self.state != self.CLOSED:
+            logger.info("✅ Gemini circuit closed")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._trial_in_flight = False
+
+    def record_failure(self):
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                self.stats["opened"] += 1
+                logger.warning(f"🔌 Gemini circuit opened after {self.failures} failures")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+class LatencyTracker:
+    """Rolling window of recent call latencies"""
+
+    def __init__(self, size: int = 200):
+        self._samples: Deque[float] = deque(maxlen=size)
+
+    def add(self, seconds: float):
+        self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        if not self._samples:
+            return None
+        ordered = sorted(self._samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+class ResilientCaller:
+    """
+    Wraps model calls with classified retries, a circuit breaker and optional hedging
+
+    make_call must start an independent attempt each time it is called (for
+    chat sessions: send on a copy of the session), so that a retry or a hedge
+    never appends to the same history twice.
+    """
+
+    def __init__(self, max_attempts: int = AI_RETRY_ATTEMPTS,
+                 breaker: Optional[CircuitBreaker] = None,
+                 hedge_min_samples: int = AI_HEDGE_MIN_SAMPLES,
+                 hedge_min_delay: float = AI_HEDGE_MIN_DELAY,
+                 sleep: Callable[[float], Awaitable[None]] = asyncio.sleep):
+        self.max_attempts = max_attempts
+        self.breaker = breaker or CircuitBreaker()
+        self.latency = LatencyTracker()
+        self.hedge_min_samples = hedge_min_samples
+        self.hedge_min_delay = hedge_min_delay
+        self._sleep = sleep
+        self.stats: Dict[str, int] = {
+            "calls": 0,
+            "attempts": 0,
+            "retries": 0,
+            "retryable_errors": 0,
+            "fatal_errors": 0,
+            "short_circuited": 0,
+            "hedges_sent": 0,
+            "hedges_won": 0
+        }
+
+    def hedge_delay(self) -> Optional[float]:
+        """Seconds to wait before hedging (the recent p95), or None while there is too little data"""
+        if len(self.latency) < self.hedge_min_samples:
+            return None
+        return max(self.hedge_min_delay, self.latency.percentile(0.95))
+
+    async def call(self, make_call: Callable[[], Awaitable[Any]], hedge: bool = False) -> Any:
+        """
+        Run make_call with retries; hedge=True allows a duplicate attempt after the p95 latency
+
+        Raises:
+            CircuitOpenError: the circuit is open and the model was not called
+        """
+        self.stats["calls"] += 1
+        for attempt in range(self.max_attempts):
+            if not self.breaker.allow():
+                self.stats["short_circuited"] += 1
+                raise CircuitOpenError("Gemini circuit is open")
+
+            try:
+                result = await self._attempt(make_call, hedge)
+            except asyncio.CancelledError:
+                # Our caller gave up; that says nothing about the model's health
+                self.breaker.cancel_trial()
+                raise
+            except Exception as e:
+                if not is_retryable(e):
+                    self.stats["fatal_errors"] += 1
+                    # A bad request is neither an outage nor proof of recovery:
+                    # the failure count stays and a half-open circuit stays half-open
+                    self.breaker.cancel_trial()
+                    raise
+
+                self.stats["retryable_errors"] += 1
+                self.breaker.record_failure()
+                if attempt == self.max_attempts - 1:
+                    raise
+
+                delay = backoff_delay(attempt)
+                self.stats["retries"] += 1
+                logger.warning(f"🔁 Gemini call failed ({type(e).__name__}), retry {attempt + 1} in {delay:.2f}s")
+                await self._sleep(delay)
+            else:
+                self.breaker.record_success()
+                return result
+
+    async def _timed(self, make_call: Callable[[], Awaitable[Any]]) -> Any:
+        started = time.monotonic()
+        self.stats["attempts"] += 1
+        result = await make_call()
+        self.latency.add(time.monotonic() - started)
+        return result
+
+    async def _attempt(self, make_call: Callable[[], Awaitable[Any]], hedge: bool) -> Any:
+        delay = self.hedge_delay() if hedge else None
+        if delay is None:
+            return await self._timed(make_call)
+
+        primary = asyncio.ensure_future(self._timed(make_call))
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done:
+            return primary.result()
+
+        # The primary is slower than 95% of recent calls: race a second attempt
+        self.stats["hedges_sent"] += 1
+        backup = asyncio.ensure_future(self._timed(make_call))
+        pending = {primary, backup}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.stats["hedges_won"] += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get retry, breaker and hedging counters"""
+        p95 = self.latency.percentile(0.95)
+        return {
+            **self.stats,
+            "breaker_state": self.breaker.state,
+            "breaker_opened": self.breaker.stats["opened"],
+            "breaker_rejected": self.breaker.stats["rejected"],
+            "latency_p95": round(p95, 3) if p95 is not None else None
+        }
+
+# Global resilient caller for Gemini
+gemini_resilience = ResilientCaller()
@@ -0,0 +1,196 @@
+"""
+Response cache for repeated agricultural questions
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from config.config import (
+    RESPONSE_CACHE_MAX_ENTRIES, RESPONSE_CACHE_TTL, RESPONSE_CACHE_MIN_TOKENS,
+    RESPONSE_CACHE_DIR, FEATURES
+)
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Words that do not change what a farming question is about
+STOP_WORDS = frozenset({
+    'a', 'an', 'the', 'is', 'are', 'am', 'was', 'were', 'be', 'to', 'of', 'in',
+    'on', 'for', 'at', 'by', 'with', 'and', 'or', 'my', 'your', 'i', 'me', 'we',
+    'you', 'it', 'do', 'does', 'can', 'could', 'should', 'would', 'please',
+    'tell', 'about', 'some', 'any', 'this', 'that', 'there', 'what', 's'
+})
+
+_ASCII_TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+def _unicode_tokens(text: str) -> List[str]:
+    """Words of any script; vowel signs (Tamil, Devanagari) are combining marks, not separators"""
+    return ''.join(char if unicodedata.category(char)[0] in 'LMN' else ' ' for char in text).split()
+
+def normalize_query(text: str) -> str:
+    """Normalize text for cache keys: case, punctuation, whitespace and stop-words"""
+    text = text.casefold()
+    tokens = _ASCII_TOKEN_PATTERN.findall(text) if text.isascii() else _unicode_tokens(text)
+    return ' '.join(token for token in tokens if token not in STOP_WORDS)
+
+class ResponseCache:
+    """Two-tier (memory LRU + optional disk) TTL cache keyed on normalized questions"""
+
+    def __init__(self, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 ttl: float = RESPONSE_CACHE_TTL,
+                 min_tokens: int = RESPONSE_CACHE_MIN_TOKENS,
+                 disk_dir: Optional[Path] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.min_tokens = min_tokens
+        self.disk_dir = disk_dir
+        self._memory: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "stores": 0,
+            "expired": 0,
+            "evicted": 0,
+            "uncacheable": 0
+        }
+
+        if self.disk_dir is not None:
+            self.disk_dir.mkdir(parents=True, exist_ok=True)
+
+    def make_key(self, text: str) -> Optional[str]:
+        """Build a cache key, or None when the text is too short to be context-free"""
+        normalized = normalize_query(text)
+        if len(normalized.split()) < self.min_tokens:
+            return None
+        return normalized
+
+    def _disk_path(self, key: str) -> Path:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return self.disk_dir / f"{digest}.json"
+
+    async def get(self, text: str) -> Optional[str]:
+        """Look up a cached response for the question"""
+        key = self.make_key(text)
+        if key is None:
+            self.stats["uncacheable"] += 1
+            return None
+
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            response, stored_at = entry
+            if now - stored_at <= self.ttl:
+                self._memory.move_to_end(key)
+                self.stats["hits"] += 1
+                self.stats["memory_hits"] += 1
+                return response
+            del self._memory[key]
+            self.stats["expired"] += 1
+
+        if self.disk_dir is not None:
+            response = await asyncio.to_thread(self._read_disk, key, now)
+            if response is not None:
+                self._store_memory(key, response, now)
+                self.stats["hits"] += 1
+                self.stats["disk_hits"] += 1
+                return response
+
+        self.stats["misses"] += 1
+        return None
+
+    async def put(self, text: str, response: str):
+        """Cache a response for the question"""
+        key = self.make_key(text)
+        if key is None:
+            return
+
+        now = time.time()
+        self._store_memory(key, response, now)
+        self.stats["stores"] += 1
+
+        if self.disk_dir is not None:
+            await asyncio.to_thread(self._write_disk, key, response, now)
+
+    def _store_memory(self, key: str, response: str, stored_at: float):
+        self._memory[key] = (response, stored_at)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self.stats["evicted"] += 1
+
+    def _read_disk(self, key: str, now: float) -> Optional[str]:
+        path = self._disk_path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                data = json.load(file)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Unreadable cache entry {path.name}: {e}")
+            return None
+
+        if data.get('key') != key:
+            return None
+        if now - data.get('stored_at', 0) > self.ttl:
+            self.stats["expired"] += 1
+            path.unlink(missing_ok=True)
+            return None
+        return data.get('response')
+
+    def _write_disk(self, key: str, response: str, stored_at: float):
+        path = self._disk_path(key)
+        tmp_path = path.with_suffix('.tmp')
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump({'key': key, 'response': response, 'stored_at': stored_at}, file, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            logger.warning(f"Failed to write cache entry: {e}")
+
+    def purge_expired(self) -> int:
+        """Remove expired entries from both tiers; returns the number removed"""
+        now = time.time()
+        removed = 0
+        for key in [k for k, (_, stored_at) in self._memory.items() if now - stored_at > self.ttl]:
+            del self._memory[key]
+            removed += 1
+
+        if self.disk_dir is not None:
+            for path in self.disk_dir.glob('*.json'):
+                try:
+                    if now - path.stat().st_mtime > self.ttl:
+                        path.unlink(missing_ok=True)
+                        removed += 1
+                except OSError:
+                    continue
+
+        self.stats["expired"] += removed
+        return removed
+
+    def clear(self):
+        """Drop all in-memory entries"""
+        self._memory.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get hit/miss statistics"""
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "entries": len(self._memory),
+            "hit_rate": self.stats["hits"] / lookups if lookups else 0.0
+        }
+
+# Global response cache instance
+response_cache = ResponseCache(
+    disk_dir=RESPONSE_CACHE_DIR if FEATURES["enable_response_cache_disk"] else None
+)
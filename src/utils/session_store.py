@@ -0,0 +1,145 @@
+"""
+Bounded per-user chat session store with LRU and idle-TTL eviction
+"""
+
+import asyncio
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from config.config import SESSION_MAX_ENTRIES, SESSION_IDLE_TTL, SESSION_SWEEP_INTERVAL
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+def estimate_session_bytes(session: Any) -> int:
+    """Approximate memory held by a Gemini chat session (dominated by its history)"""
+    size = sys.getsizeof(session)
+    for content in getattr(session, "history", None) or []:
+        # Gemini returns Content objects; turns we append ourselves are {"role": ..., "parts": [...]}
+        parts = content.get("parts") if isinstance(content, dict) else getattr(content, "parts", None)
+        for part in parts or []:
+            size += len(part if isinstance(part, str) else getattr(part, "text", "") or "")
+    return size
+
+class SessionStore:
+    """LRU mapping of user ID to chat session, with an idle TTL and eviction stats"""
+
+    def __init__(self, max_entries: int = SESSION_MAX_ENTRIES,
+                 idle_ttl: float = SESSION_IDLE_TTL,
+                 size_estimator: Callable[[Any], int] = estimate_session_bytes,
+                 sweep_interval: float = SESSION_SWEEP_INTERVAL):
+        self.max_entries = max_entries
+        self.idle_ttl = idle_ttl
+        self.size_estimator = size_estimator
+        self.sweep_interval = sweep_interval
+        self._sweeper: Optional[asyncio.Task] = None
+        self._sessions: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._last_used: Dict[Hashable, float] = {}
+        self.stats: Dict[str, int] = {
+            "hits": 0,
+            "misses": 0,
+            "evicted_lru": 0,
+            "evicted_ttl": 0,
+            "cleared": 0
+        }
+
+    def __contains__(self, key: Hashable) -> bool:
+        # A membership test must not count as a hit or miss, or evict
+        last_used = self._last_used.get(key)
+        return last_used is not None and time.monotonic() - last_used <= self.idle_ttl
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def get(self, key: Hashable, touch: bool = True) -> Optional[Any]:
+        """Return the session for key, or None if missing or idle past the TTL"""
+        session = self._sessions.get(key)
+        if session is None:
+            self.stats["misses"] += 1
+            return None
+
+        now = time.monotonic()
+        if now - self._last_used[key] > self.idle_ttl:
+            self._remove(key)
+            self.stats["evicted_ttl"] += 1
+            self.stats["misses"] += 1
+            return None
+
+        if touch:
+            self._sessions.move_to_end(key)
+            self._last_used[key] = now
+        self.stats["hits"] += 1
+        return session
+
+    def put(self, key: Hashable, session: Any):
+        """Store a session, evicting the least recently used entries over the cap"""
+        self._sessions[key] = session
+        self._sessions.move_to_end(key)
+        self._last_used[key] = time.monotonic()
+        self._evict()
+
+    def pop(self, key: Hashable) -> Optional[Any]:
+        """Remove and return the session for key"""
+        if key in self._sessions:
+            self.stats["cleared"] += 1
+            return self._remove(key)
+        return None
+
+    def _remove(self, key: Hashable) -> Any:
+        self._last_used.pop(key, None)
+        return self._sessions.pop(key)
+
+    def _evict(self):
+        """Drop expired sessions from the LRU end, then enforce the entry cap"""
+        now = time.monotonic()
+        while self._sessions:
+            oldest = next(iter(self._sessions))
+            if now - self._last_used[oldest] <= self.idle_ttl:
+                break
+            self._remove(oldest)
+            self.stats["evicted_ttl"] += 1
+
+        while len(self._sessions) > self.max_entries:
+            oldest = next(iter(self._sessions))
+            self._remove(oldest)
+            self.stats["evicted_lru"] += 1
+
+    def sweep(self) -> int:
+        """Evict idle sessions; returns the number removed"""
+        before = len(self._sessions)
+        self._evict()
+        return before - len(self._sessions)
+
+    def start(self):
+        """Sweep idle sessions periodically, so they are freed even when no new sessions arrive"""
+        if self._sweeper is None:
+            self._sweeper = asyncio.get_running_loop().create_task(self._run_sweeper())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    async def _run_sweeper(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            removed = self.sweep()
+            if removed:
+                logger.debug("Swept %d idle chat sessions", removed)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get resident-session gauges and eviction counters"""
+        session_bytes = [self.size_estimator(s) for s in self._sessions.values()]
+        return {
+            **self.stats,
+            "resident_sessions": len(self._sessions),
+            "max_entries": self.max_entries,
+            "approx_bytes": sum(session_bytes),
+            "approx_bytes_per_session": (sum(session_bytes) // len(session_bytes)) if session_bytes else 0
+        }
@@ -0,0 +1,69 @@
+"""
+Single-flight coalescing of identical in-flight requests
+"""
+
+import asyncio
+import re
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+def coalescing_key(text: str) -> Optional[str]:
+    """
+    Key under which identical prompts share a call, or None to never share
+
+    Only case and whitespace are normalized (Unicode-aware), so two prompts
+    share a call only when they ask exactly the same thing in any script.
+    """
+    key = _WHITESPACE.sub(' ', text.casefold()).strip()
+    kept = len(key) - key.count(' ')
+    original = len(text) - sum(1 for char in text if char.isspace())
+    # A key that lost most of the text could match a different question
+    if not key or kept * 2 < original:
+        return None
+    return key
+
+class SingleFlight:
+    """
+    Shares one in-flight call between concurrent callers with the same key
+
+    The first caller starts the call as its own task; callers arriving while
+    it runs await the same task. Results are never kept after the call
+    finishes, so there is no staleness - that is the response cache's job.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats: Dict[str, int] = {
+            "calls": 0,       # Calls actually started
+            "coalesced": 0    # Duplicate callers that joined an in-flight call
+        }
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run fn() for key, or join the identical call already running"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.get_running_loop().create_task(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+            self.stats["calls"] += 1
+        else:
+            self.stats["coalesced"] += 1
+            logger.debug("Coalesced duplicate request: %r", key)
+
+        # A cancelled caller must not cancel the call for everyone else
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task):
+        self._inflight.pop(key, None)
+        # Mark the error as retrieved even if every caller went away
+        if not task.cancelled():
+            task.exception()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Get call and coalescing counters"""
+        return {**self.stats, "in_flight": len(self._inflight)}
@@ -0,0 +1,129 @@
+"""
+Startup phases, cold-start timing and readiness state
+"""
+
+import asyncio
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from config.config import TOKEN, GEMINI_API_KEY
+from utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Placeholders config.py falls back to when a variable is unset
+_REQUIRED_SETTINGS = {
+    "TELEGRAM_BOT_TOKEN": (TOKEN, "YOUR_BOT_TOKEN_HERE"),
+    "GEMINI_API_KEY": (GEMINI_API_KEY, "YOUR_GEMINI_API_KEY_HERE")
+}
+
+def missing_settings() -> List[str]:
+    """Required environment variables that are still unset"""
+    return [name for name, (value, placeholder) in _REQUIRED_SETTINGS.items() if value == placeholder]
+
+class StartupTracker:
+    """
+    Times each startup phase and tracks whether the bot is serving
+
+    Sequential phases (imports, logging, building the application) are timed
+    with phase() or lap(). Warm-ups are blocking initializers run in threads,
+    concurrently; the required ones finish before the bot starts serving and
+    the background ones complete while it already serves (their subsystems
+    initialize lazily if used first).
+    """
+
+    def __init__(self):
+        self.state = "starting"  # starting -> warming_up -> serving -> stopping
+        self.phases: Dict[str, float] = {}
+        self.failed: List[str] = []
+        self.serving_after: Optional[float] = None
+        self.print_report = False  # --profile-startup
+        self._kinds: Dict[str, str] = {}
+        self._origin = self._checkpoint = time.perf_counter()
+        self._background: List[asyncio.Task] = []
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "serving"
+
+    def begin(self, origin: float):
+        """Measure from origin (a time.perf_counter() value taken before the heavy imports)"""
+        self._origin = self._checkpoint = origin
+
+    def lap(self, name: str):
+        """Record the time since the previous phase ended as phase `name`"""
+        now = time.perf_counter()
+        self._record(name, now - self._checkpoint, "sequential")
+        self._checkpoint = now
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time a sequential phase"""
+        self._checkpoint = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.lap(name)
+
+    def _record(self, name: str, seconds: float, kind: str):
+        self.phases[name] = seconds
+        self._kinds[name] = kind
+
+    async def _warm(self, name: str, initialize: Callable[[], Any], kind: str):
+        started = time.perf_counter()
+        try:
+            # initialize_model() style initializers report failure by returning False
+            if await asyncio.to_thread(initialize) is False:
+                self.failed.append(name)
+        except Exception as e:
+            self.failed.append(name)
+            logger.error(f"❌ Startup phase {name} failed: {e}")
+        finally:
+            self._record(name, time.perf_counter() - started, kind)
+
+    async def warm_up(self, required: Dict[str, Callable[[], Any]],
+                      background: Optional[Dict[str, Callable[[], Any]]] = None):
+        """Run blocking initializers off the event loop; returns once the required ones are done"""
+        self.state = "warming_up"
+        for name, initialize in (background or {}).items():
+            self._background.append(asyncio.create_task(self._warm(name, initialize, "background")))
+        await asyncio.gather(*(self._warm(name, initialize, "warm-up") for name, initialize in required.items()))
+        self._checkpoint = time.perf_counter()
+
+    def mark_serving(self):
+        self.state = "serving"
+        self.serving_after = time.perf_counter() - self._origin
+        logger.info(f"🚀 Serving {self.serving_after:.2f}s after start")
+        if self.print_report:
+            self._background.append(asyncio.get_running_loop().create_task(self._print_report_when_settled()))
+
+    def mark_stopping(self):
+        self.state = "stopping"
+
+    async def _print_report_when_settled(self):
+        await asyncio.gather(*[task for task in self._background if task is not asyncio.current_task()],
+                             return_exceptions=True)
+        print(self.format_report(), flush=True)
+
+    def format_report(self) -> str:
+        total = self.serving_after or (time.perf_counter() - self._origin)
+        lines = [f"Startup profile: serving after {total:.3f}s"]
+        for name, seconds in self.phases.items():
+            kind = self._kinds[name]
+            share = f"{seconds / total * 100:5.1f}%" if kind != "background" and total else "      "
+            notes = [kind] if kind != "sequential" else []
+            if name in self.failed:
+                notes.append("FAILED")
+            lines.append(f"  {name:<22} {seconds:8.3f}s {share}  {', '.join(notes)}".rstrip())
+        lines.append("Warm-ups run concurrently, so their times overlap; background ones finish after serving")
+        return "\n".join(lines)
+
+    def get_stats(self) -> Dict[str, Any]:
+        stats = {"ready": int(self.ready), "serving_after_seconds": self.serving_after or 0.0,
+                 "failed_phases": len(self.failed)}
+        stats.update({f"{name}_seconds": seconds for name, seconds in self.phases.items()})
+        return stats
+
+# Global startup tracker instance
+startup = StartupTracker()
@@ -0,0 +1,13 @@
+"""
+Offline load test: the real bot application against a fake Bot API and a fake Gemini
+
+    python -m tools.loadtest --users 50 --duration 60
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root and src to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
@@ -0,0 +1,191 @@
+"""
+Run the load test and print throughput, latency percentiles and API calls per update
+
+    python -m tools.loadtest --users 50 --duration 60 --gemini-latency 1.2 --gemini-error-rate 0.02
+
+Everything runs in one process against local fakes, so no network access or
+credentials are needed. Exits non-zero when any update went unanswered.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List
+
+from config.config import TOKEN, FEATURES
+from main import build_application, post_shutdown
+from bot.webhook import application_sink
+from bot.debounce import message_aggregator
+from utils import ai_handler as ai_module
+from utils import moderation
+from utils import outbound as outbound_module
+from utils.admission import admission
+from utils.metrics import metrics_endpoint
+from utils.response_cache import response_cache
+from utils.moderation_store import SQLiteModerationStore
+from tools.loadtest.fake_bot_api import FakeBotAPI
+from tools.loadtest.fake_gemini import FakeGeminiModel
+from tools.loadtest.traffic import ReplyTracker, SyntheticUser, TrafficStats
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+def _latency_summary(latencies: List[float]) -> Dict[str, float]:
+    return {
+        "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1)
+    }
+
+def isolate_side_effects(workdir: Path, args: argparse.Namespace):
+    """Keep synthetic users out of real storage and away from real rate limits"""
+    moderation._store = SQLiteModerationStore(
+        path=workdir / "moderation.db", legacy_json=workdir / "user_data.json"
+    )
+    moderation.load_user_data()
+    FEATURES["save_conversations"] = False
+    # Synthetic users repeat a small set of questions, so cached answers would
+    # hide the model path being measured; --cache measures them on purpose
+    FEATURES["enable_response_cache"] = args.cache
+    if response_cache.disk_dir is not None:
+        response_cache.disk_dir = workdir / "response_cache"
+        response_cache.disk_dir.mkdir()
+    metrics_endpoint.port = 0
+    if args.debounce is not None:
+        message_aggregator.quiet_window = args.debounce
+    if not args.telegram_limits:
+        # Measure the bot itself rather than Telegram's send limits
+        outbound_module.outbound = outbound_module.OutboundScheduler(
+            global_rate=1e6, global_burst=1e6, chat_rate=1e6, chat_burst=1e6
+        )
+
+async def run_load_test(args: argparse.Namespace) -> Dict[str, Any]:
+    model = FakeGeminiModel(
+        error_rate=args.gemini_error_rate, base_latency=args.gemini_latency, sigma=args.gemini_sigma,
+        slow_rate=args.gemini_slow_rate, slow_latency=args.gemini_slow_latency
+    )
+    ai_module.ai_handler.model = model
+
+    api = FakeBotAPI(TOKEN, latency=args.api_latency)
+    tracker = ReplyTracker()
+    api.observers.append(tracker.observe)
+    await api.start()
+
+    application = build_application(webhook=True, base_url=api.base_url)
+    await application.initialize()
+    await application.start()
+    calls_before = api.total_calls
+
+    stats = TrafficStats()
+    sink = application_sink(application)
+    users = [
+        SyntheticUser(i, sink, tracker, stats, think_time=args.think_time, reply_timeout=args.reply_timeout)
+        for i in range(args.users)
+    ]
+    started = time.monotonic()
+    await asyncio.gather(*(user.run(started + args.duration) for user in users))
+    elapsed = time.monotonic() - started
+
+    scheduler = outbound_module.outbound
+    await application.stop()
+    await application.shutdown()
+    # Flushes the channel log digest, which is part of the API cost
+    await post_shutdown(application)
+    await scheduler.stop()
+    await api.stop()
+
+    by_action: Dict[str, List[float]] = defaultdict(list)
+    timeouts: Dict[str, int] = defaultdict(int)
+    for result in stats.results:
+        if result.latency is not None:
+            by_action[result.action].append(result.latency)
+        elif result.timed_out:
+            timeouts[result.action] += 1
+    answered = [latency for latencies in by_action.values() for latency in latencies]
+    api_calls = api.total_calls - calls_before
+
+    return {
+        "users": args.users,
+        "duration_s": round(elapsed, 1),
+        "actions": len(stats.results),
+        "updates": stats.updates_sent,
+        "answered": len(answered),
+        "timeouts": sum(timeouts.values()),
+        "throughput_per_s": round(len(answered) / elapsed, 2) if elapsed else 0.0,
+        **_latency_summary(answered),
+        "api_calls": api_calls,
+        "api_calls_per_update": round(api_calls / stats.updates_sent, 2) if stats.updates_sent else 0.0,
+        "api_calls_by_method": dict(api.calls),
+        "gemini_calls": model.stats["calls"],
+        "gemini_errors": model.stats["errors"],
+        "cache_hits": response_cache.stats["hits"],
+        "shed": admission.get_stats()["shed_total"],
+        "by_action": {
+            action: {"count": len(latencies), "timeouts": timeouts[action], **_latency_summary(latencies)}
+            for action, latencies in sorted(by_action.items())
+        }
+    }
+
+def print_report(report: Dict[str, Any]):
+    print(
+        f"\n{report['users']} users for {report['duration_s']}s: {report['actions']} actions, "
+        f"{report['updates']} updates, {report['answered']} answered, {report['timeouts']} timed out"
+    )
+    print(
+        f"throughput={report['throughput_per_s']}/s p50={report['p50_ms']}ms "
+        f"p95={report['p95_ms']}ms p99={report['p99_ms']}ms"
+    )
+    print(
+        f"api_calls={report['api_calls']} ({report['api_calls_per_update']} per update) "
+        f"gemini_calls={report['gemini_calls']} gemini_errors={report['gemini_errors']} "
+        f"cache_hits={report['cache_hits']} shed={report['shed']}"
+    )
+    print(f"api_calls_by_method={report['api_calls_by_method']}\n")
+    for action, row in report["by_action"].items():
+        print(
+            f"{action:>16} n={row['count']:>5} timeouts={row['timeouts']:>3} "
+            f"p50={row['p50_ms']:>8.1f}ms p95={row['p95_ms']:>8.1f}ms p99={row['p99_ms']:>8.1f}ms"
+        )
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline load test against fake Bot API and Gemini servers")
+    parser.add_argument("--users", type=int, default=20, help="Concurrent synthetic users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to generate traffic")
+    parser.add_argument("--think-time", type=float, default=2.0, help="Mean seconds between a user's actions")
+    parser.add_argument("--reply-timeout", type=float, default=30.0, help="Seconds before an update counts as lost")
+    parser.add_argument("--gemini-latency", type=float, default=0.8, help="Median Gemini latency in seconds")
+    parser.add_argument("--gemini-sigma", type=float, default=0.4, help="Log-normal spread; 0 for uniform")
+    parser.add_argument("--gemini-error-rate", type=float, default=0.01, help="Share of calls failing with 503")
+    parser.add_argument("--gemini-slow-rate", type=float, default=0.0, help="Share of calls taking the slow latency")
+    parser.add_argument("--gemini-slow-latency", type=float, default=5.0)
+    parser.add_argument("--api-latency", type=float, default=0.02, help="Seconds per fake Bot API call")
+    parser.add_argument("--debounce", type=float, help="Override DEBOUNCE_WINDOW for the run")
+    parser.add_argument("--telegram-limits", action="store_true",
+                        help="Keep the outbound scheduler's real Telegram rate limits")
+    parser.add_argument("--cache", action="store_true",
+                        help="Keep the response cache on (off by default so every question reaches the model)")
+    parser.add_argument("--json", type=Path, help="Also write the report to this file")
+    parser.add_argument("--seed", type=int, default=7)
+    return parser.parse_args(argv)
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    random.seed(args.seed)
+    with tempfile.TemporaryDirectory(prefix="cholan-loadtest-") as workdir:
+        isolate_side_effects(Path(workdir), args)
+        report = asyncio.run(run_load_test(args))
+
+    print_report(report)
+    if args.json:
+        args.json.write_text(json.dumps(report, indent=2), encoding='utf-8')
+    return 1 if report["timeouts"] else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+In-process stand-in for the Telegram Bot API
+"""
+
+import asyncio
+import itertools
+import json
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional
+from urllib.parse import parse_qs
+
+from utils.http_server import HTTPServer, HTTPRequest, HTTPResponse
+
+BOT_USER = {
+    "id": 4242,
+    "is_bot": True,
+    "first_name": "Cholan AI",
+    "username": "cholanai_bot",
+    "can_join_groups": True,
+    "can_read_all_group_messages": False,
+    "supports_inline_queries": False
+}
+
+Observer = Callable[[str, Dict[str, Any], Any], None]
+
+def _parse_params(request: HTTPRequest) -> Dict[str, Any]:
+    """Decode form-encoded (what PTB sends) or JSON parameters; ids become ints"""
+    if "json" in request.headers.get("content-type", ""):
+        params = request.json() if request.body else {}
+    else:
+        fields = parse_qs(request.body.decode('utf-8'), keep_blank_values=True)
+        params = {name: values[-1] for name, values in fields.items()}
+
+    for name in ("chat_id", "message_id", "reply_to_message_id"):
+        value = params.get(name)
+        if isinstance(value, str) and value.lstrip("-").isdigit():
+            params[name] = int(value)
+    if "reply_parameters" in params and "reply_to_message_id" not in params:
+        reply = params["reply_parameters"]
+        reply = json.loads(reply) if isinstance(reply, str) else reply
+        params["reply_to_message_id"] = reply.get("message_id")
+    return params
+
+def _chat(chat_id: Any) -> Dict[str, Any]:
+    if isinstance(chat_id, int):
+        return {"id": chat_id, "type": "group" if chat_id < 0 else "private", "title": "Load test"}
+    # "@channel" usernames, e.g. the activity log channel
+    return {"id": -1009999, "type": "channel", "username": str(chat_id).lstrip("@")}
+
+class FakeBotAPI:
+    """
+    Answers the Bot API methods the bot uses with plausible objects
+
+    Point the application at base_url. Every call is counted per method and
+    passed to the observers, so a traffic generator can tell when an update
+    has been answered. latency adds a fixed delay to every call.
+    """
+
+    METHODS = (
+        "getMe", "sendMessage", "editMessageText", "sendPoll", "sendChatAction",
+        "setWebhook", "deleteWebhook", "getWebhookInfo"
+    )
+
+    def __init__(self, token: str, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0):
+        self.latency = latency
+        self.server = HTTPServer(host, port, name="fake Bot API")
+        self.calls: Counter = Counter()
+        self.observers: List[Observer] = []
+        self._message_ids = itertools.count(1_000_000)
+        for method in self.METHODS:
+            self.server.route("POST", f"/bot{token}/{method}", self._endpoint(method))
+
+    @property
+    def base_url(self) -> str:
+        """Value for the application builder's base_url (the token is appended by PTB)"""
+        return f"http://{self.server.host}:{self.server.port}/bot"
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+    async def start(self):
+        await self.server.start()
+
+    async def stop(self):
+        await self.server.stop()
+
+    def _endpoint(self, method: str):
+        async def handle(request: HTTPRequest) -> HTTPResponse:
+            params = _parse_params(request)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            result = self._result(method, params)
+            self.calls[method] += 1
+            for observer in self.observers:
+                observer(method, params, result)
+            return HTTPResponse.json({"ok": True, "result": result})
+        return handle
+
+    def _message(self, params: Dict[str, Any], message_id: Optional[int] = None, **fields) -> Dict[str, Any]:
+        return {
+            "message_id": message_id or next(self._message_ids),
+            "date": int(time.time()),
+            "chat": _chat(params.get("chat_id")),
+            "from": BOT_USER,
+            **fields
+        }
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == "getMe":
+            return BOT_USER
+        if method == "sendMessage":
+            return self._message(params, text=params.get("text", ""))
+        if method == "editMessageText":
+            return self._message(
+                params, message_id=params.get("message_id"),
+                text=params.get("text", ""), edit_date=int(time.time())
+            )
+        if method == "sendPoll":
+            options = params.get("options", "[]")
+            options = json.loads(options) if isinstance(options, str) else options
+            return self._message(params, poll={
+                "id": str(next(self._message_ids)),
+                "question": params.get("question", ""),
+                "options": [{"text": str(option), "voter_count": 0} for option in options],
+                "total_voter_count": 0,
+                "is_closed": False,
+                "is_anonymous": params.get("is_anonymous") != "false",
+                "type": params.get("type", "regular"),
+                "allows_multiple_answers": params.get("allows_multiple_answers") == "true"
+            })
+        if method == "getWebhookInfo":
+            return {"url": "", "has_custom_certificate": False, "pending_update_count": 0}
+        return True
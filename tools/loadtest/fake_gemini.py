@@ -0,0 +1,92 @@
+"""
+Gemini stand-in with configurable latency and error distributions
+"""
+
+import asyncio
+import math
+import random
+from typing import Dict
+
+class FakeUnavailable(Exception):
+    """Transient error, classified like a Gemini 503"""
+    code = 503
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+        self.usage_metadata = None
+
+class _FakeStream(FakeResponse):
+    def __init__(self, text: str, chunk_delay: float, chunk_chars: int = 40):
+        super().__init__(text)
+        self.chunk_delay = chunk_delay
+        self.chunk_chars = chunk_chars
+
+    def __aiter__(self):
+        return self._chunks()
+
+    async def _chunks(self):
+        for start in range(0, len(self.text), self.chunk_chars):
+            if start:
+                await asyncio.sleep(self.chunk_delay)
+            yield FakeResponse(self.text[start:start + self.chunk_chars])
+
+class FakeChat:
+    def __init__(self, model: "FakeGeminiModel", history):
+        self.model = model
+        self.history = list(history)
+
+    async def send_message_async(self, content, stream: bool = False):
+        model = self.model
+        model.stats["calls"] += 1
+        latency = model.latency()
+        # A streamed reply shows its first chunk after a share of the total latency
+        await asyncio.sleep(latency * model.first_chunk_share if stream else latency)
+        if random.random() < model.error_rate:
+            model.stats["errors"] += 1
+            raise FakeUnavailable("503 Service Unavailable (injected)")
+
+        text = model.answer(content)
+        self.history += [{"role": "user", "parts": [content]}, {"role": "model", "parts": [text]}]
+        if stream:
+            chunks = max(1, math.ceil(len(text) / 40))
+            return _FakeStream(text, latency * (1 - model.first_chunk_share) / chunks)
+        return FakeResponse(text)
+
+    def send_message(self, content):
+        raise NotImplementedError("the fake only serves the async path")
+
+class FakeGeminiModel:
+    """
+    Answers with canned text after a sampled latency, failing at error_rate
+
+    Latency is uniform within +-50% of base_latency, or log-normal around it
+    when sigma > 0; a slow_rate share of calls takes slow_latency instead to
+    model a heavy tail.
+    """
+
+    def __init__(self, error_rate: float = 0.0, base_latency: float = 0.05, sigma: float = 0.0,
+                 slow_rate: float = 0.0, slow_latency: float = 1.5, answer_chars: int = 300,
+                 first_chunk_share: float = 0.3):
+        self.error_rate = error_rate
+        self.base_latency = base_latency
+        self.sigma = sigma
+        self.slow_rate = slow_rate
+        self.slow_latency = slow_latency
+        self.answer_chars = answer_chars
+        self.first_chunk_share = first_chunk_share
+        self.stats: Dict[str, int] = {"calls": 0, "errors": 0}
+
+    def latency(self) -> float:
+        if random.random() < self.slow_rate:
+            return self.slow_latency
+        if self.sigma > 0:
+            return random.lognormvariate(math.log(self.base_latency), self.sigma)
+        return random.uniform(0.5, 1.5) * self.base_latency
+
+    def answer(self, content) -> str:
+        text = f"Fake answer about {str(content)[:40]}, with enough words to look like real farming advice. "
+        return (text * (self.answer_chars // len(text) + 1))[:self.answer_chars]
+
+    def start_chat(self, history=None):
+        return FakeChat(self, history or [])
@@ -0,0 +1,179 @@
+"""
+Synthetic users that send updates and time the bot's answers
+"""
+
+import asyncio
+import itertools
+import random
+import time
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from config.config import ERROR_MESSAGES
+from bot.streaming import STREAM_CURSOR
+
+QUESTIONS = [
+    "How do I improve the drainage of clay soil before planting maize?",
+    "When should I transplant tomato seedlings in the dry season?",
+    "What is a cheap organic way to control aphids on beans?",
+    "How much nitrogen does a hectare of rice need per season?",
+    "Is crop rotation with groundnuts good after two years of sorghum?",
+    "My cassava leaves are turning yellow, what could be the cause?",
+    "How often should drip irrigation run for young banana plants?",
+    "What are the signs of late blight on potatoes?"
+]
+SMALL_TALK = ["hello", "hi there!", "thanks", "thank you so much", "tell me a joke"]
+FRAGMENTS = [
+    ("My chilli plants", "are wilting even though I water them daily"),
+    ("quick question", "which cover crop fixes the most nitrogen?")
+]
+RUDE = ["this advice is stupid", "what a dumb answer"]
+
+# Weighted mix of user actions; every command in bot/commands.py is covered
+ACTIONS: Dict[str, int] = {
+    "question": 40,
+    "small_talk": 10,
+    "fragments": 8,
+    "rude": 2,
+    "/start": 6,
+    "/help": 6,
+    "/joke": 7,
+    "/trivia": 7,
+    "/wouldyourather": 6,
+    "/reset": 5,
+    "/profile": 3
+}
+
+# Admin-only and silently ignored for synthetic users, so nothing to wait for
+NO_REPLY_ACTIONS = {"/profile"}
+
+class ReplyTracker:
+    """
+    Fake Bot API observer that resolves one future per synthetic message
+
+    Synthetic chats are groups, so every reply quotes the message it answers.
+    An answer is the first quoting reply that is not the "Thinking..."
+    placeholder, or the first edit of that placeholder without the
+    streaming cursor.
+    """
+
+    def __init__(self):
+        self._pending: Dict[Tuple[int, int], asyncio.Future] = {}
+        self._placeholders: Dict[Tuple[int, int], int] = {}
+
+    def expect(self, chat_id: int, message_id: int) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._pending[(chat_id, message_id)] = future
+        return future
+
+    def forget(self, chat_id: int, message_id: int):
+        self._pending.pop((chat_id, message_id), None)
+
+    def _resolve(self, chat_id: int, message_id: int):
+        future = self._pending.pop((chat_id, message_id), None)
+        if future is not None and not future.done():
+            future.set_result(time.monotonic())
+
+    def observe(self, method: str, params: Dict[str, Any], result: Any):
+        chat_id = params.get("chat_id")
+        if method in ("sendMessage", "sendPoll"):
+            reply_to = params.get("reply_to_message_id")
+            if reply_to is None:
+                return
+            if params.get("text") == ERROR_MESSAGES["processing"]:
+                self._placeholders[(chat_id, result["message_id"])] = reply_to
+            else:
+                self._resolve(chat_id, reply_to)
+        elif method == "editMessageText":
+            key = (chat_id, params.get("message_id"))
+            if key in self._placeholders and STREAM_CURSOR.strip() not in params.get("text", ""):
+                self._resolve(chat_id, self._placeholders.pop(key))
+
+@dataclass
+class ActionResult:
+    action: str
+    latency: Optional[float]  # None when no answer is expected or it never arrived
+    timed_out: bool = False
+
+@dataclass
+class TrafficStats:
+    results: List[ActionResult] = field(default_factory=list)
+    updates_sent: int = 0
+
+class SyntheticUser:
+    """Closed loop: send one action, wait for its answer, think, repeat"""
+
+    _update_ids = itertools.count(1)
+
+    def __init__(self, index: int, sink: Callable[[Dict[str, Any]], Awaitable[None]],
+                 tracker: ReplyTracker, stats: TrafficStats, think_time: float = 2.0,
+                 reply_timeout: float = 30.0, fragment_gap: float = 0.3):
+        self.user_id = 500000 + index
+        self.chat_id = -(100000 + index)
+        self.username = f"loadtest_farmer_{index}"
+        self.sink = sink
+        self.tracker = tracker
+        self.stats = stats
+        self.think_time = think_time
+        self.reply_timeout = reply_timeout
+        self.fragment_gap = fragment_gap
+        self._last_message_id = 0
+
+    def _update(self, text: str) -> Dict[str, Any]:
+        self._last_message_id += 1
+        message = {
+            "message_id": self._last_message_id,
+            "date": int(time.time()),
+            "chat": {"id": self.chat_id, "type": "group", "title": "Load test"},
+            "from": {"id": self.user_id, "is_bot": False, "first_name": "Farmer", "username": self.username},
+            "text": text
+        }
+        if text.startswith("/"):
+            message["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+        return {"update_id": next(self._update_ids), "message": message}
+
+    async def _send(self, text: str):
+        self.stats.updates_sent += 1
+        await self.sink(self._update(text))
+
+    def _texts(self, action: str) -> List[str]:
+        if action == "question":
+            return [random.choice(QUESTIONS)]
+        if action == "small_talk":
+            return [random.choice(SMALL_TALK)]
+        if action == "fragments":
+            return list(random.choice(FRAGMENTS))
+        if action == "rude":
+            return [random.choice(RUDE)]
+        return [action]
+
+    async def perform(self, action: str):
+        texts = self._texts(action)
+        started = time.monotonic()
+        # Merged fragments are answered in reply to the first one
+        first_id = self._last_message_id + 1
+        answer = None if action in NO_REPLY_ACTIONS else self.tracker.expect(self.chat_id, first_id)
+
+        for i, text in enumerate(texts):
+            if i:
+                await asyncio.sleep(self.fragment_gap)
+            await self._send(text)
+
+        if answer is None:
+            self.stats.results.append(ActionResult(action, None))
+            return
+        try:
+            answered_at = await asyncio.wait_for(answer, self.reply_timeout)
+        except asyncio.TimeoutError:
+            self.tracker.forget(self.chat_id, first_id)
+            self.stats.results.append(ActionResult(action, None, timed_out=True))
+        else:
+            self.stats.results.append(ActionResult(action, answered_at - started))
+
+    async def run(self, deadline: float):
+        # Spread the first messages so users do not start in lockstep
+        await asyncio.sleep(random.uniform(0, self.think_time))
+        actions, weights = list(ACTIONS), list(ACTIONS.values())
+        while time.monotonic() < deadline:
+            await self.perform(random.choices(actions, weights)[0])
+            await asyncio.sleep(random.expovariate(1 / self.think_time) if self.think_time > 0 else 0)
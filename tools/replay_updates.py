@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Replay recorded Telegram updates against a running webhook server
+
+Accepts JSON files containing a single update, a list of updates, or
+newline-delimited updates. Example:
+
+    BOT_MODE=webhook python src/main.py &
+    python tools/replay_updates.py updates.jsonl --url http://127.0.0.1:8443/telegram
+"""
+
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+from typing import Any, Dict, Iterator
+
+def read_updates(path: Path) -> Iterator[Dict[str, Any]]:
+    """Yield updates from a JSON or JSONL file"""
+    text = path.read_text(encoding='utf-8').strip()
+    if not text:
+        return
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError:
+        for line in text.splitlines():
+            if line.strip():
+                yield json.loads(line)
+        return
+
+    if isinstance(data, list):
+        yield from data
+    else:
+        yield data
+
+def post_update(url: str, update: Dict[str, Any], secret: str) -> int:
+    """POST one update; returns the HTTP status"""
+    request = urllib.request.Request(
+        url,
+        data=json.dumps(update).encode('utf-8'),
+        headers={"Content-Type": "application/json"},
+        method="POST"
+    )
+    if secret:
+        request.add_header("X-Telegram-Bot-Api-Secret-Token", secret)
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded Telegram updates to a webhook")
+    parser.add_argument("files", nargs="+", type=Path, help="JSON/JSONL files with recorded updates")
+    parser.add_argument("--url", default="http://127.0.0.1:8443/telegram", help="Webhook endpoint")
+    parser.add_argument("--secret", default="", help="Value for X-Telegram-Bot-Api-Secret-Token")
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait between updates")
+    args = parser.parse_args(argv)
+
+    statuses: Dict[int, int] = {}
+    for path in args.files:
+        for update in read_updates(path):
+            started = time.perf_counter()
+            status = post_update(args.url, update, args.secret)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            statuses[status] = statuses.get(status, 0) + 1
+            print(f"update_id={update.get('update_id')} -> {status} ({elapsed_ms:.1f} ms)")
+            if args.delay:
+                time.sleep(args.delay)
+
+    print(f"Done: {statuses}")
+    return 0 if set(statuses) <= {200} else 1
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Drive handle_ai_response against a fake Gemini that injects latency and errors
+
+Runs a few failure scenarios (healthy, flaky, regional outage, slow tail with
+hedging) and prints success rate, latency percentiles and resilience counters:
+
+    python tools/resilience_drill.py --requests 200
+"""
+
+import argparse
+import asyncio
+import random
+import sys
+import time
+from pathlib import Path
+from typing import List
+
+# Add project root and src to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+sys.path.insert(0, str(project_root / "src"))
+
+from config.config import ERROR_MESSAGES, FEATURES
+from utils import ai_handler as ai_module
+from utils.resilience import CircuitBreaker, ResilientCaller
+from tools.loadtest.fake_gemini import FakeGeminiModel
+
+SCENARIOS = {
+    "healthy": (FakeGeminiModel(), False),
+    "flaky-30%": (FakeGeminiModel(error_rate=0.3), False),
+    "outage": (FakeGeminiModel(error_rate=1.0), False),
+    "slow-tail": (FakeGeminiModel(slow_rate=0.04), False),
+    "slow-tail+hedge": (FakeGeminiModel(slow_rate=0.04), True)
+}
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else 0.0
+
+async def run_scenario(name: str, model: FakeGeminiModel, hedge: bool, requests: int, concurrency: int):
+    ai_module.ai_handler.model = model
+    # Fresh breaker and latency window per scenario; backoff sleeps are shortened 10x
+    ai_module.gemini_resilience = ResilientCaller(
+        breaker=CircuitBreaker(reset_timeout=1.0),
+        hedge_min_samples=20,
+        hedge_min_delay=0.05,
+        sleep=lambda delay: asyncio.sleep(delay / 10)
+    )
+    FEATURES["enable_hedged_requests"] = hedge
+
+    latencies: List[float] = []
+    outcomes = {"ok": 0, "fallback": 0, "error": 0}
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int):
+        async with semaphore:
+            started = time.monotonic()
+            answer = await ai_module.handle_ai_response(
+                f"Drill question {name} number {i} about soil moisture", user_id=None
+            )
+            latencies.append(time.monotonic() - started)
+            if answer == ERROR_MESSAGES["ai_unavailable"]:
+                outcomes["fallback"] += 1
+            elif answer == ERROR_MESSAGES["ai_error"]:
+                outcomes["error"] += 1
+            else:
+                outcomes["ok"] += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    stats = ai_module.gemini_resilience.get_stats()
+    print(
+        f"{name:>16} ok={outcomes['ok']:>4} fallback={outcomes['fallback']:>4} error={outcomes['error']:>4} "
+        f"p50={percentile(latencies, 0.5) * 1000:>7.1f}ms p99={percentile(latencies, 0.99) * 1000:>7.1f}ms "
+        f"attempts={stats['attempts']:>4} retries={stats['retries']:>4} "
+        f"short_circuited={stats['short_circuited']:>4} hedges={stats['hedges_sent']}/{stats['hedges_won']} "
+        f"breaker={stats['breaker_state']}"
+    )
+
+async def main_async(args):
+    FEATURES["enable_response_cache"] = False
+    FEATURES["enable_intent_router"] = False
+    for name, (model, hedge) in SCENARIOS.items():
+        if args.scenario and name != args.scenario:
+            continue
+        await run_scenario(name, model, hedge, args.requests, args.concurrency)
+
+def main():
+    parser = argparse.ArgumentParser(description="Resilience drill against a fake Gemini")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=20, help="Requests in flight at once")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), help="Run a single scenario")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    asyncio.run(main_async(args))
+
+if __name__ == '__main__':
+    main()